@@ -0,0 +1,265 @@
+"""Whole-table patient analytics, computed column-wise with NumPy.
+
+Patient columns are read in chunks into arrays: no ORM objects and no
+per-row Python in the statistics themselves. Text
+columns become integer codes (pandas.factorize) and dates datetime64[D],
+so every statistic is a sort, a bincount or a diff over whole arrays.
+Unlike reports.py, which reads the daily rollups, these need per-visit
+detail (birth dates, patient identity) and scan the filtered visits.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, status
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.orm import Session
+
+from config import settings
+from filters import apply_patient_filters
+from models import Patient
+from name_index import fold
+
+DATE_COLUMNS = ("tanggal_lahir", "tanggal_kunjungan")
+# Days between a patient's consecutive visits, as (label, first day) buckets
+INTERVAL_BUCKETS = [("0-7", 0), ("8-30", 8), ("31-90", 31), ("91-180", 91), ("181-365", 181), ("366+", 366)]
+TREND_PERIODS = ("week", "month", "year")
+
+
+def load_visits(db: Session, columns: Iterable[str], **filters) -> Dict[str, np.ndarray]:
+    """Read ``columns`` of the visits matching the dashboard ``filters`` into arrays.
+
+    Rows are streamed ANALYTICS_BATCH_SIZE at a time and each batch is
+    transposed into per-column arrays at once. Dates are read as text
+    (SQLite stores ISO strings) and parsed by NumPy in one call.
+    """
+    columns = list(columns)
+    stmt = apply_patient_filters(
+        select(*[
+            type_coerce(getattr(Patient, column), String) if column in DATE_COLUMNS else getattr(Patient, column)
+            for column in columns
+        ]),
+        **filters,
+        bind=db.get_bind()
+    )
+    chunks = {column: [] for column in columns}
+    # A Core execute: parameters still go through their types' bind
+    # processors, but rows skip the ORM's per-row loading
+    result = db.connection().execute(stmt.execution_options(yield_per=settings.ANALYTICS_BATCH_SIZE))
+    for batch in result.partitions():
+        for column, values in zip(columns, zip(*batch)):
+            chunks[column].append(np.array(values, dtype="datetime64[D]" if column in DATE_COLUMNS else object))
+    return {
+        column: np.concatenate(parts) if parts else np.array([], dtype="datetime64[D]" if column in DATE_COLUMNS else object)
+        for column, parts in chunks.items()
+    }
+
+
+def factorize_text(values: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+    """Integer codes for stripped text, grouped like the dashboard stats; NULL and blank share ''"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    # Clean each distinct value once, then merge values that became equal
+    cleaned = [value.strip() if isinstance(value, str) else "" for value in uniques]
+    remap, labels = pd.factorize(np.array(cleaned, dtype=object))
+    return remap[codes], list(labels)
+
+
+def pair_codes(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """One int64 per (first, second) pair of non-negative integer arrays"""
+    if not len(first):
+        return first.astype(np.int64)
+    return first.astype(np.int64) * (int(second.max()) + 1) + second
+
+
+def patient_codes(nama: np.ndarray, tanggal_lahir: np.ndarray) -> np.ndarray:
+    """Dense ids for patients: the same folded name and birth date, as dedup.blocking_key() matches them"""
+    codes, uniques = pd.factorize(nama)
+    # Folding is Python, but runs once per distinct name, not per visit
+    folded, _ = pd.factorize(np.array([" ".join(fold(name)) for name in uniques], dtype=object))
+    born = tanggal_lahir.astype(np.int64)
+    ids, _ = pd.factorize(pair_codes(folded[codes], born - born.min() if len(born) else born))
+    return ids
+
+
+def month_day(days: np.ndarray) -> np.ndarray:
+    months = days.astype("datetime64[M]")
+    return (months.astype(np.int64) % 12) * 32 + (days - months).astype(np.int64)
+
+
+def age_at(tanggal_lahir: np.ndarray, on: np.ndarray) -> np.ndarray:
+    """Whole years between the dates, as stats.age_band() counts them (never below 0)"""
+    years = on.astype("datetime64[Y]").astype(np.int64) - tanggal_lahir.astype("datetime64[Y]").astype(np.int64)
+    return np.maximum(years - (month_day(on) < month_day(tanggal_lahir)), 0)
+
+
+def summarize_values(values: np.ndarray) -> dict:
+    if not len(values):
+        return {"count": 0, "mean": None, "p25": None, "median": None, "p75": None, "p90": None, "max": None}
+    p25, median, p75, p90 = np.percentile(values, [25, 50, 75, 90])
+    return {
+        "count": int(len(values)),
+        "mean": round(float(values.mean()), 2),
+        "p25": float(p25),
+        "median": float(median),
+        "p75": float(p75),
+        "p90": float(p90),
+        "max": int(values.max()),
+    }
+
+
+def age_histogram(ages: np.ndarray, width: int) -> dict:
+    counts = np.bincount(ages // width) if len(ages) else np.array([], dtype=np.int64)
+    return dict(summarize_values(ages), bands=[
+        {"age_from": band * width, "age_to": band * width + width - 1, "count": int(count)}
+        for band, count in enumerate(counts)
+    ])
+
+
+def age_distribution(db: Session, width: int = 10, today: Optional[date] = None, **filters) -> dict:
+    """Ages at the visit over all matching visits, and today's age of each distinct patient"""
+    if width < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'width' must be at least 1 year")
+    visits = load_visits(db, ("nama", "tanggal_lahir", "tanggal_kunjungan"), **filters)
+    born = visits["tanggal_lahir"]
+    # One row per patient: the first visit of each id
+    _, first = np.unique(patient_codes(visits["nama"], born), return_index=True)
+    today = np.datetime64(today or date.today(), "D")
+    return {
+        "width": width,
+        "visits": age_histogram(age_at(born, visits["tanggal_kunjungan"]), width),
+        "patients": age_histogram(age_at(born[first], np.full(len(first), today)), width),
+    }
+
+
+def visit_intervals(db: Session, top: int = 10, **filters) -> dict:
+    """Days between each patient's consecutive visits, and the most frequent visitors"""
+    visits = load_visits(db, ("nama", "tanggal_lahir", "tanggal_kunjungan"), **filters)
+    patients = patient_codes(visits["nama"], visits["tanggal_lahir"])
+    days = visits["tanggal_kunjungan"].astype(np.int64)
+
+    # Each patient's visits next to each other, oldest first
+    order = np.lexsort((days, patients))
+    patients, days = patients[order], days[order]
+    same = patients[1:] == patients[:-1]
+    gaps = np.diff(days)[same]
+
+    per_patient = np.bincount(patients) if len(patients) else np.array([], dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, ~same]) if len(patients) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(patients)] - 1
+    bucket_starts = [first for _, first in INTERVAL_BUCKETS]
+    buckets = np.bincount(np.searchsorted(bucket_starts, gaps, side="right") - 1, minlength=len(INTERVAL_BUCKETS))
+
+    # Groups are in id order, so group i is patient i
+    frequent = [i for i in np.argsort(-per_patient, kind="stable")[:top] if per_patient[i] > 1]
+    first_rows = order[starts]
+    return {
+        "patients": int(len(per_patient)),
+        "returning_patients": int((per_patient > 1).sum()),
+        "visits_per_patient": round(float(per_patient.mean()), 2) if len(per_patient) else None,
+        "interval_days": dict(summarize_values(gaps), buckets=[
+            {"days": label, "count": int(count)} for (label, _), count in zip(INTERVAL_BUCKETS, buckets)
+        ]),
+        "frequent_patients": [
+            {
+                "nama": visits["nama"][first_rows[i]],
+                "tanggal_lahir": str(visits["tanggal_lahir"][first_rows[i]]),
+                "visits": int(per_patient[i]),
+                "first_visit": str(np.datetime64(int(days[starts[i]]), "D")),
+                "last_visit": str(np.datetime64(int(days[ends[i]]), "D")),
+                "mean_interval_days": round(float(days[ends[i]] - days[starts[i]]) / (per_patient[i] - 1), 1),
+            }
+            for i in frequent
+        ],
+    }
+
+
+def doctor_workload(db: Session, **filters) -> dict:
+    """Visits, working days, daily load and distinct patients per doctor, busiest first"""
+    visits = load_visits(db, ("nama", "tanggal_lahir", "tanggal_kunjungan", "dokter"), **filters)
+    doctors, labels = factorize_text(visits["dokter"])
+    patients = patient_codes(visits["nama"], visits["tanggal_lahir"])
+    days = visits["tanggal_kunjungan"].astype(np.int64)
+    n = len(labels)
+
+    total = np.bincount(doctors, minlength=n)
+    # (doctor, day) and (doctor, patient) pairs, each counted once
+    days -= days.min() if len(days) else 0
+    doctor_days, per_day = np.unique(pair_codes(doctors, days), return_counts=True)
+    day_doctors = doctor_days // (int(days.max()) + 1) if len(days) else doctor_days
+    worked = np.bincount(day_doctors, minlength=n)
+    busiest = np.zeros(n, dtype=np.int64)
+    np.maximum.at(busiest, day_doctors, per_day)
+    patient_doctors = np.unique(pair_codes(doctors, patients)) // (int(patients.max()) + 1) if len(patients) else patients
+    seen = np.bincount(patient_doctors, minlength=n)
+
+    return {
+        "visits": int(total.sum()),
+        "doctors": [
+            {
+                "dokter": labels[i] or None,
+                "visits": int(total[i]),
+                "share": round(float(total[i] / total.sum()), 4),
+                "days": int(worked[i]),
+                "visits_per_day": round(float(total[i] / worked[i]), 2),
+                "busiest_day": int(busiest[i]),
+                "patients": int(seen[i]),
+            }
+            for i in np.argsort(-total, kind="stable")
+        ],
+    }
+
+
+def period_starts(days: np.ndarray, period: str) -> np.ndarray:
+    if period == "week":
+        # 1970-01-01 was a Thursday; weeks start on Monday
+        return days - (days.astype(np.int64) + 3) % 7
+    return days.astype("datetime64[M]" if period == "month" else "datetime64[Y]")
+
+
+def diagnosis_trends(db: Session, period: str = "month", top: int = 10, **filters) -> dict:
+    """Visits per period for the most common diagnoses, with each one's trend.
+
+    ``slope`` is the least-squares change in visits per period over the
+    whole range; ``change`` compares the last period with the one before.
+    """
+    if period not in TREND_PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported period '{period}'. Allowed: {', '.join(TREND_PERIODS)}"
+        )
+    visits = load_visits(db, ("tanggal_kunjungan", "diagnosis"), **filters)
+    diagnoses, labels = factorize_text(visits["diagnosis"])
+    if not len(diagnoses):
+        return {"period": period, "periods": [], "diagnoses": []}
+
+    # Periods as consecutive integers from the first one
+    starts = period_starts(visits["tanggal_kunjungan"], period)
+    step = 7 if period == "week" else 1
+    index = (starts - starts.min()).astype(np.int64) // step
+    periods = starts.min() + np.arange(index.max() + 1) * step
+
+    totals = np.bincount(diagnoses, minlength=len(labels))
+    if "" in labels:
+        totals[labels.index("")] = 0
+    chosen = [i for i in np.argsort(-totals, kind="stable")[:top] if totals[i]]
+    # One bincount fills the (diagnosis, period) table
+    table = np.bincount(diagnoses * len(periods) + index, minlength=len(labels) * len(periods))
+    table = table.reshape(len(labels), len(periods))[chosen]
+
+    t = np.arange(len(periods)) - (len(periods) - 1) / 2
+    slopes = table @ t / (t @ t) if len(periods) > 1 else np.zeros(len(chosen))
+    return {
+        "period": period,
+        "periods": [str(start.astype("datetime64[D]")) for start in periods],
+        "diagnoses": [
+            {
+                "diagnosis": labels[i],
+                "total": int(totals[i]),
+                "counts": row.tolist(),
+                "change": int(row[-1] - row[-2]) if len(row) > 1 else None,
+                "slope": round(float(slope), 3),
+            }
+            for i, row, slope in zip(chosen, table, slopes)
+        ],
+    }
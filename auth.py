@@ -1,14 +1,20 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User
 from schemas import TokenData
 from config import settings
+from hashing import run_in_hash_pool
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -27,6 +33,19 @@ def authenticate_user(db: Session, username: str, password: str):
         return False
     return user
 
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """authenticate_user for async routes: the lookup runs in the threadpool and
+    bcrypt in the bounded hashing pool, so the event loop never blocks"""
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.username == username).first())
+    if not user:
+        return False
+    # Hand the connection back before the slow hash so a login burst can't
+    # exhaust the connection pool; the loaded user stays usable detached.
+    db.close()
+    if not await run_in_hash_pool(verify_password, password, user.password_hash):
+        return False
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -37,25 +56,88 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+class PrincipalCache:
+    """LRU of token -> (expires_at, id, username, role) with a TTL.
+
+    A hit skips both the JWT decode and the users query. Entries never
+    outlive the token's own exp, and are dropped as soon as the user row
+    is updated or deleted.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, token: str):
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self.entries[token]
+                return None
+            self.entries.move_to_end(token)
+        _, user_id, username, role = entry
+        # Fresh transient instance per request; never shared with a session
+        return User(id=user_id, username=username, role=role)
+    
+    def put(self, token: str, user: User, token_exp: Optional[float]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self.lock:
+            self.entries[token] = (expires_at, user.id, user.username, user.role)
+            self.entries.move_to_end(token)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def invalidate_user(self, user_id: int) -> None:
+        with self.lock:
+            for token in [t for t, e in self.entries.items() if e[1] == user_id]:
+                del self.entries[token]
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
+def user_from_token(token: str, db: Session, credentials_exception: HTTPException):
+    """Resolve a JWT to a User, from the principal cache when possible"""
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    
     try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
+    
     user = db.query(User).filter(User.username == token_data.username).first()
     if user is None:
         raise credentials_exception
+    principal_cache.put(token, user, payload.get("exp"))
     return user
 
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    return user_from_token(credentials.credentials, db, credentials_exception)
+
 def get_current_user_from_cookie(request: Request, db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,19 +148,7 @@ def get_current_user_from_cookie(request: Request, db: Session = Depends(get_db)
     if not access_token:
         raise credentials_exception
     
-    try:
-        payload = jwt.decode(access_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    return user_from_token(access_token, db, credentials_exception)
 
 def get_current_active_user(current_user: User = Depends(get_current_user)):
     return current_user
@@ -99,3 +169,12 @@ def require_dokter_role(current_user: User = Depends(get_current_user_from_cooki
             detail="Access denied. Only dokter can perform this action."
         )
     return current_user
+
+def require_admin_role(current_user: User = Depends(get_current_user_from_cookie)):
+    """Dependency to require admin role for operational endpoints"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. Only admin can perform this action."
+        )
+    return current_user
@@ -0,0 +1,129 @@
+"""Benchmark: analytics.py (columnar NumPy) vs the same statistics in a per-row Python loop.
+
+Usage: python bench_analytics.py [visits]
+Fills a throwaway SQLite file with visits from a pool of returning
+patients, then computes age distribution, visit intervals, doctor workload
+and diagnosis trends both ways: analytics.py, and a loop over ORM objects
+accumulating into dicts. The results are checked against each other.
+Never touches hospital.db.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import analytics
+from importer import bulk_insert
+from migrate import upgrade_database
+from models import Patient
+from name_index import fold
+
+DOCTORS = ["Dr. Sarah", "Dr. Budi", "Dr. Rina", "Dr. Agus", "Dr. Dewi", "Dr. Hendra"]
+DIAGNOSES = ["ISPA", "Flu", "Hipertensi", "Diabetes melitus", "Gastritis", "Demam berdarah", "Diare", "Asma"] + \
+            [f"Diagnosis lain {i}" for i in range(30)]
+NAMES = ["Siti", "Muhammad", "Nur", "Ahmad", "Dewi", "Sri", "Agus", "Budi", "Putri", "Rizki", "Dian", "Eka",
+         "Aminah", "Rahmat", "Wati", "Joko", "Yanti", "Hadi", "Lestari", "Bambang"]
+
+
+def make_rows(n, rng):
+    first_day = date.today() - timedelta(days=5 * 365)
+    patients = [
+        (f"{rng.choice(NAMES)} {rng.choice(NAMES)} {rng.randrange(1000)}",
+         (date(1930, 1, 1) + timedelta(days=rng.randrange(33000))).isoformat())
+        for _ in range(max(1, n // 4))
+    ]
+    for _ in range(n):
+        nama, born = patients[int(len(patients) * rng.random() ** 2)]
+        yield {
+            "nama": nama,
+            "tanggal_lahir": born,
+            "tanggal_kunjungan": (first_day + timedelta(days=rng.randrange(5 * 365))).isoformat(),
+            "diagnosis": rng.choice(DIAGNOSES),
+            "tindakan": "Pemberian obat",
+            "dokter": rng.choice(DOCTORS),
+        }
+
+
+def age(born, on):
+    return max(on.year - born.year - ((on.month, on.day) < (born.month, born.day)), 0)
+
+
+def loop_statistics(db, width=10):
+    """The four statistics the obvious way: one ORM object and a few dict updates per visit"""
+    ages = Counter()
+    visits_by_patient = defaultdict(list)
+    doctor_visits, doctor_days, doctor_patients = Counter(), defaultdict(set), defaultdict(set)
+    trends = Counter()
+    for patient in db.query(Patient).yield_per(10_000):
+        ages[age(patient.tanggal_lahir, patient.tanggal_kunjungan) // width] += 1
+        key = (" ".join(fold(patient.nama)), patient.tanggal_lahir)
+        visits_by_patient[key].append(patient.tanggal_kunjungan)
+        dokter = (patient.dokter or "").strip()
+        doctor_visits[dokter] += 1
+        doctor_days[dokter].add(patient.tanggal_kunjungan)
+        doctor_patients[dokter].add(key)
+        trends[(patient.diagnosis or "").strip(), patient.tanggal_kunjungan.replace(day=1)] += 1
+
+    intervals = Counter()
+    bucket_starts = [first for _, first in analytics.INTERVAL_BUCKETS]
+    for days in visits_by_patient.values():
+        days.sort()
+        for earlier, later in zip(days, days[1:]):
+            gap = (later - earlier).days
+            intervals[sum(1 for first in bucket_starts if first <= gap) - 1] += 1
+    return {
+        "ages": dict(ages),
+        "intervals": dict(intervals),
+        "doctors": {d: (doctor_visits[d], len(doctor_days[d]), len(doctor_patients[d])) for d in doctor_visits},
+        "trends": {key: count for key, count in trends.items() if key[0]},
+    }
+
+
+def columnar_statistics(db, width=10):
+    ages = analytics.age_distribution(db, width)
+    intervals = analytics.visit_intervals(db, top=0)
+    doctors = analytics.doctor_workload(db)
+    trends = analytics.diagnosis_trends(db, "month", top=len(DIAGNOSES))
+    periods = [date.fromisoformat(start) for start in trends["periods"]]
+    return {
+        "ages": {i: band["count"] for i, band in enumerate(ages["visits"]["bands"]) if band["count"]},
+        "intervals": {i: bucket["count"] for i, bucket in enumerate(intervals["interval_days"]["buckets"]) if bucket["count"]},
+        "doctors": {d["dokter"] or "": (d["visits"], d["days"], d["patients"]) for d in doctors["doctors"]},
+        "trends": {
+            (d["diagnosis"], start): count
+            for d in trends["diagnoses"] for start, count in zip(periods, d["counts"]) if count
+        },
+    }
+
+
+def timed(run):
+    started = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        upgrade_database(engine)
+        db = sessionmaker(bind=engine)()
+        bulk_insert(db, list(make_rows(n, random.Random(5))))
+        db.commit()
+
+        looped, loop_seconds = timed(lambda: loop_statistics(db))
+        db.expunge_all()
+        columnar, columnar_seconds = timed(lambda: columnar_statistics(db))
+        db.close()
+
+    print(f"{n} visits")
+    print(f"  per-row loop over ORM objects  {loop_seconds:7.2f} s")
+    print(f"  analytics.py (4 separate loads) {columnar_seconds:6.2f} s   {loop_seconds / columnar_seconds:.1f}x")
+    for name in looped:
+        print(f"  {name:<10} {'match' if looped[name] == columnar[name] else 'MISMATCH'}")
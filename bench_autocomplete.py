@@ -0,0 +1,81 @@
+"""Benchmark: name_index.NameIndex lookups over a million synthetic names.
+
+Usage: python bench_autocomplete.py [names]
+Generates Indonesian-style names (a few very common given names plus a
+long tail built from syllables), builds the index in memory, then times
+lookups as typed at the front desk: growing prefixes of a real name, the
+same with one typo, and queries that match nothing. No database is used.
+"""
+import random
+import resource
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from name_index import NameIndex
+
+COMMON = ["Siti", "Muhammad", "Nur", "Ahmad", "Dewi", "Sri", "Agus", "Budi", "Putri", "Rizki", "Dian", "Eka"]
+SYLLABLES = ["a", "ba", "da", "di", "ha", "in", "ja", "ka", "ku", "la", "li", "ma", "mi", "na", "ni", "nu",
+             "ra", "ri", "ru", "sa", "si", "ta", "ti", "to", "wa", "wi", "ya", "yu", "dy", "an", "ar", "ah"]
+
+
+def make_names(n, rng):
+    tail = list({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize() for _ in range(60_000)})
+    def word():
+        return rng.choice(COMMON) if rng.random() < 0.3 else tail[int(len(tail) * rng.random() ** 3)]
+    return [" ".join(word() for _ in range(rng.choice((1, 2, 2, 2, 3, 3)))) for _ in range(n)]
+
+
+def typo(term, rng):
+    i = rng.randrange(1, len(term))
+    return term[:i] + rng.choice("aiueo") + term[i + 1:]
+
+
+def queries(names, rng, count):
+    typed, typos, misses = [], [], []
+    for name in rng.sample(names, count):
+        words = name.split()
+        # "Siti Nur" style: the first word whole, the next one partly typed
+        for cut in range(2, len(name) + 1):
+            if name[cut - 1] != " ":
+                typed.append(name[:cut])
+        long_words = [w for w in words if len(w) >= 5]
+        if long_words:
+            typos.append(typo(rng.choice(long_words), rng))
+        misses.append("Zq" + name[:3])
+    return {"prefix": typed, "one typo": typos, "no match": misses}
+
+
+def percentile(samples, p):
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * p))]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(7)
+    names = make_names(n, rng)
+    rows = [(i, name, date(1950, 1, 1) + timedelta(days=i % 25000)) for i, name in enumerate(names, 1)]
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    index = NameIndex()
+    index.add_many(rows)
+    print(f"{n} names, {len(index.words)} distinct words: built in {time.perf_counter() - started:.1f} s, "
+          f"~{(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024:.0f} MiB")
+
+    for label, batch in queries(names, rng, 300).items():
+        timings, empty = [], 0
+        for q in batch:
+            started = time.perf_counter()
+            empty += not index.lookup(q)
+            timings.append(time.perf_counter() - started)
+        print(f"  {label:<9} {len(batch):>5} lookups  p50 {statistics.median(timings) * 1000:6.2f} ms"
+              f"  p99 {percentile(timings, 0.99) * 1000:6.2f} ms  max {max(timings) * 1000:6.2f} ms"
+              f"  empty {empty}")
+
+    started = time.perf_counter()
+    for i in range(1000):
+        index.add(n + i, names[i], date(1990, 1, 1))
+        index.remove(i + 1)
+    print(f"  add+remove      {(time.perf_counter() - started):.3f} ms each")
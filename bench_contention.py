@@ -0,0 +1,109 @@
+"""Benchmark: concurrent imports, edits and reads against SQLite.
+
+Usage: python bench_contention.py [seconds]
+Runs the same mixed workload twice on throwaway SQLite files: once with a
+bare ``create_engine(url)`` (the old engine setup) and once with the tuned
+engine from ``database.build_engine`` (WAL, synchronous=NORMAL,
+busy_timeout, sized pool). Reports throughput, p99 latency and the number
+of "database is locked" failures per operation.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from bench_import import make_rows
+from database import build_engine
+from importer import import_rows
+from migrate import upgrade_database
+from models import Patient
+from pagination import paginate
+
+IMPORTERS = 1
+EDITORS = 4
+READERS = 4
+IMPORT_ROWS = 5000
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def import_once(db, rng, rows):
+    # The same rows every time: measure raw insert contention, not dedup
+    import_rows(db, rows, on_duplicate="insert")
+
+
+def edit_once(db, rng, rows):
+    patient = db.get(Patient, rng.randrange(1, len(rows)))
+    patient.diagnosis = rng.choice(["Flu", "Asma", "Tifus"])
+    patient.tanggal_kunjungan = date(2024, rng.randrange(1, 13), 1)
+    db.commit()
+
+
+def read_once(db, rng, rows):
+    paginate(db.query(Patient), "-tanggal_kunjungan", None, 50)
+
+
+def worker(kind, op, SessionFactory, stop, results, rows, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        db = SessionFactory()
+        started = time.perf_counter()
+        try:
+            op(db, rng, rows)
+            results[kind]["latencies"].append(time.perf_counter() - started)
+        except OperationalError as exc:
+            db.rollback()
+            results[kind]["locked" if "locked" in str(exc) else "errors"] += 1
+        finally:
+            db.close()
+
+
+def run(label, engine, seconds, rows):
+    upgrade_database(engine)
+    SessionFactory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed_db = SessionFactory()
+    import_rows(seed_db, rows)
+    seed_db.close()
+
+    results = defaultdict(lambda: {"latencies": [], "locked": 0, "errors": 0})
+    ops = [("import", import_once)] * IMPORTERS + [("edit", edit_once)] * EDITORS + [("read", read_once)] * READERS
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=worker, args=(kind, op, SessionFactory, stop, results, rows, i))
+        for i, (kind, op) in enumerate(ops)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print(f"\n{label}")
+    for kind in ("import", "edit", "read"):
+        latencies = results[kind]["latencies"] or [0.0]
+        print(f"  {kind:<7} {len(results[kind]['latencies']) / seconds:8.1f} ops/s"
+              f"   p50 {statistics.median(latencies) * 1000:8.1f} ms"
+              f"   p99 {percentile(latencies, 99) * 1000:8.1f} ms"
+              f"   locked {results[kind]['locked']:>4}   other errors {results[kind]['errors']}")
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rows = make_rows(IMPORT_ROWS)
+    with tempfile.TemporaryDirectory() as tmp:
+        run("default engine", create_engine(f"sqlite:///{os.path.join(tmp, 'default.db')}"), seconds, rows)
+        run("tuned engine", build_engine(f"sqlite:///{os.path.join(tmp, 'tuned.db')}"), seconds, rows)
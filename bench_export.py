@@ -0,0 +1,97 @@
+"""Benchmark: Parquet export and snapshots vs the XLSX export.
+
+Usage: python bench_export.py [visits]
+Fills a throwaway SQLite file (rows as in bench_analytics.py), then writes
+every patient as XLSX through df.to_excel (the original /api/export) and
+through the streaming write_xlsx(), as a Parquet export and as a Parquet
+snapshot partitioned by visit month. Reports write time and file size,
+then the time to read each back into a DataFrame: the whole table, and
+only the last 30 days of visits. Never touches hospital.db.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from bench_analytics import make_rows
+from exports import EXPORT_HEADERS, iter_patient_batches, write_parquet, write_xlsx
+from importer import bulk_insert
+from migrate import upgrade_database
+from snapshots import read_snapshot, write_snapshot
+
+
+def timed(run):
+    started = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - started
+
+
+def size_of(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def to_excel(path, engine):
+    rows = [row for batch in iter_patient_batches(bind=engine) for row in batch]
+    pd.DataFrame(rows, columns=EXPORT_HEADERS).to_excel(path, index=False)
+
+
+def write_file(path, writer, engine):
+    with open(path, "wb") as fileobj:
+        writer(fileobj, batches=iter_patient_batches(bind=engine))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    since = date.today() - timedelta(days=30)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        upgrade_database(engine)
+        db = sessionmaker(bind=engine)()
+        bulk_insert(db, list(make_rows(n, random.Random(5))))
+        db.commit()
+        db.close()
+
+        paths = {name: os.path.join(tmp, name) for name in ("to_excel.xlsx", "write_xlsx.xlsx", "export.parquet", "snapshot")}
+        writes = {
+            "df.to_excel": (paths["to_excel.xlsx"], lambda: to_excel(paths["to_excel.xlsx"], engine)),
+            "write_xlsx (streaming)": (paths["write_xlsx.xlsx"], lambda: write_file(paths["write_xlsx.xlsx"], write_xlsx, engine)),
+            "write_parquet": (paths["export.parquet"], lambda: write_file(paths["export.parquet"], write_parquet, engine)),
+            "snapshot, by month": (paths["snapshot"], lambda: write_snapshot(paths["snapshot"], "month", bind=engine)),
+        }
+        print(f"{n} visits")
+        print("  write")
+        for label, (path, write) in writes.items():
+            _, seconds = timed(write)
+            print(f"    {label:<24} {seconds:7.2f} s   {size_of(path) / 1024 / 1024:7.1f} MB")
+
+        def recent_excel():
+            frame = pd.read_excel(paths["to_excel.xlsx"])
+            return frame[pd.to_datetime(frame["Tanggal Kunjungan"]).dt.date >= since]
+
+        reads = {
+            "all rows": {
+                "pd.read_excel": lambda: pd.read_excel(paths["to_excel.xlsx"]),
+                "parquet export, mmap": lambda: read_snapshot(paths["export.parquet"]).to_pandas(),
+                "snapshot, mmap": lambda: read_snapshot(paths["snapshot"], partition="month").to_pandas(),
+            },
+            "last 30 days": {
+                "pd.read_excel + filter": recent_excel,
+                "parquet export, mmap": lambda: read_snapshot(paths["export.parquet"], date_from=since).to_pandas(),
+                "snapshot, mmap": lambda: read_snapshot(paths["snapshot"], date_from=since, partition="month").to_pandas(),
+            },
+        }
+        for label, readers in reads.items():
+            print(f"  read {label}")
+            baseline = None
+            for name, read in readers.items():
+                frame, seconds = timed(read)
+                baseline = baseline or seconds
+                print(f"    {name:<24} {seconds:7.3f} s   {len(frame):7d} rows   {baseline / seconds:6.1f}x")
@@ -0,0 +1,70 @@
+"""Benchmark: legacy per-row /api/import loop vs the batched import engine.
+
+Usage: python bench_import.py [rows]
+Runs against throwaway SQLite files, never against hospital.db.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from migrate import upgrade_database
+from models import Patient
+from importer import import_rows
+
+
+def make_rows(n):
+    start = date(2024, 1, 1)
+    return [
+        {
+            "nama": f"Pasien {i}",
+            "tanggal_lahir": (date(1950, 1, 1) + timedelta(days=i % 20000)).isoformat(),
+            "tanggal_kunjungan": (start + timedelta(days=i % 365)).isoformat(),
+            "diagnosis": "Demam berdarah" if i % 7 == 0 else "Flu",
+            "tindakan": "Pemberian obat",
+            "dokter": f"Dr. {i % 25}",
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_import(db, patients_data):
+    # Copy of the original import_patients loop
+    for patient_data in patients_data:
+        patient = Patient(
+            nama=patient_data["nama"],
+            tanggal_lahir=datetime.strptime(patient_data["tanggal_lahir"], "%Y-%m-%d").date(),
+            tanggal_kunjungan=datetime.strptime(patient_data["tanggal_kunjungan"], "%Y-%m-%d").date(),
+            diagnosis=patient_data.get("diagnosis", ""),
+            tindakan=patient_data.get("tindakan", ""),
+            dokter=patient_data.get("dokter", "")
+        )
+        db.add(patient)
+    db.commit()
+
+
+def run(label, fn, rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        upgrade_database(engine)
+        db = sessionmaker(bind=engine)()
+        started = time.perf_counter()
+        fn(db, rows)
+        elapsed = time.perf_counter() - started
+        count = db.query(Patient).count()
+        db.close()
+        engine.dispose()
+    print(f"{label:<10} {count:>8} rows  {elapsed:8.2f} s  {count / elapsed:>10.0f} rows/s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(n)
+    legacy = run("legacy", legacy_import, rows)
+    batched = run("batched", import_rows, rows)
+    print(f"speedup    {legacy / batched:.1f}x")
@@ -0,0 +1,128 @@
+"""Benchmark: hot dashboard/API queries before and after migration 0002.
+
+Usage: python bench_indexes.py [rows]
+Builds a throwaway SQLite database with ``alembic upgrade 0001``, seeds it,
+prints the query plan and median latency of each query, then runs
+``alembic upgrade head`` and repeats.
+"""
+import atexit
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+tmpdir = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, tmpdir, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+import filters
+from database import engine
+from filters import apply_patient_filters
+from models import Patient
+from pagination import encode_cursor, paginate
+from stats import load_stats
+
+FIRST_NAMES = ["Siti", "Ahmad", "Budi", "Dewi", "Muhammad", "Nur", "Agus", "Rina", "Putri", "Joko"]
+LAST_NAMES = ["Nurhaliza", "Rizki", "Santoso", "Sartika", "Fajar", "Hidayat", "Wijaya", "Lestari", "Pratama", "Saputra"]
+DIAGNOSES = ["Demam berdarah", "Hipertensi", "Flu dan batuk", "Diabetes", "Asma", "Tifus", "Gastritis"]
+
+
+def seed(n):
+    rng = random.Random(42)
+    start = date(2020, 1, 1)
+    rows = [
+        (
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            (date(1940, 1, 1) + timedelta(days=rng.randrange(30000))).isoformat(),
+            (start + timedelta(days=rng.randrange(2000))).isoformat(),
+            rng.choice(DIAGNOSES),
+            "Pemberian obat",
+            f"Dr. {rng.randrange(40)}",
+        )
+        for i in range(n)
+    ]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO patients (nama, tanggal_lahir, tanggal_kunjungan, diagnosis, tindakan, dokter) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+
+def scenarios(db):
+    middle = db.query(Patient).order_by(Patient.id).offset(db.query(Patient).count() // 2).first()
+    deep_cursor = encode_cursor("-tanggal_kunjungan", middle, "next")
+    base = lambda: db.query(Patient)
+    return {
+        "dashboard first page": lambda: paginate(base(), "-tanggal_kunjungan", None, 50)[0],
+        "dashboard deep page": lambda: paginate(base(), "-tanggal_kunjungan", deep_cursor, 50)[0],
+        "visit date range": lambda: paginate(
+            apply_patient_filters(base(), date_from=date(2022, 3, 1), date_to=date(2022, 3, 31)),
+            "-tanggal_kunjungan", None, 50)[0],
+        "doctor filter": lambda: paginate(
+            apply_patient_filters(base(), dokter="Dr. 7"), "-tanggal_kunjungan", None, 50)[0],
+        "name search 'saputra 12'": lambda: paginate(
+            apply_patient_filters(base(), q="saputra 12", bind=db.get_bind()), "-tanggal_kunjungan", None, 50)[0],
+        "api sort by nama": lambda: paginate(base(), "nama", None, 50)[0],
+        "stats reload": lambda: load_stats(db),
+    }
+
+
+def plan(db, fn):
+    """Capture the SQL a scenario runs and ask SQLite how it executes it"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    lines = []
+    with engine.connect() as conn:
+        for statement, parameters in captured:
+            for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+                lines.append(row[-1])
+    return lines
+
+
+def measure(label):
+    # Fresh connections so no statement prepared against the old schema is reused
+    engine.dispose()
+    filters.fts_tables.clear()
+    db = sessionmaker(bind=engine)()
+    print(f"\n=== {label} ===")
+    for name, fn in scenarios(db).items():
+        fn()  # warm up
+        timings = []
+        for _ in range(15):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        print(f"\n{name}: median {statistics.median(timings) * 1000:.2f} ms")
+        for line in plan(db, fn):
+            print(f"    {line}")
+    db.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    cfg = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    command.upgrade(cfg, "0001")
+    seed(n)
+    print(f"seeded {n} patients")
+    measure("before (0001)")
+    command.upgrade(cfg, "head")
+    measure("after (head)")
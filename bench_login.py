@@ -0,0 +1,108 @@
+"""Load test: latency of other endpoints during a login storm.
+
+Usage: python bench_login.py [concurrent_logins]
+Starts uvicorn twice against a throwaway SQLite database: once with bcrypt
+run inline on the event loop (the old login path) and once with the
+bounded hashing pool. Each run fires a burst of logins while probing
+GET /api/patients and reports the probe's p50/p99 latency.
+"""
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+SERVER = """
+import sys
+import uvicorn
+import auth, main
+
+if sys.argv[1] == "inline":
+    async def authenticate_inline(db, username, password):
+        return auth.authenticate_user(db, username, password)
+    main.authenticate_user_async = authenticate_inline
+
+uvicorn.run(main.app, host="127.0.0.1", port={port}, log_level="warning")
+"""
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe(client, stop, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/patients?limit=10")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def login(client):
+    await client.post("/login", data={"username": "dokter", "password": "dokter"})
+
+
+async def scenario(logins):
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=120) as client:
+        baseline = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, baseline))
+        await asyncio.sleep(1)
+        stop.set()
+        await task
+
+        storm = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, storm))
+        started = time.perf_counter()
+        await asyncio.gather(*(login(client) for _ in range(logins)))
+        storm_seconds = time.perf_counter() - started
+        stop.set()
+        await task
+    return baseline, storm, storm_seconds
+
+
+def run(mode, logins, env):
+    server = subprocess.Popen(
+        [sys.executable, "-c", SERVER.format(port=PORT), mode],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{BASE_URL}/login")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        baseline, storm, storm_seconds = asyncio.run(scenario(logins))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"\n{mode}: {logins} logins in {storm_seconds:.2f} s")
+    print(f"  probe baseline  p50 {statistics.median(baseline):8.1f} ms   p99 {percentile(baseline, 99):8.1f} ms")
+    print(f"  probe in storm  p50 {statistics.median(storm):8.1f} ms   p99 {percentile(storm, 99):8.1f} ms"
+          f"   ({len(storm)} probes)")
+
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    tmpdir = tempfile.mkdtemp()
+    try:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        subprocess.run([sys.executable, "init_db.py"], env=env, check=True, stdout=subprocess.DEVNULL,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        run("inline", logins, env)
+        run("pool", logins, env)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
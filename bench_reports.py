@@ -0,0 +1,102 @@
+"""Benchmark: reports from the daily_visits rollup vs the same GROUP BY over patients.
+
+Usage: python bench_reports.py [years] [visits_per_day]
+Fills a throwaway SQLite file with a clinic's history (a few doctors on
+duty per day, diagnoses with a long tail, ages skewed young), builds the
+rollup with rollup.recount_visits(), then times each report from the
+rollup against the equivalent query on the patients table, over the last
+year and over the whole history. Never touches hospital.db.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from importer import bulk_insert
+from migrate import upgrade_database
+from reports import age_histogram, visits_per_doctor, visits_per_period
+from rollup import recount_visits
+
+DOCTORS = [f"Dr. {name}" for name in ("Sarah", "Budi", "Rina", "Agus", "Dewi", "Hendra", "Lina", "Yusuf")]
+DIAGNOSES = ["ISPA", "Flu", "Hipertensi", "Diabetes melitus", "Gastritis", "Demam berdarah", "Diare", "Asma",
+             "Dermatitis", "Migrain", "Tifoid", "Faringitis", "Konjungtivitis", "Anemia", "Otitis media"] + \
+            [f"Diagnosis lain {i}" for i in range(45)]
+
+# The same reports straight from patients, bucketed in SQL (SQLite date functions)
+AGE = ("(CAST(strftime('%Y', tanggal_kunjungan) AS INTEGER) - CAST(strftime('%Y', tanggal_lahir) AS INTEGER)"
+       " - (strftime('%m-%d', tanggal_kunjungan) < strftime('%m-%d', tanggal_lahir)))")
+DIRECT = {
+    "visits per month": "SELECT strftime('%Y-%m', tanggal_kunjungan), count(*) FROM patients "
+                        "WHERE tanggal_kunjungan >= :date_from GROUP BY 1",
+    "per doctor": "SELECT dokter, count(*), count(DISTINCT tanggal_kunjungan) FROM patients "
+                  "WHERE tanggal_kunjungan >= :date_from GROUP BY dokter",
+    "age bands": f"SELECT {AGE} / 10, count(*) FROM patients WHERE tanggal_kunjungan >= :date_from GROUP BY 1",
+    "month, one diagnosis": "SELECT strftime('%Y-%m', tanggal_kunjungan), count(*) FROM patients "
+                            "WHERE tanggal_kunjungan >= :date_from AND diagnosis LIKE '%hipertensi%' GROUP BY 1",
+}
+ROLLUP = {
+    "visits per month": lambda db, since: visits_per_period(db, "month", date_from=since),
+    "per doctor": lambda db, since: visits_per_doctor(db, date_from=since),
+    "age bands": lambda db, since: age_histogram(db, 10, date_from=since),
+    "month, one diagnosis": lambda db, since: visits_per_period(db, "month", date_from=since, diagnosis="hipertensi"),
+}
+
+
+def make_rows(years, per_day, rng):
+    weights = [1 / (i + 1) for i in range(len(DIAGNOSES))]
+    first = date.today() - timedelta(days=365 * years)
+    for offset in range(365 * years):
+        day = first + timedelta(days=offset)
+        on_duty = rng.sample(DOCTORS, 4)
+        for _ in range(rng.randint(per_day // 2, per_day * 3 // 2)):
+            age = min(int(rng.expovariate(1 / 32)), 95)
+            yield {
+                "nama": "Pasien",
+                "tanggal_lahir": (day - timedelta(days=age * 365 + rng.randrange(365))).isoformat(),
+                "tanggal_kunjungan": day.isoformat(),
+                "diagnosis": rng.choices(DIAGNOSES, weights)[0],
+                "tindakan": "Pemberian obat dan edukasi pasien",
+                "dokter": rng.choice(on_duty),
+            }
+
+
+def timed(run, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+if __name__ == "__main__":
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        upgrade_database(engine)
+        db = sessionmaker(bind=engine)()
+        rows = list(make_rows(years, per_day, random.Random(3)))
+        bulk_insert(db, rows)
+        db.commit()
+
+        started = time.perf_counter()
+        cells = recount_visits(db)
+        db.commit()
+        print(f"{len(rows)} visits over {years} years -> {cells} rollup rows, "
+              f"rebuilt in {time.perf_counter() - started:.1f} s")
+        db.execute(text("ANALYZE"))
+
+        for label, since in (("last year", date.today() - timedelta(days=365)), ("all time", date(1900, 1, 1))):
+            print(f"  {label}")
+            for report, query in DIRECT.items():
+                direct = timed(lambda: db.execute(text(query), {"date_from": since.isoformat()}).all())
+                rollup = timed(lambda: ROLLUP[report](db, since))
+                print(f"    {report:<22} patients {direct:8.1f} ms   rollup {rollup:7.1f} ms   {direct / rollup:5.1f}x")
+        db.close()
@@ -0,0 +1,75 @@
+"""Benchmark: /api/patients serialization, ORM + jsonable_encoder vs column tuples + orjson.
+
+Usage: python bench_serialization.py [rows ...]
+Seeds a throwaway SQLite file and times fetching and encoding every row
+three ways: the old path (ORM entities through jsonable_encoder and
+JSONResponse), column tuples validated through the schemas.Patient
+response model, and column tuples rendered straight by ORJSONResponse.
+"""
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+import schemas
+from bench_import import make_rows
+from importer import import_rows
+from migrate import upgrade_database
+from models import Patient
+from serializers import patient_dicts, patient_rows
+
+patients_adapter = TypeAdapter(List[schemas.Patient])
+
+
+def legacy(db):
+    patients = db.execute(select(Patient)).scalars().all()
+    return JSONResponse(jsonable_encoder(patients)).body
+
+
+def response_model(db):
+    rows = db.execute(patient_rows()).all()
+    return patients_adapter.dump_json(patients_adapter.validate_python(patient_dicts(rows)))
+
+
+def orjson_tuples(db):
+    rows = db.execute(patient_rows()).all()
+    return ORJSONResponse(patient_dicts(rows)).body
+
+
+def best_of(fn, db, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        db.expunge_all()
+        started = time.perf_counter()
+        body = fn(db)
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            upgrade_database(engine)
+            db = sessionmaker(bind=engine)()
+            import_rows(db, make_rows(n))
+
+            print(f"\n{n} rows")
+            baseline = None
+            for label, fn in (("orm + jsonable_encoder", legacy),
+                              ("tuples + response model", response_model),
+                              ("tuples + orjson", orjson_tuples)):
+                elapsed, body = best_of(fn, db)
+                baseline = baseline or elapsed
+                print(f"  {label:<24} {elapsed * 1000:9.1f} ms  {n / elapsed:>10.0f} rows/s"
+                      f"  {len(body) / 1024:8.0f} KiB  {baseline / elapsed:5.1f}x")
+            db.close()
+            engine.dispose()
@@ -1,4 +1,5 @@
 import os
+from typing import List
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,8 +7,56 @@ load_dotenv()
 class Settings:
     # Use SQLite as default for easier testing, can be overridden with DATABASE_URL
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./hospital.db")
+    # Comma-separated read replica URLs; empty sends reads to DATABASE_URL
+    DATABASE_READ_URLS: List[str] = [url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
+    # How far replicas may lag: reads stay on the primary this long after a write
+    REPLICA_MAX_STALENESS_SECONDS: float = float(os.getenv("REPLICA_MAX_STALENESS_SECONDS", "5"))
+    # Connection pool; the defaults suit a single Postgres-backed app server
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # Authenticated principals cached per token so requests skip the user lookup
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    # bcrypt verification pool: worker threads and max running + queued hashes
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    # Serialized single-patient responses kept in memory by GET /api/patients/{id}
+    PATIENT_CACHE_MAX_ENTRIES: int = int(os.getenv("PATIENT_CACHE_MAX_ENTRIES", "10000"))
+    PATIENT_CACHE_TTL_SECONDS: int = int(os.getenv("PATIENT_CACHE_TTL_SECONDS", "60"))
+    # In-memory autocomplete index over patient names; rebuilt this often
+    # so writes made by other worker processes show up
+    NAME_INDEX_REBUILD_SECONDS: int = int(os.getenv("NAME_INDEX_REBUILD_SECONDS", "900"))
+    # Keyset pagination for list endpoints
+    DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+    MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "500"))
+    # Rows fetched per server-side cursor round-trip during exports
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # Parquet exports and snapshots: rows per row group, and the codec
+    PARQUET_ROW_GROUP_SIZE: int = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "100000"))
+    PARQUET_COMPRESSION: str = os.getenv("PARQUET_COMPRESSION", "zstd")
+    # Rows fetched per round-trip when analytics load patient columns into arrays
+    ANALYTICS_BATCH_SIZE: int = int(os.getenv("ANALYTICS_BATCH_SIZE", "50000"))
+    # Rows validated and inserted per executemany during imports
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+    MAX_IMPORT_ERRORS: int = int(os.getenv("MAX_IMPORT_ERRORS", "1000"))
+    # Longest line (in characters) a streamed NDJSON/CSV upload may contain
+    MAX_IMPORT_LINE_LENGTH: int = int(os.getenv("MAX_IMPORT_LINE_LENGTH", str(1024 * 1024)))
+    # Background export/import workers
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    # Dashboard statistics cache; reloaded from the database after this long
+    STATS_TTL_SECONDS: int = int(os.getenv("STATS_TTL_SECONDS", "300"))
+    # Export artifact cache retention
+    EXPORT_CACHE_MAX_BYTES: int = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+    EXPORT_CACHE_MAX_AGE_HOURS: int = int(os.getenv("EXPORT_CACHE_MAX_AGE_HOURS", "168"))
 
 settings = Settings()
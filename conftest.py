@@ -0,0 +1,71 @@
+"""Shared setup for the TestClient tests: the app runs against a throwaway SQLite file.
+
+DATABASE_URL has to point there before database.py (and main) are
+imported, so it is set when pytest loads this file. Every test starts
+with no patients, empty rollups and cold caches, and exports are
+written to a temporary directory rather than static/exports; the admin
+and dokter users (password = username) are created once.
+"""
+import os
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix="patient-crud-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ["DATABASE_READ_URLS"] = ""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+import export_cache
+import main
+from auth import get_password_hash
+from database import SessionLocal
+from models import Patient, User
+from name_index import name_index
+from patient_cache import patient_cache
+from rollup import recount_visits
+from stats import stats_cache
+
+
+@pytest.fixture(scope="session", autouse=True)
+def users():
+    with SessionLocal() as db:
+        for username, role in (("admin", "admin"), ("dokter", "dokter")):
+            db.add(User(username=username, password_hash=get_password_hash(username), role=role))
+        db.commit()
+
+
+@pytest.fixture(autouse=True)
+def empty_database():
+    with SessionLocal() as db:
+        db.execute(delete(Patient))
+        recount_visits(db)
+        db.commit()
+    stats_cache.invalidate()
+    patient_cache.clear()
+    name_index.rebuild()
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_cache, "EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def dokter_client(client):
+    response = client.post("/login", data={"username": "dokter", "password": "dokter"}, follow_redirects=False)
+    assert response.status_code == 303
+    return client
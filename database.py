@@ -1,11 +1,138 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# Async drivers for the same databases the sync engine talks to
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver in DATABASE_URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def engine_options(url: str) -> dict:
+    """Pool settings for the backend in ``url``.
+
+    Server databases get a bounded pool with pre-ping and recycling so idle
+    connections dropped by the server or a proxy are replaced transparently.
+    SQLite only needs the pool size (liveness is never an issue for a local
+    file); in-memory databases keep SQLAlchemy's single-connection pool.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        if parsed.database in (None, "", ":memory:"):
+            return {}
+        options = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        }
+        if parsed.get_driver_name() == "aiosqlite":
+            # aiosqlite defaults to NullPool, which opens a connection (and a
+            # thread) per session
+            options["poolclass"] = AsyncAdaptedQueuePool
+        return options
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the single writer, and busy_timeout makes
+    # a second writer wait for the lock instead of failing with "database is
+    # locked". synchronous=NORMAL is durable across app crashes in WAL mode.
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+def build_engine(url: str, create=create_engine):
+    """Create a sync (or, with ``create_async_engine``, async) engine tuned for its backend"""
+    built = create(url, **engine_options(url))
+    if built.dialect.name == "sqlite":
+        event.listen(getattr(built, "sync_engine", built), "connect", set_sqlite_pragmas)
+    return built
+
+engine = build_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = build_engine(async_database_url(settings.DATABASE_URL), create_async_engine)
+# expire_on_commit=False: attributes stay loaded after commit, since an
+# implicit refresh would need IO outside an await
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+class ReplicaRouter:
+    """Chooses the engine for read-only sessions.
+
+    Replicas take turns. For REPLICA_MAX_STALENESS_SECONDS after any commit
+    on the primary, reads stay on the primary so a user never reads behind
+    their own write. Writes are tracked per process.
+    """
+
+    def __init__(self, primary, replicas, async_primary, async_replicas, max_staleness: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.async_primary = async_primary
+        self.async_replicas = async_replicas
+        self.max_staleness = max_staleness
+        self.last_write = float("-inf")
+        self.lock = threading.Lock()
+        self.turn = itertools.count()
+        event.listen(primary, "commit", self.record_write)
+        event.listen(async_primary.sync_engine, "commit", self.record_write)
+
+    def record_write(self, conn=None):
+        self.last_write = time.monotonic()
+
+    def pick(self, primary, replicas):
+        if not replicas or time.monotonic() - self.last_write < self.max_staleness:
+            return primary
+        with self.lock:
+            return replicas[next(self.turn) % len(replicas)]
+
+    def read_engine(self):
+        return self.pick(self.primary, self.replicas)
+
+    def async_read_engine(self):
+        return self.pick(self.async_primary, self.async_replicas)
+
+    def sync_engine_for(self, bind):
+        """The sync engine for the same database as ``bind``, which may be an async engine's sync_engine"""
+        for async_engine, sync_engine in zip([self.async_primary, *self.async_replicas], [self.primary, *self.replicas]):
+            if bind is async_engine.sync_engine:
+                return sync_engine
+        return bind
+
+replicas = ReplicaRouter(
+    engine,
+    [build_engine(url) for url in settings.DATABASE_READ_URLS],
+    async_engine,
+    [build_engine(async_database_url(url), create_async_engine) for url in settings.DATABASE_READ_URLS],
+    settings.REPLICA_MAX_STALENESS_SECONDS
+)
+
+def read_session():
+    """A session for read-only work, bound to a replica when one is fresh enough"""
+    return SessionLocal(bind=replicas.read_engine())
+
 Base = declarative_base()
 
 def get_db():
@@ -14,3 +141,18 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db():
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    async with AsyncSessionLocal(bind=replicas.async_read_engine()) as db:
+        yield db
@@ -0,0 +1,148 @@
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, bindparam, func, select, type_coerce, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Patient, utcnow
+from name_index import fold
+from rollup import recount_visits
+from stats import day_key
+
+# skip: drop duplicate rows; merge: copy their visit details onto the row
+# they duplicate; insert: import them anyway (matches are still reported)
+DUPLICATE_MODES = ("skip", "merge", "insert")
+# Visit details a merge copies onto the matched record when the import has them
+MERGE_COLUMNS = ("diagnosis", "tindakan", "dokter")
+# Birth dates (or ids) bound per IN (...) list
+DATE_CHUNK_SIZE = 1000
+
+
+def check_duplicate_mode(mode: str) -> None:
+    if mode not in DUPLICATE_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported on_duplicate '{mode}'. Allowed: {', '.join(DUPLICATE_MODES)}"
+        )
+
+
+def blocking_key(nama: str, tanggal_lahir) -> Tuple[str, str]:
+    """Case- and accent-folded name plus birth date; rows sharing it are the same patient"""
+    return " ".join(fold(nama)), day_key(tanggal_lahir)
+
+
+class Deduplicator:
+    """Duplicate detection for one import run, by hashing instead of comparing rows pairwise.
+
+    Each row's blocking key selects its candidates in two dicts: existing
+    patients with that key, loaded by one indexed birth-date query per
+    batch, and earlier rows of the same payload. A candidate with the same
+    visit date makes the row a duplicate; any other candidate is the same
+    patient returning for a new visit, which is reported but imported.
+    The cost is linear in the batch plus the stored rows sharing its birth
+    dates.
+    """
+
+    def __init__(self, mode: str = "skip"):
+        self.mode = mode
+        # blocking key -> first payload row with it, and (key, visit) -> that visit's row
+        self.patients: Dict[Tuple[str, str], int] = {}
+        self.visits: Dict[Tuple[str, str, str], int] = {}
+        self.duplicates = 0
+        self.matches: List[dict] = []
+
+    def existing(self, db: Session, keys: Set[Tuple[str, str]]) -> Dict[Tuple[str, ...], int]:
+        """Stored patient ids by blocking key and by (blocking key, visit date)"""
+        found = {}
+        names = {nama for nama, _ in keys}
+        dates = sorted({date.fromisoformat(tanggal_lahir) for _, tanggal_lahir in keys})
+        for start in range(0, len(dates), DATE_CHUNK_SIZE):
+            # Every patient born on these dates is read, so skip the ORM and
+            # date parsing: day_key() takes SQLite's ISO strings as they are
+            rows = db.connection().execute(
+                select(
+                    Patient.id,
+                    Patient.nama,
+                    type_coerce(Patient.tanggal_lahir, String),
+                    type_coerce(Patient.tanggal_kunjungan, String)
+                )
+                .where(Patient.tanggal_lahir.in_(dates[start:start + DATE_CHUNK_SIZE]))
+                .order_by(Patient.id)
+            )
+            for patient_id, nama, tanggal_lahir, tanggal_kunjungan in rows:
+                nama = " ".join(fold(nama))
+                if nama not in names:
+                    continue
+                key = (nama, day_key(tanggal_lahir))
+                if key in keys:
+                    found.setdefault(key, patient_id)
+                    found.setdefault((*key, day_key(tanggal_kunjungan)), patient_id)
+        return found
+
+    def split(self, db: Session, rows: List[dict], positions: List[int]) -> Tuple[List[dict], List[dict]]:
+        """Sort one validated batch into (rows to insert, merges into stored rows).
+
+        ``positions`` are the payload row numbers of ``rows``. Merges are
+        parameter dicts for merge_duplicates(). Duplicates of earlier rows in
+        the same batch are merged into those rows before insertion.
+        """
+        keyed = [(blocking_key(row["nama"], row["tanggal_lahir"]), row) for row in rows]
+        stored = self.existing(db, {key for key, _ in keyed})
+        inserts, merges, pending = [], [], {}
+        for position, (key, row) in zip(positions, keyed):
+            visit = (*key, day_key(row["tanggal_kunjungan"]))
+            patient_id = stored.get(visit)
+            earlier = self.visits.get(visit)
+            if patient_id is None and earlier is None:
+                if key in stored or key in self.patients:
+                    self.report(position, "returning_patient", stored.get(key), self.patients.get(key))
+                self.patients.setdefault(key, position)
+                self.visits[visit] = position
+                pending[visit] = row
+                inserts.append(row)
+                continue
+
+            self.duplicates += 1
+            self.report(position, "duplicate", patient_id, earlier)
+            if self.mode == "insert":
+                inserts.append(row)
+            elif self.mode == "merge":
+                changes = {column: row[column] for column in MERGE_COLUMNS if row.get(column)}
+                if patient_id is not None:
+                    merges.append({"patient_id": patient_id, **{f"new_{c}": changes.get(c) for c in MERGE_COLUMNS}})
+                elif visit in pending:
+                    pending[visit].update(changes)
+        return inserts, merges
+
+    def report(self, position: int, kind: str, patient_id: Optional[int], row: Optional[int]) -> None:
+        # Capped like the import errors, so a file of repeats can't bloat the response
+        if len(self.matches) >= settings.MAX_IMPORT_ERRORS:
+            return
+        match = {"row": position, "match": kind}
+        if patient_id is not None:
+            match["patient_id"] = patient_id
+        elif row is not None:
+            match["same_as_row"] = row
+        self.matches.append(match)
+
+
+def merge_duplicates(db: Session, merges: List[dict]) -> None:
+    """One executemany UPDATE copying the imported visit details onto the matched rows"""
+    if not merges:
+        return
+    stmt = update(Patient.__table__).where(Patient.__table__.c.id == bindparam("patient_id")).values(
+        updated_at=utcnow(),
+        **{column: func.coalesce(bindparam(f"new_{column}"), Patient.__table__.c[column]) for column in MERGE_COLUMNS}
+    )
+    db.connection().execute(stmt, merges)
+
+    # The old doctor/diagnosis weren't read, so recount the merged visit days
+    ids = sorted({merge["patient_id"] for merge in merges})
+    days = set()
+    for start in range(0, len(ids), DATE_CHUNK_SIZE):
+        days.update(db.scalars(
+            select(Patient.tanggal_kunjungan).distinct().where(Patient.id.in_(ids[start:start + DATE_CHUNK_SIZE]))
+        ))
+    recount_visits(db, days)
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal, read_session
+from exports import EXPORT_DIR, EXPORT_WRITERS, iter_patient_batches
+from http_cache import PATIENTS_VERSION, as_utc
+from models import ExportArtifact
+
+EXPORT_PREFIX = "patients_export_"
+# Published artifacts are served as static files, possibly by another user
+# (a separate web server); temporary files are created 0600
+EXPORT_FILE_MODE = 0o644
+
+# One export at a time: a second request for the same data waits and then
+# reuses the artifact instead of rendering it again.
+export_lock = threading.Lock()
+
+
+def data_version(db: Session) -> str:
+    """Fingerprint of the patients table: its table_versions row, one primary-key lookup (see http_cache.PATIENTS_VERSION)"""
+    row = db.execute(PATIENTS_VERSION).one()
+    return hashlib.sha256(repr(tuple(row)).encode()).hexdigest()
+
+
+def export_path(filename: str) -> str:
+    return os.path.join(EXPORT_DIR, filename)
+
+
+def export_url(filename: str) -> str:
+    return f"/static/exports/{filename}"
+
+
+def get_or_create_export(format: str, progress: Optional[Callable[[int], None]] = None) -> dict:
+    """Return a download URL for the current data, rendering it only when needed.
+
+    Artifacts are looked up by data version first. A fresh render is hashed
+    over its rows, and if an existing file holds identical content (e.g. a
+    row was saved without changes) that file is reused instead. Patient rows
+    come from a read replica; the artifact bookkeeping lives on the primary.
+    """
+    with export_lock:
+        db = SessionLocal()
+        read_db = read_session()
+        try:
+            # Version and rows come from the same replica so they agree
+            version = data_version(read_db)
+            artifact = (
+                db.query(ExportArtifact)
+                .filter(ExportArtifact.format == format, ExportArtifact.data_version == version)
+                .order_by(ExportArtifact.id.desc())
+                .first()
+            )
+            if artifact and os.path.exists(export_path(artifact.filename)):
+                artifact.last_used_at = datetime.now(timezone.utc)
+                db.commit()
+                return {"download_url": export_url(artifact.filename), "cached": True}
+
+            hasher = hashlib.sha256()
+
+            def hashed_batches() -> Iterator[list]:
+                for batch in iter_patient_batches(bind=read_db.get_bind()):
+                    hasher.update(repr(batch).encode())
+                    yield batch
+
+            with tempfile.NamedTemporaryFile(dir=EXPORT_DIR, suffix=".tmp", delete=False) as tmp:
+                try:
+                    EXPORT_WRITERS[format](tmp, progress, hashed_batches())
+                except Exception:
+                    tmp.close()
+                    os.remove(tmp.name)
+                    raise
+            content_hash = hasher.hexdigest()
+
+            duplicate = next(
+                (
+                    a for a in db.query(ExportArtifact).filter(
+                        ExportArtifact.format == format,
+                        ExportArtifact.content_hash == content_hash
+                    )
+                    if os.path.exists(export_path(a.filename))
+                ),
+                None
+            )
+            if duplicate:
+                os.remove(tmp.name)
+                filename = duplicate.filename
+            else:
+                filename = f"{EXPORT_PREFIX}{content_hash[:16]}.{format}"
+                os.chmod(tmp.name, EXPORT_FILE_MODE)
+                os.replace(tmp.name, export_path(filename))
+
+            now = datetime.now(timezone.utc)
+            db.add(ExportArtifact(
+                format=format,
+                data_version=version,
+                content_hash=content_hash,
+                filename=filename,
+                size_bytes=os.path.getsize(export_path(filename)),
+                created_at=now,
+                last_used_at=now
+            ))
+            db.commit()
+            evict_exports(db, keep=filename)
+            return {"download_url": export_url(filename), "cached": bool(duplicate)}
+        finally:
+            read_db.close()
+            db.close()
+
+
+def evict_exports(db: Session, keep: Optional[str] = None) -> None:
+    """Drop artifacts past their age limit, then least recently used ones over the size cap.
+
+    ``keep`` names the file about to be handed out, which is never evicted.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.EXPORT_CACHE_MAX_AGE_HOURS)
+
+    # Several data versions can share one deduplicated file; group by file
+    files = {}
+    for artifact in db.query(ExportArtifact).all():
+        files.setdefault(artifact.filename, []).append(artifact)
+
+    def last_used(filename):
+        return max(as_utc(a.last_used_at) for a in files[filename])
+
+    def remove(filename):
+        for artifact in files.pop(filename):
+            db.delete(artifact)
+        if os.path.exists(export_path(filename)):
+            os.remove(export_path(filename))
+
+    for filename in list(files):
+        if filename == keep:
+            continue
+        if last_used(filename) < cutoff or not os.path.exists(export_path(filename)):
+            remove(filename)
+
+    total = sum(files[f][0].size_bytes for f in files)
+    for filename in sorted(files, key=last_used):
+        if total <= settings.EXPORT_CACHE_MAX_BYTES:
+            break
+        if filename == keep:
+            continue
+        total -= files[filename][0].size_bytes
+        remove(filename)
+    db.commit()
+
+    # Untracked exports (legacy timestamped files, interrupted temp files) age out too
+    for name in os.listdir(EXPORT_DIR):
+        path = export_path(name)
+        if name in files or not (name.startswith(EXPORT_PREFIX) or name.endswith(".tmp")):
+            continue
+        if datetime.fromtimestamp(os.path.getmtime(path), timezone.utc) < cutoff:
+            os.remove(path)
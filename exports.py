@@ -0,0 +1,206 @@
+import csv
+import io
+import tempfile
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import read_session
+from models import Patient
+
+# Spreadsheet header -> Patient column, shared by every export format
+EXPORT_COLUMNS = [
+    ("ID", Patient.id),
+    ("Nama", Patient.nama),
+    ("Tanggal Lahir", Patient.tanggal_lahir),
+    ("Tanggal Kunjungan", Patient.tanggal_kunjungan),
+    ("Diagnosis", Patient.diagnosis),
+    ("Tindakan", Patient.tindakan),
+    ("Dokter", Patient.dokter),
+]
+
+EXPORT_HEADERS = [header for header, _ in EXPORT_COLUMNS]
+
+# Parquet keeps the column names and types analysts query by, rather than
+# the spreadsheet headers
+PARQUET_TYPES = {
+    "id": pa.int64(),
+    "nama": pa.string(),
+    "tanggal_lahir": pa.date32(),
+    "tanggal_kunjungan": pa.date32(),
+    "diagnosis": pa.string(),
+    "tindakan": pa.string(),
+    "dokter": pa.string(),
+}
+PARQUET_SCHEMA = pa.schema([(column.key, PARQUET_TYPES[column.key]) for _, column in EXPORT_COLUMNS])
+
+CHUNK_SIZE = 64 * 1024
+
+EXPORT_DIR = "static/exports"
+
+
+def iter_patient_batches(batch_size: int = None, bind=None, order_by=(Patient.id,)) -> Iterator[list]:
+    """Yield lists of plain row tuples using a server-side cursor.
+
+    Rows are fetched ``batch_size`` at a time with ``yield_per`` and never
+    turned into ORM objects, so memory stays flat regardless of table size.
+    The generator owns its session because it outlives the request handler;
+    it reads from ``bind`` or else a replica.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    db = read_session() if bind is None else Session(bind=bind)
+    try:
+        stmt = (
+            select(*[column for _, column in EXPORT_COLUMNS])
+            .order_by(*order_by)
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in db.execute(stmt).partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def stream_csv(
+    progress: Optional[Callable[[int], None]] = None,
+    batches: Optional[Iterable[list]] = None
+) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the file as UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+    yield buffer.getvalue().encode("utf-8")
+
+    count = 0
+    for batch in batches if batches is not None else iter_patient_batches():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        count += len(batch)
+        if progress:
+            progress(count)
+
+
+def write_xlsx(
+    fileobj,
+    progress: Optional[Callable[[int], None]] = None,
+    batches: Optional[Iterable[list]] = None
+) -> int:
+    """Write all patients into ``fileobj`` with a write-only workbook; returns row count"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Patients")
+    sheet.append(EXPORT_HEADERS)
+    count = 0
+    for batch in batches if batches is not None else iter_patient_batches():
+        for row in batch:
+            sheet.append(list(row))
+        count += len(batch)
+        if progress:
+            progress(count)
+    workbook.save(fileobj)
+    return count
+
+
+def iter_row_groups(batches: Iterable[list], row_group_size: int = None) -> Iterator[pa.Table]:
+    """Regroup export batches into Arrow tables of about ``row_group_size`` rows.
+
+    Export batches are small (one cursor round-trip each); a Parquet row
+    group should hold enough rows for its columns to compress well and
+    its min/max statistics to be worth checking.
+    """
+    row_group_size = row_group_size or settings.PARQUET_ROW_GROUP_SIZE
+    pending, count = [], 0
+    for batch in batches:
+        pending.append(batch)
+        count += len(batch)
+        if count >= row_group_size:
+            yield rows_to_table(pending)
+            pending, count = [], 0
+    if pending:
+        yield rows_to_table(pending)
+
+
+def rows_to_table(batches: list) -> pa.Table:
+    columns = list(zip(*chain.from_iterable(batches)))
+    return pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for field, values in zip(PARQUET_SCHEMA, columns)],
+        schema=PARQUET_SCHEMA
+    )
+
+
+def write_parquet(
+    fileobj,
+    progress: Optional[Callable[[int], None]] = None,
+    batches: Optional[Iterable[list]] = None
+) -> int:
+    """Write all patients into ``fileobj`` as Parquet, one row group at a time; returns row count"""
+    count = 0
+    with pq.ParquetWriter(fileobj, PARQUET_SCHEMA, compression=settings.PARQUET_COMPRESSION) as writer:
+        for table in iter_row_groups(batches if batches is not None else iter_patient_batches()):
+            writer.write_table(table, row_group_size=table.num_rows)
+            count += table.num_rows
+            if progress:
+                progress(count)
+    return count
+
+
+def spool(write: Callable) -> Iterator[bytes]:
+    # XLSX (a zip archive) and Parquet both write their directory last, so
+    # the file is spooled to a temporary file (rows are still written
+    # incrementally) and then streamed back in chunks.
+    with tempfile.TemporaryFile() as tmp:
+        write(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def stream_xlsx() -> Iterator[bytes]:
+    return spool(write_xlsx)
+
+
+def stream_parquet() -> Iterator[bytes]:
+    return spool(write_parquet)
+
+
+def write_csv(
+    fileobj,
+    progress: Optional[Callable[[int], None]] = None,
+    batches: Optional[Iterable[list]] = None
+) -> int:
+    """Write all patients into ``fileobj`` as CSV; returns row count"""
+    count = 0
+
+    def counted(rows: int) -> None:
+        nonlocal count
+        count = rows
+        if progress:
+            progress(rows)
+
+    for chunk in stream_csv(counted, batches):
+        fileobj.write(chunk)
+    return count
+
+
+EXPORT_WRITERS = {
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+    "parquet": write_parquet,
+}
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv; charset=utf-8"),
+    "xlsx": (stream_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": (stream_parquet, "application/vnd.apache.parquet"),
+}
@@ -0,0 +1,87 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, column, inspect, text
+
+from database import replicas
+from models import Patient
+
+
+def parse_date_param(value: Optional[str], name: str) -> Optional[date]:
+    """Parse a YYYY-MM-DD query parameter; empty form fields count as missing"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date for '{name}', expected YYYY-MM-DD"
+        )
+
+
+# SQLite FTS5 tables from migrations 0002 (names) and 0004 (notes); each is
+# looked up once per engine
+NAME_FTS_TABLE = "patients_nama_fts"
+fts_tables = {}
+
+
+def has_fts_table(bind, table: str) -> bool:
+    """Whether the database behind ``bind`` (the query's Session.get_bind()) has ``table``.
+
+    The primary and each replica are checked separately, since a query
+    naming a missing FTS table fails. Async engines are inspected through
+    the sync engine for the same database.
+    """
+    bind = replicas.sync_engine_for(bind)
+    if (bind, table) not in fts_tables:
+        fts_tables[bind, table] = bind.dialect.name == "sqlite" and inspect(bind).has_table(table)
+    return fts_tables[bind, table]
+
+
+def has_name_fts(bind) -> bool:
+    return has_fts_table(bind, NAME_FTS_TABLE)
+
+
+def name_filter(term: str, bind=None):
+    # The trigram FTS table answers substring matches of 3+ characters from
+    # its index; shorter terms fall back to ILIKE (pg_trgm serves ILIKE directly).
+    # ``bind`` is the engine the query will run on (default: the primary).
+    if len(term) >= 3 and has_name_fts(bind if bind is not None else replicas.primary):
+        phrase = '"' + term.replace('"', '""') + '"'
+        matches = text(f"SELECT rowid FROM {NAME_FTS_TABLE} WHERE {NAME_FTS_TABLE} MATCH :name_phrase")
+        return Patient.id.in_(matches.bindparams(name_phrase=phrase).columns(column("rowid", Integer)))
+    return Patient.nama.ilike(f"%{escape_like(term)}%", escape="\\")
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_patient_filters(
+    query,
+    q: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    dokter: Optional[str] = None,
+    diagnosis: Optional[str] = None,
+    bind=None
+):
+    """Translate dashboard search inputs into SQL predicates on a Query or Select.
+
+    Visit-date range and doctor are sargable (index range / equality scans);
+    name and diagnosis are case-insensitive substring matches. ``bind`` is
+    the engine the query will run on, which decides how names are matched.
+    """
+    if q:
+        query = query.filter(name_filter(q.strip(), bind))
+    if date_from:
+        query = query.filter(Patient.tanggal_kunjungan >= date_from)
+    if date_to:
+        query = query.filter(Patient.tanggal_kunjungan <= date_to)
+    if dokter:
+        query = query.filter(Patient.dokter == dokter.strip())
+    if diagnosis:
+        query = query.filter(Patient.diagnosis.ilike(f"%{escape_like(diagnosis.strip())}%", escape="\\"))
+    return query
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+
+class HashPoolMetrics:
+    """Counters for the password hashing pool, exposed at /api/auth/metrics"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            completed = self.completed or 1
+            return {
+                "workers": settings.PASSWORD_HASH_WORKERS,
+                "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_seconds_total / completed * 1000, 2),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "avg_run_ms": round(self.run_seconds_total / completed * 1000, 2),
+            }
+
+
+metrics = HashPoolMetrics()
+
+# bcrypt releases the GIL, so a small thread pool gives real parallelism
+# without ever running a hash on the event loop thread.
+executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+async def run_in_hash_pool(fn: Callable, *args):
+    """Run a CPU-bound hashing call on the pool.
+
+    At most PASSWORD_HASH_MAX_PENDING calls may be running or queued; beyond
+    that the request is shed with 503 instead of growing an unbounded queue.
+    """
+    with metrics.lock:
+        if metrics.in_flight >= settings.PASSWORD_HASH_MAX_PENDING:
+            metrics.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent login attempts, please retry",
+                headers={"Retry-After": "1"}
+            )
+        metrics.in_flight += 1
+    enqueued = time.perf_counter()
+
+    def task():
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with metrics.lock:
+                metrics.wait_seconds_total += started - enqueued
+                metrics.max_wait_seconds = max(metrics.max_wait_seconds, started - enqueued)
+                metrics.run_seconds_total += finished - started
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, task)
+    finally:
+        with metrics.lock:
+            metrics.in_flight -= 1
+            metrics.completed += 1
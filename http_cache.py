@@ -0,0 +1,110 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import TableVersion
+
+# The patients row of table_versions: triggers (migration 0006) bump it in
+# the same transaction as every insert, update and delete, so this is a
+# primary-key lookup however large patients grows. The price: on Postgres
+# a transaction holds that row's lock from its first write to patients
+# until it commits, so writers to patients run one at a time.
+PATIENTS_VERSION = select(TableVersion.version, TableVersion.changed_at).where(TableVersion.name == "patients")
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive UTC timestamps, Postgres aware ones
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def latest(*timestamps: Optional[datetime]) -> Optional[datetime]:
+    values = [as_utc(value) for value in timestamps if value is not None]
+    return max(values) if values else None
+
+
+async def patients_version(db: AsyncSession) -> Tuple[int, Optional[datetime]]:
+    """Return (version, last_modified) for the patients table"""
+    row = (await db.execute(PATIENTS_VERSION)).one()
+    return row.version, latest(row.changed_at)
+
+
+def make_etag(*parts) -> str:
+    # Weak: the representation is equivalent, not byte-identical once compressed
+    return 'W/"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def record_etag(patient_id: int, updated_at: Optional[datetime]) -> str:
+    """Strong ETag "<id>.<updated_at in epoch microseconds, 0 if never edited>".
+
+    Strong so it can be used with If-Match, and decodable so a conditional
+    write can compare updated_at in its WHERE clause without a read first.
+    """
+    version = 0 if updated_at is None else (as_utc(updated_at) - EPOCH) // timedelta(microseconds=1)
+    return f'"{patient_id}.{version}"'
+
+
+def parse_record_etag(etag: str) -> Optional[Tuple[int, Optional[datetime]]]:
+    """Inverse of record_etag(): (id, updated_at), or None when malformed"""
+    try:
+        patient_id, version = etag.strip().strip('"').split(".")
+        patient_id, version = int(patient_id), int(version)
+    except ValueError:
+        return None
+    return patient_id, None if version == 0 else EPOCH + timedelta(microseconds=version)
+
+
+def record_headers(row) -> Tuple[dict, Optional[datetime]]:
+    """Validators for one patient record; returns (headers, last_modified)"""
+    last_modified = latest(row.created_at, row.updated_at)
+    return cache_headers(record_etag(row.id, row.updated_at), last_modified), last_modified
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None, private: bool = False) -> dict:
+    """Validators for a response that clients may store but must revalidate.
+
+    ``private`` is for pages rendered per logged-in user, which shared
+    proxies must not hand to someone else.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache" if private else "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    if private:
+        headers["Vary"] = "Cookie"
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate If-None-Match, or else If-Modified-Since, against the current validators.
+
+    Pass ``last_modified`` only where it is authoritative: a table's change
+    time (table_versions.changed_at) has one-second resolution, so two
+    writes within a second look alike and list views rely on the ETag alone.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= as_utc(since)
+    return False
+
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,415 @@
+import codecs
+import csv
+import json
+import logging
+from operator import itemgetter
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only, greenlet_spawn
+
+from config import settings
+from dedup import Deduplicator, merge_duplicates
+from models import Patient
+from name_index import name_index
+from patient_cache import patient_cache
+from rollup import update_rollup
+from schemas import PatientCreate
+from stats import StatsDelta, stats_cache
+
+IMPORT_COLUMNS = ("nama", "tanggal_lahir", "tanggal_kunjungan", "diagnosis", "tindakan", "dokter")
+
+batch_adapter = TypeAdapter(List[PatientCreate])
+
+
+logger = logging.getLogger(__name__)
+
+
+class RowParseError(str):
+    """Placeholder yielded by the stream parsers for a line that could not be decoded"""
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    parts = []
+    for err in exc.errors():
+        field = ".".join(str(loc) for loc in err["loc"]) or "row"
+        parts.append(f"{field}: {err['msg']}")
+    return "; ".join(parts)
+
+
+def validate_rows(rows: list, start: int = 0) -> Tuple[List[dict], List[dict]]:
+    """Validate raw rows through PatientCreate.
+
+    Returns (valid, errors) where ``valid`` holds column dicts ready for an
+    executemany insert (dates already rendered as ISO strings) and
+    ``errors`` holds ``{"row": n, "error": msg}`` with ``n`` the zero-based
+    position of the row in the whole payload.
+
+    The whole batch is validated in one pydantic-core call; only a batch
+    that contains bad rows falls back to row-by-row validation.
+    """
+    try:
+        return batch_adapter.dump_python(batch_adapter.validate_python(rows), mode="json"), []
+    except ValidationError:
+        pass
+
+    valid, errors = [], []
+    for index, row in enumerate(rows, start):
+        if isinstance(row, RowParseError):
+            errors.append({"row": index, "error": str(row)})
+            continue
+        if not isinstance(row, dict):
+            errors.append({"row": index, "error": "row must be a JSON object"})
+            continue
+        try:
+            valid.append(PatientCreate.model_validate(row).model_dump(mode="json"))
+        except ValidationError as e:
+            errors.append({"row": index, "error": format_validation_error(e)})
+    return valid, errors
+
+
+def bulk_insert(db: Session, rows: List[dict]) -> None:
+    """executemany INSERT in fixed-size chunks; the caller owns the transaction.
+
+    The statement is compiled once and handed to the driver with plain
+    parameter rows, skipping SQLAlchemy's per-row bind processing, which
+    dominates the cost of large imports.
+    """
+    if not rows:
+        return
+    chunk_size = settings.IMPORT_BATCH_SIZE
+    connection = db.connection()
+    compiled = insert(Patient.__table__).compile(dialect=connection.dialect, column_keys=list(IMPORT_COLUMNS))
+    to_tuple = itemgetter(*compiled.positiontup) if compiled.positional else None
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        params = [to_tuple(row) for row in chunk] if to_tuple else chunk
+        connection.exec_driver_sql(compiled.string, params)
+
+
+def newest_id(db: Session) -> int:
+    # bulk_insert gets no ids back; rows above this one are the new ones
+    return db.scalar(select(func.max(Patient.id))) or 0
+
+
+def valid_positions(start: int, count: int, errors: List[dict]) -> List[int]:
+    """Payload row numbers of the rows validate_rows() kept, in order"""
+    rejected = {error["row"] for error in errors}
+    return [index for index in range(start, start + count) if index not in rejected]
+
+
+def write_batch(db: Session, valid: List[dict], positions: List[int], dedup: Deduplicator, dry_run: bool) -> StatsDelta:
+    """Deduplicate one validated batch and write it; returns the counts of the rows inserted (or that would be)"""
+    inserts, merges = dedup.split(db, valid, positions)
+    delta = StatsDelta()
+    delta.add_rows(inserts)
+    if not dry_run:
+        bulk_insert(db, inserts)
+        update_rollup(db, delta)
+        merge_duplicates(db, merges)
+    return delta
+
+
+def finish_import(db: Session, delta: StatsDelta, after_id: int, dedup: Deduplicator) -> None:
+    """Fold committed imported rows into the in-process caches"""
+    stats_cache.apply(delta)
+    name_index.add_since(db, after_id)
+    if dedup.mode == "merge" and dedup.duplicates:
+        # Merged rows changed diagnosis/dokter in place
+        patient_cache.clear()
+        stats_cache.invalidate()
+
+
+def import_rows(
+    db: Session,
+    rows: list,
+    progress: Optional[Callable[[int], None]] = None,
+    on_duplicate: str = "skip",
+    dry_run: bool = False
+) -> dict:
+    """Validate, deduplicate and insert ``rows`` in batches inside a single transaction.
+
+    Invalid rows are skipped and reported; valid rows are committed together.
+    Duplicates of stored or earlier rows are handled per ``on_duplicate``
+    (see dedup.DUPLICATE_MODES). ``dry_run`` reports what would happen and
+    writes nothing. ``progress`` is called with the number of rows
+    processed after each batch.
+    """
+    batch_size = settings.IMPORT_BATCH_SIZE
+    accepted = 0
+    errors = []
+    delta = StatsDelta()
+    dedup = Deduplicator(on_duplicate)
+    try:
+        after_id = newest_id(db)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            valid, batch_errors = validate_rows(batch, start)
+            written = write_batch(db, valid, valid_positions(start, len(batch), batch_errors), dedup, dry_run)
+            delta.merge(written)
+            accepted += written.total
+            errors.extend(batch_errors)
+            if progress:
+                progress(min(start + batch_size, len(rows)))
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if not dry_run:
+        finish_import(db, delta, after_id, dedup)
+    return import_summary(accepted, errors, dedup=dedup, dry_run=dry_run)
+
+
+def import_summary(
+    accepted: int,
+    errors: List[dict],
+    rejected: Optional[int] = None,
+    dedup: Optional[Deduplicator] = None,
+    dry_run: bool = False
+) -> dict:
+    rejected = len(errors) if rejected is None else rejected
+    duplicates = dedup.duplicates if dedup else 0
+    message = f"Would import {accepted} patients" if dry_run else f"Successfully imported {accepted} patients"
+    if rejected:
+        message += f", rejected {rejected}"
+    if duplicates:
+        message += {
+            "skip": f", skipped {duplicates} duplicates",
+            "merge": f", merged {duplicates} duplicates",
+            "insert": f", including {duplicates} possible duplicates",
+        }[dedup.mode]
+    return {
+        "message": message,
+        "accepted": accepted,
+        "rejected": rejected,
+        "duplicates": duplicates,
+        "dry_run": dry_run,
+        # Only the first errors and matches are echoed back so a bad file can't bloat the response
+        "errors": errors[:settings.MAX_IMPORT_ERRORS],
+        "matches": dedup.matches if dedup else [],
+    }
+
+
+# ---------- streamed uploads (NDJSON / CSV) ----------
+
+class LineTooLong(Exception):
+    """Raised into the CSV reader in place of a line over MAX_IMPORT_LINE_LENGTH"""
+
+
+async def aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering more than one line.
+
+    A line longer than MAX_IMPORT_LINE_LENGTH is dropped as it arrives and
+    a RowParseError yielded in its place, so an upload without newlines
+    can't be held in memory.
+    """
+    max_length = settings.MAX_IMPORT_LINE_LENGTH
+    too_long = RowParseError(f"line longer than {max_length} characters")
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    # Inside an overlong line: drop everything up to its newline
+    skipping = False
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+            elif len(line) > max_length:
+                yield too_long
+            else:
+                yield line + "\n"
+        if len(pending) > max_length:
+            if not skipping:
+                yield too_long
+            skipping = True
+            pending = ""
+    pending += decoder.decode(b"", final=True)
+    if pending and not skipping:
+        yield too_long if len(pending) > max_length else pending
+
+
+async def aiter_upload(upload, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """Read a multipart UploadFile (already spooled by Starlette) in chunks"""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def spool_body(chunks: AsyncIterator[bytes]) -> UploadFile:
+    """Copy a raw request body into a temporary file (on disk past 1 MB), like a multipart upload.
+
+    A StreamingResponse listens on the request's receive channel while it
+    streams, so a body must be read in full before such a response starts.
+    """
+    spooled = SpooledTemporaryFile(max_size=1024 * 1024)
+    upload = UploadFile(spooled)
+    async for chunk in chunks:
+        await upload.write(chunk)
+    await upload.seek(0)
+    return upload
+
+
+async def aiter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    async for line in aiter_lines(chunks):
+        if isinstance(line, RowParseError):
+            yield line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield RowParseError(f"invalid JSON: {e}")
+
+
+async def aiter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    """CSV with a header row; quoted fields may span several lines.
+
+    One csv.reader reads the whole upload, so the csv module alone decides
+    where quoted fields (and records) end. It pulls lines synchronously:
+    each record is read inside a greenlet (as SQLAlchemy's asyncio support
+    does) that suspends back to the event loop whenever the next line has
+    not arrived yet. A quoted field never closed is cut off by the csv
+    module's field size limit or at the end of the upload.
+    """
+    lines = aiter_lines(chunks)
+
+    def source():
+        while True:
+            try:
+                line = await_only(lines.__anext__())
+            except StopAsyncIteration:
+                return
+            if isinstance(line, RowParseError):
+                raise LineTooLong(line)
+            yield line
+
+    reader = csv.reader(source(), strict=True)
+    header = None
+    while True:
+        try:
+            values = await greenlet_spawn(next, reader, None)
+        except LineTooLong as e:
+            yield RowParseError(str(e))
+            continue
+        except csv.Error as e:
+            yield RowParseError(f"invalid CSV: {e}")
+            continue
+        if values is None:
+            break
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield RowParseError(f"expected {len(header)} columns, got {len(values)}")
+        else:
+            yield dict(zip(header, values))
+
+
+def import_batch(db: Session, rows: list, start: int, dedup: Deduplicator, dry_run: bool = False) -> Tuple[int, List[dict]]:
+    """Validate, deduplicate, insert and commit one batch; returns (accepted, errors)"""
+    valid, errors = validate_rows(rows, start)
+    try:
+        after_id = newest_id(db)
+        delta = write_batch(db, valid, valid_positions(start, len(rows), errors), dedup, dry_run)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if not dry_run:
+        finish_import(db, delta, after_id, dedup)
+    return delta.total, errors
+
+
+async def iter_import_stream(
+    db: Session,
+    rows: AsyncIterator[object],
+    on_duplicate: str = "skip",
+    dry_run: bool = False
+) -> AsyncIterator[dict]:
+    """Consume parsed rows as they arrive and commit every IMPORT_BATCH_SIZE rows.
+
+    Only one batch is held in memory at a time (plus the blocking keys seen
+    so far, for duplicates across batches). Batches run in the threadpool
+    so the event loop keeps serving other requests while the upload is parsed.
+    Yields {"processed", "accepted", "rejected"} after each commit, then
+    the import summary (the only update with a "message").
+    """
+    batch_size = settings.IMPORT_BATCH_SIZE
+    processed = accepted = rejected = 0
+    errors = []
+    batch = []
+    dedup = Deduplicator(on_duplicate)
+
+    async def flush() -> dict:
+        nonlocal processed, accepted, rejected
+        batch_accepted, batch_errors = await run_in_threadpool(import_batch, db, batch, processed, dedup, dry_run)
+        processed += len(batch)
+        accepted += batch_accepted
+        rejected += len(batch_errors)
+        # Keep only as many errors as will be reported
+        errors.extend(batch_errors[:max(0, settings.MAX_IMPORT_ERRORS - len(errors))])
+        batch.clear()
+        logger.info("import progress: %d rows processed, %d accepted, %d rejected", processed, accepted, rejected)
+        return {"processed": processed, "accepted": accepted, "rejected": rejected}
+
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield await flush()
+    if batch:
+        yield await flush()
+
+    summary = import_summary(accepted, errors, rejected, dedup, dry_run)
+    summary["processed"] = processed
+    yield summary
+
+
+async def import_stream(
+    db: Session,
+    rows: AsyncIterator[object],
+    progress: Optional[Callable[[int, int, int], None]] = None,
+    on_duplicate: str = "skip",
+    dry_run: bool = False
+) -> dict:
+    """iter_import_stream() to completion; returns the summary.
+
+    ``progress`` is called after each commit with (processed, accepted, rejected).
+    """
+    async for update in iter_import_stream(db, rows, on_duplicate, dry_run):
+        if "message" in update:
+            return update
+        if progress:
+            progress(update["processed"], update["accepted"], update["rejected"])
+
+
+async def aiter_import_progress(
+    db: Session,
+    rows: AsyncIterator[object],
+    on_duplicate: str = "skip",
+    dry_run: bool = False
+) -> AsyncIterator[bytes]:
+    """iter_import_stream() as NDJSON: a progress line per committed batch, the summary last"""
+    async for update in iter_import_stream(db, rows, on_duplicate, dry_run):
+        yield (json.dumps(update) + "\n").encode()
+
+
+STREAM_PARSERS = {
+    "ndjson": aiter_ndjson_rows,
+    "csv": aiter_csv_rows,
+}
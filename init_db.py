@@ -1,10 +1,12 @@
-from database import engine, SessionLocal
-from models import Base, Patient, User
+from database import SessionLocal
+from migrate import upgrade_database
+from models import Patient, User
 from auth import get_password_hash
+from rollup import recount_visits
 from datetime import date
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create or upgrade the tables
+upgrade_database()
 
 def init_database():
     db = SessionLocal()
@@ -80,6 +82,8 @@ def init_database():
             
             for patient in sample_patients:
                 db.add(patient)
+            db.flush()
+            recount_visits(db)
             
             db.commit()
             print("✅ Sample patients created successfully!")
@@ -0,0 +1,132 @@
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from config import settings
+from database import SessionLocal
+from export_cache import get_or_create_export
+from importer import import_rows
+from models import Job
+from schemas import JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Long-running exports/imports run here instead of inside request handlers
+executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS, thread_name_prefix="job")
+
+# Rows processed by running jobs. Kept in memory rather than written to the
+# jobs table so progress updates never contend with the job's own write
+# transaction (SQLite allows a single writer); persisted when the job ends.
+live_progress = {}
+
+
+def job_status(job: Job) -> JobStatus:
+    return JobStatus(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        processed=live_progress.get(job.id, job.processed or 0),
+        total=job.total,
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
+
+
+def update_job(job_id: str, **fields) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+def submit_job(kind: str, work: Callable[[Callable[[int], None]], dict], total: Optional[int] = None) -> Job:
+    """Record a queued job and hand ``work`` to the worker pool.
+
+    ``work`` receives a progress callback taking the number of rows done and
+    returns a JSON-serialisable result stored on the job row.
+    """
+    db = SessionLocal()
+    try:
+        job = Job(id=str(uuid.uuid4()), kind=kind, status="queued", processed=0, total=total)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        db.expunge(job)
+    finally:
+        db.close()
+
+    executor.submit(run_job, job.id, work)
+    return job
+
+
+def run_job(job_id: str, work: Callable[[Callable[[int], None]], dict]) -> None:
+    update_job(job_id, status="running")
+
+    def progress(processed: int) -> None:
+        live_progress[job_id] = processed
+
+    try:
+        result = work(progress)
+    except Exception as e:
+        logger.exception("job %s failed", job_id)
+        update_job(
+            job_id,
+            status="failed",
+            error=str(e),
+            processed=live_progress.pop(job_id, 0),
+            finished_at=datetime.now(timezone.utc)
+        )
+        return
+    update_job(
+        job_id,
+        status="done",
+        result=json.dumps(result),
+        processed=live_progress.pop(job_id, 0),
+        finished_at=datetime.now(timezone.utc)
+    )
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    db = SessionLocal()
+    try:
+        return db.query(Job).filter(Job.id == job_id).first()
+    finally:
+        db.close()
+
+
+def recover_jobs() -> None:
+    """Jobs live in this process only; anything unfinished at startup was lost"""
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.status.in_(["queued", "running"])).update(
+            {"status": "failed", "error": "Interrupted by server restart", "finished_at": datetime.now(timezone.utc)},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+# ---------- job bodies ----------
+
+def export_job(format: str) -> Callable[[Callable[[int], None]], dict]:
+    def work(progress: Callable[[int], None]) -> dict:
+        return get_or_create_export(format, progress)
+    return work
+
+
+def import_job(rows: list, on_duplicate: str = "skip") -> Callable[[Callable[[int], None]], dict]:
+    def work(progress: Callable[[int], None]) -> dict:
+        db = SessionLocal()
+        try:
+            return import_rows(db, rows, progress, on_duplicate)
+        finally:
+            db.close()
+    return work
@@ -1,41 +1,83 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Form, Query, Response, Header
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, date, timedelta
 from typing import List, Optional
-import pandas as pd
 import json
 
-from database import engine, get_db
-from models import Base, Patient, User
-from schemas import PatientCreate, PatientUpdate, UserCreate, UserLogin, Token
-from auth import authenticate_user, create_access_token, get_current_active_user, get_password_hash, get_current_user_from_cookie, get_current_user_role, require_dokter_role
+from config import settings
+from database import get_db, get_async_db, get_read_db, get_async_read_db
+from models import Patient, User
+import schemas
+from schemas import PatientCreate, PatientUpdate, UserCreate, UserLogin, Token, JobStatus, BulkDelete, BulkUpdate, BulkResult
+from auth import authenticate_user, authenticate_user_async, create_access_token, get_current_active_user, get_password_hash, get_current_user_from_cookie, get_current_user_role, require_admin_role, require_dokter_role
+from pagination import cursor_headers, paginate_async, page_link
+from filters import apply_patient_filters, name_filter, parse_date_param
+from exports import EXPORT_FORMATS, EXPORT_WRITERS
+from export_cache import get_or_create_export
+from jobs import submit_job, get_job, job_status, recover_jobs, export_job, import_job
+from hashing import metrics as hashing_metrics
+from stats import StatsDelta, dashboard_stats, stats_cache
+from rollup import ensure_rollup, update_rollup
+from reports import age_histogram, visits_per_doctor, visits_per_period
+import analytics
+from dedup import check_duplicate_mode
+from importer import STREAM_PARSERS, aiter_import_progress, aiter_upload, import_rows, import_stream, spool_body
+from serializers import patient_dict, patient_dicts, patient_rows
+from patient_cache import patient_cache
+from http_cache import cache_headers, make_etag, not_modified, not_modified_response, parse_record_etag, patients_version, record_headers
+from search import search_patients
+from name_index import name_index
+from patient_writes import bulk_delete, bulk_update, patch_patient
+from migrate import upgrade_database
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create or upgrade the database tables (alembic upgrade head)
+upgrade_database()
 
-app = FastAPI(title="Sistem Manajemen Pasien", version="1.0.0")
+app = FastAPI(title="Sistem Manajemen Pasien", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+@app.on_event("startup")
+def startup():
+    recover_jobs()
+    # New (or never filled) rollup tables are built once from patients
+    ensure_rollup()
+    # Autocomplete falls back to the database until the first build is done
+    name_index.rebuild_in_background()
+
 # ==================== LEVEL 1: CRUD PASIEN ====================
 
+async def get_patient_or_404(db: AsyncSession, patient_id: int) -> Patient:
+    patient = await db.get(Patient, patient_id)
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return patient
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.get("/patients", response_class=HTMLResponse)
-async def list_patients(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user_from_cookie)):
-    patients = db.query(Patient).all()
+async def list_patients(request: Request, db: AsyncSession = Depends(get_async_read_db), current_user: User = Depends(get_current_user_from_cookie)):
+    version, last_modified = await patients_version(db)
+    headers = cache_headers(make_etag("patients", version, current_user.role), last_modified, private=True)
+    if not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    
+    patients = (await db.execute(select(Patient))).scalars().all()
     return templates.TemplateResponse("patients/list.html", {
         "request": request, 
         "patients": patients,
         "user_role": current_user.role
-    })
+    }, headers=headers)
 
 @app.get("/patients/new", response_class=HTMLResponse)
 async def new_patient_form(request: Request, current_user: User = Depends(require_dokter_role)):
@@ -53,7 +95,7 @@ async def create_patient(
     diagnosis: str = Form(""),
     tindakan: str = Form(""),
     dokter: str = Form(""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_dokter_role)
 ):
     patient_data = PatientCreate(
@@ -67,16 +109,19 @@ async def create_patient(
     
     db_patient = Patient(**patient_data.dict())
     db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
+    stats_delta = StatsDelta()
+    stats_delta.add_patient(db_patient)
+    await db.run_sync(update_rollup, stats_delta)
+    await db.commit()
+    await db.refresh(db_patient)
+    stats_cache.apply(stats_delta)
+    name_index.add_patient(db_patient)
     
     return RedirectResponse(url="/patients", status_code=303)
 
 @app.get("/patients/{patient_id}/edit", response_class=HTMLResponse)
-async def edit_patient_form(request: Request, patient_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_dokter_role)):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
+async def edit_patient_form(request: Request, patient_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_dokter_role)):
+    patient = await get_patient_or_404(db, patient_id)
     return templates.TemplateResponse("patients/edit.html", {
         "request": request, 
         "patient": patient,
@@ -93,21 +138,19 @@ async def update_patient(
     diagnosis: str = Form(""),
     tindakan: str = Form(""),
     dokter: str = Form(""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_dokter_role)
 ):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
-    
-    patient.nama = nama
-    patient.tanggal_lahir = datetime.strptime(tanggal_lahir, "%Y-%m-%d").date()
-    patient.tanggal_kunjungan = datetime.strptime(tanggal_kunjungan, "%Y-%m-%d").date()
-    patient.diagnosis = diagnosis
-    patient.tindakan = tindakan
-    patient.dokter = dokter
-    
-    db.commit()
+    # patch_patient reads the old values under the write lock, so the
+    # rollups are adjusted by what this write actually replaced
+    await patch_patient(db, patient_id, {
+        "nama": nama,
+        "tanggal_lahir": datetime.strptime(tanggal_lahir, "%Y-%m-%d").date(),
+        "tanggal_kunjungan": datetime.strptime(tanggal_kunjungan, "%Y-%m-%d").date(),
+        "diagnosis": diagnosis,
+        "tindakan": tindakan,
+        "dokter": dokter
+    })
     return RedirectResponse(url="/patients", status_code=303)
 
 # Alternative endpoint for form submission (since HTML forms don't support PUT)
@@ -121,31 +164,27 @@ async def update_patient_post(
     diagnosis: str = Form(""),
     tindakan: str = Form(""),
     dokter: str = Form(""),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_dokter_role)
 ):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Patient not found")
-    
-    patient.nama = nama
-    patient.tanggal_lahir = datetime.strptime(tanggal_lahir, "%Y-%m-%d").date()
-    patient.tanggal_kunjungan = datetime.strptime(tanggal_kunjungan, "%Y-%m-%d").date()
-    patient.diagnosis = diagnosis
-    patient.tindakan = tindakan
-    patient.dokter = dokter
-    
-    db.commit()
+    # patch_patient reads the old values under the write lock, so the
+    # rollups are adjusted by what this write actually replaced
+    await patch_patient(db, patient_id, {
+        "nama": nama,
+        "tanggal_lahir": datetime.strptime(tanggal_lahir, "%Y-%m-%d").date(),
+        "tanggal_kunjungan": datetime.strptime(tanggal_kunjungan, "%Y-%m-%d").date(),
+        "diagnosis": diagnosis,
+        "tindakan": tindakan,
+        "dokter": dokter
+    })
     return RedirectResponse(url="/patients", status_code=303)
 
 @app.post("/patients/{patient_id}/delete", response_class=HTMLResponse)
-async def delete_patient(request: Request, patient_id: int, db: Session = Depends(get_db), current_user: User = Depends(require_dokter_role)):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
-    if not patient:
+async def delete_patient(request: Request, patient_id: int, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(require_dokter_role)):
+    # The rollups are decremented by the row DELETE ... RETURNING removed,
+    # not by an earlier read, so a concurrent delete or edit can't skew them
+    if not await bulk_delete(db, BulkDelete(ids=[patient_id])):
         raise HTTPException(status_code=404, detail="Patient not found")
-    
-    db.delete(patient)
-    db.commit()
     return RedirectResponse(url="/patients", status_code=303)
 
 # ==================== LEVEL 2: LOGIN SEDERHANA ====================
@@ -161,7 +200,7 @@ async def login(
     password: str = Form(...),
     db: Session = Depends(get_db)
 ):
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user_async(db, username, password)
     if not user:
         return templates.TemplateResponse("auth/login.html", {
             "request": request, 
@@ -180,6 +219,10 @@ async def login(
     )
     return response
 
+@app.get("/api/auth/metrics")
+def auth_metrics(current_user: User = Depends(require_admin_role)):
+    return hashing_metrics.snapshot()
+
 @app.get("/logout")
 async def logout():
     response = RedirectResponse(url="/login", status_code=303)
@@ -194,90 +237,410 @@ async def logout():
 # ==================== LEVEL 4: DASHBOARD + LAPORAN ====================
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user_from_cookie)):
-    # Get summary statistics
-    total_patients = db.query(Patient).count()
-    today_patients = db.query(Patient).filter(
-        Patient.tanggal_kunjungan == date.today()
-    ).count()
+async def dashboard(
+    request: Request,
+    q: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    dokter: Optional[str] = None,
+    diagnosis: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_from_cookie)
+):
+    # The page only changes with the data, the viewer's role and the date ("today")
+    version, last_modified = await patients_version(db)
+    headers = cache_headers(make_etag("dashboard", version, current_user.role, date.today()), last_modified, private=True)
+    if not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
     
-    # Get all patients for the table
-    patients = db.query(Patient).order_by(Patient.tanggal_kunjungan.desc()).all()
+    # Summary statistics come from the write-through cache, not table scans
+    stats = await db.run_sync(dashboard_stats)
+    
+    # Filter and page the report table on the server
+    stmt = apply_patient_filters(
+        patient_rows(),
+        q=q,
+        date_from=parse_date_param(date_from, "date_from"),
+        date_to=parse_date_param(date_to, "date_to"),
+        dokter=dokter,
+        diagnosis=diagnosis,
+        bind=db.get_bind()
+    )
+    patients, next_cursor, prev_cursor = await paginate_async(db, stmt, "-tanggal_kunjungan", cursor, limit)
     
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
-        "total_patients": total_patients,
-        "today_patients": today_patients,
+        "total_patients": stats["total_patients"],
+        "today_patients": stats["today_patients"],
+        "stats": stats,
         "patients": patients,
+        "filters": {
+            "q": q or "",
+            "date_from": date_from or "",
+            "date_to": date_to or "",
+            "dokter": dokter or "",
+            "diagnosis": diagnosis or ""
+        },
+        "next_url": page_link(request, next_cursor),
+        "prev_url": page_link(request, prev_cursor),
         "user_role": current_user.role
-    })
+    }, headers=headers)
+
+@app.get("/api/stats")
+def get_stats_api(db: Session = Depends(get_read_db)):
+    return dashboard_stats(db)
+
+# Reports read only the rollup tables (rollup.py), never patients, so
+# their cost follows the number of days and groups, not of visits
+@app.get("/api/reports/visits")
+def visits_report(
+    period: str = "month",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    dokter: Optional[str] = None,
+    diagnosis: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    return visits_per_period(
+        db,
+        period,
+        date_from=parse_date_param(date_from, "date_from"),
+        date_to=parse_date_param(date_to, "date_to"),
+        dokter=dokter,
+        diagnosis=diagnosis
+    )
+
+@app.get("/api/reports/doctors")
+def doctors_report(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    diagnosis: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    return visits_per_doctor(
+        db,
+        date_from=parse_date_param(date_from, "date_from"),
+        date_to=parse_date_param(date_to, "date_to"),
+        diagnosis=diagnosis
+    )
+
+@app.get("/api/reports/age-bands")
+def age_bands_report(
+    width: int = 10,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    dokter: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    return age_histogram(
+        db,
+        width,
+        date_from=parse_date_param(date_from, "date_from"),
+        date_to=parse_date_param(date_to, "date_to"),
+        dokter=dokter
+    )
+
+# Analytics scan every matching visit (analytics.py loads the columns into
+# NumPy arrays); plain def, so the number crunching runs in the threadpool
+def analytics_filters(
+    q: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    dokter: Optional[str] = None,
+    diagnosis: Optional[str] = None
+) -> dict:
+    # The dashboard's filters, name search included, so the numbers
+    # describe the same visits as its table
+    return {
+        "q": q,
+        "date_from": parse_date_param(date_from, "date_from"),
+        "date_to": parse_date_param(date_to, "date_to"),
+        "dokter": dokter,
+        "diagnosis": diagnosis,
+    }
+
+@app.get("/api/analytics/ages")
+def analytics_ages(
+    width: int = Query(10, ge=1, le=50),
+    filters: dict = Depends(analytics_filters),
+    db: Session = Depends(get_read_db)
+):
+    return analytics.age_distribution(db, width, **filters)
+
+@app.get("/api/analytics/intervals")
+def analytics_intervals(
+    top: int = Query(10, ge=0, le=100),
+    filters: dict = Depends(analytics_filters),
+    db: Session = Depends(get_read_db)
+):
+    return analytics.visit_intervals(db, top, **filters)
+
+@app.get("/api/analytics/doctors")
+def analytics_doctors(filters: dict = Depends(analytics_filters), db: Session = Depends(get_read_db)):
+    return analytics.doctor_workload(db, **filters)
+
+@app.get("/api/analytics/diagnoses")
+def analytics_diagnoses(
+    period: str = "month",
+    top: int = Query(10, ge=1, le=100),
+    filters: dict = Depends(analytics_filters),
+    db: Session = Depends(get_read_db)
+):
+    return analytics.diagnosis_trends(db, period, top, **filters)
 
 # ==================== LEVEL 5: INTEGRASI SEDERHANA ====================
 
 @app.post("/api/import")
-async def import_patients(request: Request, db: Session = Depends(get_db)):
+async def import_patients(request: Request, on_duplicate: str = "skip", dry_run: bool = False, db: Session = Depends(get_db)):
+    check_duplicate_mode(on_duplicate)
     try:
         body = await request.json()
-        patients_data = body.get("patients", [])
-        
-        imported_count = 0
-        for patient_data in patients_data:
-            patient = Patient(
-                nama=patient_data["nama"],
-                tanggal_lahir=datetime.strptime(patient_data["tanggal_lahir"], "%Y-%m-%d").date(),
-                tanggal_kunjungan=datetime.strptime(patient_data["tanggal_kunjungan"], "%Y-%m-%d").date(),
-                diagnosis=patient_data.get("diagnosis", ""),
-                tindakan=patient_data.get("tindakan", ""),
-                dokter=patient_data.get("dokter", "")
-            )
-            db.add(patient)
-            imported_count += 1
-        
-        db.commit()
-        return {"message": f"Successfully imported {imported_count} patients"}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+    
+    patients_data = body.get("patients", []) if isinstance(body, dict) else None
+    if not isinstance(patients_data, list):
+        raise HTTPException(status_code=400, detail="'patients' must be a list")
     
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    # Rows are validated, checked for duplicates and inserted in batches;
+    # bad rows are reported, not fatal
+    return await run_in_threadpool(import_rows, db, patients_data, on_duplicate=on_duplicate, dry_run=dry_run)
 
-@app.get("/api/export")
-async def export_patients(db: Session = Depends(get_db)):
-    patients = db.query(Patient).all()
+@app.post("/api/import/stream")
+async def import_patients_stream(
+    request: Request,
+    format: str = "ndjson",
+    on_duplicate: str = "skip",
+    dry_run: bool = False,
+    progress: bool = False,
+    db: Session = Depends(get_db)
+):
+    check_duplicate_mode(on_duplicate)
+    if format not in STREAM_PARSERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}'. Allowed: {', '.join(STREAM_PARSERS)}"
+        )
     
-    # Convert to DataFrame
-    data = []
-    for patient in patients:
-        data.append({
-            "ID": patient.id,
-            "Nama": patient.nama,
-            "Tanggal Lahir": patient.tanggal_lahir,
-            "Tanggal Kunjungan": patient.tanggal_kunjungan,
-            "Diagnosis": patient.diagnosis,
-            "Tindakan": patient.tindakan,
-            "Dokter": patient.dokter
-        })
+    # Accept either a raw request body or a multipart upload in the "file" field
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing 'file' upload")
+        chunks = aiter_upload(upload)
+    elif progress:
+        # The body has to be in hand before a streamed response starts
+        chunks = aiter_upload(await spool_body(request.stream()))
+    else:
+        chunks = request.stream()
+    
+    # Rows are parsed as bytes arrive and committed batch by batch. With
+    # ?progress=true the response is NDJSON: one line per committed batch
+    # (processed, accepted, rejected), then the summary
+    rows = STREAM_PARSERS[format](chunks)
+    if progress:
+        return StreamingResponse(
+            aiter_import_progress(db, rows, on_duplicate=on_duplicate, dry_run=dry_run),
+            media_type="application/x-ndjson"
+        )
+    return await import_stream(db, rows, on_duplicate=on_duplicate, dry_run=dry_run)
+
+# Plain def: the workbook is rendered in the threadpool instead of the event loop
+@app.get("/api/export")
+def export_patients(format: str = "xlsx"):
+    if format not in EXPORT_WRITERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}'. Allowed: {', '.join(EXPORT_WRITERS)}"
+        )
+    # Reuses the last file when the data hasn't changed since it was written
+    return get_or_create_export(format)
+
+@app.get("/api/export/stream")
+async def export_patients_stream(format: str = "csv"):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}'. Allowed: {', '.join(EXPORT_FORMATS)}"
+        )
     
-    df = pd.DataFrame(data)
+    # Sync generator: Starlette iterates it in the threadpool, off the event loop
+    stream, media_type = EXPORT_FORMATS[format]
+    filename = f"patients_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# ==================== BACKGROUND JOBS ====================
+
+@app.post("/api/jobs/export", response_model=JobStatus, status_code=202)
+def create_export_job(format: str = "xlsx"):
+    if format not in EXPORT_WRITERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}'. Allowed: {', '.join(EXPORT_WRITERS)}"
+        )
+    return job_status(submit_job("export", export_job(format)))
+
+@app.post("/api/jobs/import", response_model=JobStatus, status_code=202)
+async def create_import_job(request: Request, on_duplicate: str = "skip"):
+    check_duplicate_mode(on_duplicate)
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
     
-    # Create Excel file
-    filename = f"patients_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    df.to_excel(f"static/exports/{filename}", index=False)
+    patients_data = body.get("patients", []) if isinstance(body, dict) else None
+    if not isinstance(patients_data, list):
+        raise HTTPException(status_code=400, detail="'patients' must be a list")
     
-    return {"download_url": f"/static/exports/{filename}"}
+    job = await run_in_threadpool(submit_job, "import", import_job(patients_data, on_duplicate), len(patients_data))
+    return job_status(job)
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+def get_job_status(job_id: str):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
 
 # ==================== API ENDPOINTS ====================
 
-@app.get("/api/patients")
-async def get_patients_api(db: Session = Depends(get_db)):
-    patients = db.query(Patient).all()
-    return patients
+# Handlers return ORJSONResponse directly: rows are already shaped like
+# schemas.Patient, so response_model documents them without re-validating
+@app.get("/api/patients", response_model=List[schemas.Patient])
+async def get_patients_api(
+    request: Request,
+    sort: str = "-id",
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    version, last_modified = await patients_version(db)
+    headers = cache_headers(make_etag("api/patients", version), last_modified)
+    if not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    
+    patients, next_cursor, prev_cursor = await paginate_async(db, patient_rows(), sort, cursor, limit)
+
+    # Cursors travel in headers so the body stays a plain list of patients
+    headers.update(cursor_headers(request, next_cursor, prev_cursor))
+    return ORJSONResponse(patient_dicts(patients), headers=headers)
+
+@app.get("/api/patients/search", response_model=List[schemas.PatientSearchHit])
+async def search_patients_api(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    # Ranked hits over diagnosis/tindakan from the full-text index (migration 0004)
+    hits, next_cursor = await search_patients(db, q, cursor, limit)
+    return ORJSONResponse(hits, headers=cursor_headers(request, next_cursor))
+
+@app.get("/api/patients/autocomplete", response_model=List[schemas.PatientSuggestion])
+async def autocomplete_patients_api(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    # Answered from the in-memory name index; the query below only runs
+    # while the index is still being built after startup
+    suggestions = name_index.lookup(q, limit)
+    if suggestions is None:
+        rows = await db.execute(
+            select(Patient.id, Patient.nama, Patient.tanggal_lahir)
+            .where(name_filter(q.strip(), db.get_bind()))
+            .order_by(Patient.nama, Patient.id)
+            .limit(limit)
+        )
+        suggestions = [row._asdict() for row in rows]
+    return ORJSONResponse(suggestions)
+
+# Set-based clean-up: one UPDATE/DELETE per statement instead of one request per patient
+@app.post("/api/patients/bulk-update", response_model=BulkResult)
+async def bulk_update_patients(
+    selection: BulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_dokter_role)
+):
+    return {"affected": await bulk_update(db, selection)}
+
+@app.post("/api/patients/bulk-delete", response_model=BulkResult)
+async def bulk_delete_patients(
+    selection: BulkDelete,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_dokter_role)
+):
+    return {"affected": await bulk_delete(db, selection)}
+
+@app.get("/api/patients/{patient_id}", response_model=schemas.Patient)
+async def get_patient_api(request: Request, patient_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    # Hot records are served from memory: no query, no serialization
+    cached = patient_cache.get(patient_id)
+    if cached is not None:
+        body, headers, last_modified = cached
+        if not_modified(request, headers["ETag"], last_modified):
+            return not_modified_response(headers)
+        return Response(body, media_type="application/json", headers=headers)
+    
+    generation = patient_cache.generation
+    row = (await db.execute(patient_rows().where(Patient.id == patient_id))).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    
+    # A single record's timestamps are authoritative, so If-Modified-Since works too
+    headers, last_modified = record_headers(row)
+    response = ORJSONResponse(patient_dict(row), headers=headers)
+    patient_cache.put(patient_id, response.body, headers, last_modified, generation)
+    if not_modified(request, headers["ETag"], last_modified):
+        return not_modified_response(headers)
+    return response
+
+@app.patch("/api/patients/{patient_id}", response_model=schemas.Patient)
+async def patch_patient_api(
+    patient_id: int,
+    patch: PatientUpdate,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_dokter_role)
+):
+    # If-Match carries the record ETag from GET; its updated_at guards
+    # against overwriting someone else's edit
+    expected = None
+    if if_match and if_match.strip() != "*":
+        expected = parse_record_etag(if_match)
+        if expected is None or expected[0] != patient_id:
+            raise HTTPException(status_code=412, detail="If-Match does not match this patient")
+    
+    row = await patch_patient(
+        db,
+        patient_id,
+        patch.model_dump(exclude_unset=True),
+        check_version=expected is not None,
+        expected_updated_at=expected[1] if expected else None
+    )
+    headers, _ = record_headers(row)
+    return ORJSONResponse(patient_dict(row), headers=headers)
 
-@app.post("/api/patients")
-async def create_patient_api(patient: PatientCreate, db: Session = Depends(get_db)):
+@app.post("/api/patients", response_model=schemas.Patient)
+async def create_patient_api(patient: PatientCreate, db: AsyncSession = Depends(get_async_db)):
     db_patient = Patient(**patient.dict())
     db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
-    return db_patient
+    stats_delta = StatsDelta()
+    stats_delta.add_patient(db_patient)
+    await db.run_sync(update_rollup, stats_delta)
+    await db.commit()
+    await db.refresh(db_patient)
+    stats_cache.apply(stats_delta)
+    name_index.add_patient(db_patient)
+    return ORJSONResponse(patient_dict(db_patient))
 
 if __name__ == "__main__":
     import uvicorn
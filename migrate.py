@@ -0,0 +1,26 @@
+"""Schema upgrades: the Alembic migrations own every table, index and trigger.
+
+upgrade_database() runs ``alembic upgrade head``; the app calls it on
+import and init_db.py before seeding. Databases created by the old
+Base.metadata.create_all() (no alembic_version table) upgrade in place:
+each migration skips the tables and indexes they already have.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+
+from database import engine
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ALEMBIC_INI = os.path.join(HERE, "alembic.ini")
+
+
+def upgrade_database(bind=None) -> None:
+    """Bring ``bind`` (the app's engine by default) up to the latest migration"""
+    config = Config(ALEMBIC_INI)
+    # alembic.ini's script_location is relative to the working directory
+    config.set_main_option("script_location", os.path.join(HERE, "migrations"))
+    with (bind or engine).begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
@@ -0,0 +1,99 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Databases created earlier by Base.metadata.create_all() already have some
+of these tables, so each table and index is created only if it is missing.
+Such databases are upgraded in place by ``alembic upgrade head`` (which
+the app runs at startup, see migrate.py); no ``alembic stamp`` is needed.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'patients' not in tables:
+        op.create_table(
+            'patients',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('nama', sa.String(length=100), nullable=False),
+            sa.Column('tanggal_lahir', sa.Date(), nullable=False),
+            sa.Column('tanggal_kunjungan', sa.Date(), nullable=False),
+            sa.Column('diagnosis', sa.Text(), nullable=True),
+            sa.Column('tindakan', sa.Text(), nullable=True),
+            sa.Column('dokter', sa.String(length=100), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_patients_id', 'patients', ['id'], unique=False, if_not_exists=True)
+
+    if 'users' not in tables:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=50), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=False),
+            sa.Column('role', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('username')
+        )
+    op.create_index('ix_users_id', 'users', ['id'], unique=False, if_not_exists=True)
+
+    if 'jobs' not in tables:
+        op.create_table(
+            'jobs',
+            sa.Column('id', sa.String(length=36), nullable=False),
+            sa.Column('kind', sa.String(length=20), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('processed', sa.Integer(), nullable=True),
+            sa.Column('total', sa.Integer(), nullable=True),
+            sa.Column('result', sa.Text(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'export_artifacts' not in tables:
+        op.create_table(
+            'export_artifacts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('format', sa.String(length=10), nullable=False),
+            sa.Column('data_version', sa.String(length=64), nullable=False),
+            sa.Column('content_hash', sa.String(length=64), nullable=False),
+            sa.Column('filename', sa.String(length=255), nullable=False),
+            sa.Column('size_bytes', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_export_artifacts_id', 'export_artifacts', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_export_artifacts_data_version', 'export_artifacts', ['data_version'], unique=False, if_not_exists=True)
+    op.create_index('ix_export_artifacts_content_hash', 'export_artifacts', ['content_hash'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_export_artifacts_content_hash', table_name='export_artifacts')
+    op.drop_index('ix_export_artifacts_data_version', table_name='export_artifacts')
+    op.drop_index('ix_export_artifacts_id', table_name='export_artifacts')
+    op.drop_table('export_artifacts')
+    op.drop_table('jobs')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_table('users')
+    op.drop_index('ix_patients_id', table_name='patients')
+    op.drop_table('patients')
@@ -0,0 +1,72 @@
+"""indexes for hot query columns and name search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+Composite b-tree indexes back the dashboard date range / sort, the doctor
+filter and keyset pagination. Name substring search (ILIKE '%siti%') can't
+use a b-tree, so it gets a trigram index: pg_trgm GIN on Postgres, an
+external-content FTS5 trigram table kept in sync by triggers on SQLite.
+users.username needs nothing new: its UNIQUE constraint is already indexed.
+Every object is created only if missing, since databases built by the old
+Base.metadata.create_all() already have the b-tree indexes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_patients_tanggal_kunjungan_id', 'patients', ['tanggal_kunjungan', 'id'], if_not_exists=True)
+    op.create_index('ix_patients_tanggal_lahir_id', 'patients', ['tanggal_lahir', 'id'], if_not_exists=True)
+    op.create_index('ix_patients_nama_id', 'patients', ['nama', 'id'], if_not_exists=True)
+    op.create_index('ix_patients_dokter_tanggal_kunjungan', 'patients', ['dokter', 'tanggal_kunjungan'], if_not_exists=True)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX IF NOT EXISTS ix_patients_nama_trgm ON patients USING gin (nama gin_trgm_ops)')
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS patients_nama_fts USING fts5("
+            "nama, content='patients', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute("INSERT INTO patients_nama_fts(patients_nama_fts) VALUES ('rebuild')")
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_nama_fts_ai AFTER INSERT ON patients BEGIN "
+            "INSERT INTO patients_nama_fts(rowid, nama) VALUES (new.id, new.nama); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_nama_fts_ad AFTER DELETE ON patients BEGIN "
+            "INSERT INTO patients_nama_fts(patients_nama_fts, rowid, nama) VALUES ('delete', old.id, old.nama); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_nama_fts_au AFTER UPDATE OF nama ON patients BEGIN "
+            "INSERT INTO patients_nama_fts(patients_nama_fts, rowid, nama) VALUES ('delete', old.id, old.nama); "
+            "INSERT INTO patients_nama_fts(rowid, nama) VALUES (new.id, new.nama); END"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_patients_nama_trgm')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS patients_nama_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS patients_nama_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS patients_nama_fts_ai')
+        op.execute('DROP TABLE IF EXISTS patients_nama_fts')
+
+    op.drop_index('ix_patients_dokter_tanggal_kunjungan', table_name='patients')
+    op.drop_index('ix_patients_nama_id', table_name='patients')
+    op.drop_index('ix_patients_tanggal_lahir_id', table_name='patients')
+    op.drop_index('ix_patients_tanggal_kunjungan_id', table_name='patients')
@@ -0,0 +1,30 @@
+"""index patients.updated_at for the table version
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:00:00.000000
+
+ETags and the export cache fingerprint the patients table with
+max(updated_at) on every conditional request; the index turns that into a
+single index lookup instead of a table scan. Superseded by the
+table_versions row (0006); 0007 drops the index again.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_patients_updated_at', 'patients', ['updated_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_patients_updated_at', table_name='patients')
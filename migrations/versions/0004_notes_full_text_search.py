@@ -0,0 +1,71 @@
+"""full-text search over diagnosis and tindakan
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:00:00.000000
+
+SQLite gets an external-content FTS5 table over the two note columns, kept
+in sync by triggers like the name index from 0002. unicode61 with
+remove_diacritics folds case and accents. Postgres gets a GIN index on a
+weighted tsvector expression (diagnosis A, tindakan B); search.py queries
+the identical expression so the planner can use it. The 'simple' text
+search config is used because the notes are Indonesian and Postgres ships
+no stemmer for it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTES_TSVECTOR = (
+    "setweight(to_tsvector('simple', coalesce(diagnosis, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(tindakan, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(f'CREATE INDEX IF NOT EXISTS ix_patients_notes_tsv ON patients USING gin (({NOTES_TSVECTOR}))')
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS patients_notes_fts USING fts5("
+            "diagnosis, tindakan, content='patients', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute("INSERT INTO patients_notes_fts(patients_notes_fts) VALUES ('rebuild')")
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_notes_fts_ai AFTER INSERT ON patients BEGIN "
+            "INSERT INTO patients_notes_fts(rowid, diagnosis, tindakan) "
+            "VALUES (new.id, new.diagnosis, new.tindakan); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_notes_fts_ad AFTER DELETE ON patients BEGIN "
+            "INSERT INTO patients_notes_fts(patients_notes_fts, rowid, diagnosis, tindakan) "
+            "VALUES ('delete', old.id, old.diagnosis, old.tindakan); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_notes_fts_au AFTER UPDATE OF diagnosis, tindakan ON patients BEGIN "
+            "INSERT INTO patients_notes_fts(patients_notes_fts, rowid, diagnosis, tindakan) "
+            "VALUES ('delete', old.id, old.diagnosis, old.tindakan); "
+            "INSERT INTO patients_notes_fts(rowid, diagnosis, tindakan) "
+            "VALUES (new.id, new.diagnosis, new.tindakan); END"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_patients_notes_tsv')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS patients_notes_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS patients_notes_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS patients_notes_fts_ai')
+        op.execute('DROP TABLE IF EXISTS patients_notes_fts')
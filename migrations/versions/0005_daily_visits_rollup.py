@@ -0,0 +1,55 @@
+"""daily_visits rollup tables for reports
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 18:00:00.000000
+
+Visit counts per visit day, doctor and diagnosis (daily_visits) and per
+visit day, doctor and 5-year age band at the visit (daily_visit_ages), kept
+in step with patients by rollup.py. On SQLite both are WITHOUT ROWID
+tables, stored in key order. They are created empty; the app fills empty
+rollups from patients at startup, or run ``python rollup.py`` to (re)build
+them by hand. Databases where an earlier Base.metadata.create_all() already
+made the tables keep them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'daily_visits' not in tables:
+        op.create_table(
+            'daily_visits',
+            sa.Column('tanggal_kunjungan', sa.Date(), nullable=False),
+            sa.Column('dokter', sa.String(length=100), nullable=False),
+            sa.Column('diagnosis', sa.Text(), nullable=False),
+            sa.Column('visits', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('tanggal_kunjungan', 'dokter', 'diagnosis'),
+            sqlite_with_rowid=False
+        )
+    if 'daily_visit_ages' not in tables:
+        op.create_table(
+            'daily_visit_ages',
+            sa.Column('tanggal_kunjungan', sa.Date(), nullable=False),
+            sa.Column('dokter', sa.String(length=100), nullable=False),
+            sa.Column('age_band', sa.Integer(), nullable=False),
+            sa.Column('visits', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('tanggal_kunjungan', 'dokter', 'age_band'),
+            sqlite_with_rowid=False
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_visit_ages')
+    op.drop_table('daily_visits')
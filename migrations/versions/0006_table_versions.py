@@ -0,0 +1,68 @@
+"""patients table version row, bumped by triggers
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:00:00.000000
+
+ETags and the export cache used to fingerprint patients with count(id)
+and max(created_at), which scan the whole table on every conditional
+request. Instead, table_versions holds a counter and a timestamp for
+patients that triggers bump in the same transaction as each write, so
+the fingerprint is a primary-key lookup and can never be seen ahead of
+the data it describes. SQLite only has row-level triggers, so there the
+counter moves once per row written; Postgres bumps it once per statement.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BUMP = "UPDATE table_versions SET version = version + 1, changed_at = {now} WHERE name = 'patients'"
+
+
+def upgrade() -> None:
+    if 'table_versions' not in sa.inspect(op.get_bind()).get_table_names():
+        table_versions = op.create_table(
+            'table_versions',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('version', sa.BigInteger(), nullable=False),
+            sa.Column('changed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('name')
+        )
+        op.execute(table_versions.insert().values(name='patients', version=0, changed_at=sa.func.now()))
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            "CREATE OR REPLACE FUNCTION bump_patients_version() RETURNS trigger LANGUAGE plpgsql AS $$ "
+            f"BEGIN {BUMP.format(now='now()')}; RETURN NULL; END $$"
+        )
+        op.execute('DROP TRIGGER IF EXISTS patients_version ON patients')
+        op.execute(
+            'CREATE TRIGGER patients_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON patients '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_patients_version()'
+        )
+    elif dialect == 'sqlite':
+        for suffix, event in (('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE')):
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS patients_version_{suffix} AFTER {event} ON patients BEGIN "
+                f"{BUMP.format(now='CURRENT_TIMESTAMP')}; END"
+            )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP TRIGGER IF EXISTS patients_version ON patients')
+        op.execute('DROP FUNCTION IF EXISTS bump_patients_version()')
+    elif dialect == 'sqlite':
+        for suffix in ('ai', 'au', 'ad'):
+            op.execute(f'DROP TRIGGER IF EXISTS patients_version_{suffix}')
+    op.drop_table('table_versions')
@@ -0,0 +1,29 @@
+"""drop the patients.updated_at index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 12:00:00.000000
+
+0003 indexed updated_at so the table version could be read as
+max(updated_at). Since 0006 the version comes from the table_versions
+row, nothing searches or orders by updated_at, and the index only adds
+work to every edit.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_patients_updated_at', table_name='patients', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_patients_updated_at', 'patients', ['updated_at'], if_not_exists=True)
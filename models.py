@@ -1,7 +1,12 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Text
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, Integer, String, Date, DateTime, Text
 from sqlalchemy.sql import func
 from database import Base
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Patient(Base):
     __tablename__ = "patients"
     
@@ -13,7 +18,39 @@ class Patient(Base):
     tindakan = Column(Text)
     dokter = Column(String(100))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set in Python: SQLite's CURRENT_TIMESTAMP has one-second resolution,
+    # and two edits in the same second must still change the table version
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow)
+    
+    # Indexes live in the migrations, which own the schema (see migrate.py):
+    # composite b-trees ending in id, so keyset pagination (value, id) is one
+    # range scan (0002), and trigram / full-text indexes for name and
+    # note search (0002, 0004; FTS5 on SQLite, pg_trgm / tsvector on Postgres).
+
+class DailyVisit(Base):
+    __tablename__ = "daily_visits"
+    
+    # Visit counts per day, doctor and diagnosis, kept in step with patients
+    # by rollup.py. The key can't hold NULLs, so a missing doctor or
+    # diagnosis is stored as ''. The key leads with the day, so every
+    # report is a range scan over the rollup.
+    tanggal_kunjungan = Column(Date, primary_key=True)
+    dokter = Column(String(100), primary_key=True)
+    diagnosis = Column(Text, primary_key=True)
+    visits = Column(Integer, nullable=False)
+    # Created by migration 0005 only; on SQLite as a WITHOUT ROWID table,
+    # stored in key order, so a date range is one sequential read
+
+class DailyVisitAge(Base):
+    __tablename__ = "daily_visit_ages"
+    
+    # Companion to daily_visits for the age histograms: visit counts per
+    # day, doctor and age at the visit. A separate table because adding the
+    # age band to the daily_visits key would leave about one row per visit.
+    tanggal_kunjungan = Column(Date, primary_key=True)
+    dokter = Column(String(100), primary_key=True)
+    age_band = Column(Integer, primary_key=True)  # first year of an AGE_BAND_YEARS-wide band
+    visits = Column(Integer, nullable=False)
 
 class User(Base):
     __tablename__ = "users"
@@ -23,3 +60,38 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     role = Column(String(20), default="admin")  # admin, dokter
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(String(36), primary_key=True)
+    kind = Column(String(20), nullable=False)  # export, import
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    processed = Column(Integer, default=0)
+    total = Column(Integer)
+    result = Column(Text)  # JSON-encoded job output
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+class ExportArtifact(Base):
+    __tablename__ = "export_artifacts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    format = Column(String(10), nullable=False)
+    data_version = Column(String(64), nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    
+    # One row per tracked table, bumped by triggers (migration 0006) in the
+    # same transaction as every insert, update and delete on it. Reading it
+    # is how ETags and the export cache tell whether the table changed.
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(DateTime(timezone=True))
@@ -0,0 +1,342 @@
+import bisect
+import itertools
+import logging
+import re
+import threading
+import time
+import unicodedata
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models import Patient
+
+logger = logging.getLogger(__name__)
+
+APOSTROPHES = re.compile("['\u2019`]")
+COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+SEPARATORS = re.compile(r"[\W_]+")
+# Sorts after every folded word, so [prefix, prefix + WORD_END) is a prefix range
+WORD_END = "\U0010ffff"
+# Between a folded name and its id in NameIndex.names; sorts before the space
+# so "siti" comes before "siti aminah"
+KEY_SEPARATOR = "\x00"
+
+# Shorter terms must match exactly; longer ones may carry one typo. As in
+# most spellers the first letter is trusted, which keeps the variants few.
+FUZZY_MIN_LENGTH = 4
+# Batches larger than this are merged into the sorted names in one sort
+# instead of one insort each
+MERGE_THRESHOLD = 64
+# Above this many ids even the rarest term is too common to materialize;
+# its candidates are checked one by one until enough match
+UNION_LIMIT = 50_000
+# Checking one candidate's name against the remaining terms, in units of
+# one set-membership probe; picks between intersecting and checking
+VERIFY_COST = 10
+# Matches anywhere in a name are ranked from a sample this large
+RANK_POOL = 200
+
+
+def fold(text: str) -> Tuple[str, ...]:
+    """Case- and accent-folded words: "Siti Nur'aini Ölç" -> ("siti", "nuraini", "olc")"""
+    if text.isascii() and text.replace(" ", "").isalnum():
+        # Most names: plain letters and spaces
+        return tuple(text.lower().split())
+    text = text.casefold()
+    if not text.isascii():
+        text = COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text))
+    return tuple(SEPARATORS.sub(" ", APOSTROPHES.sub("", text)).split())
+
+
+def name_key(words: Tuple[str, ...], patient_id: int) -> str:
+    return " ".join(words) + KEY_SEPARATOR + str(patient_id)
+
+
+def name_words(key: str) -> List[str]:
+    return key.partition(KEY_SEPARATOR)[0].split()
+
+
+class NameIndex:
+    """Patient names indexed for prefix and typo-tolerant lookups.
+
+    ``names`` holds every folded name (suffixed with its id) in sorted
+    order, so names starting with what was typed are one bisection away.
+    ``postings`` maps each folded word to the set of ids whose name contains
+    it and ``words`` keeps those words sorted, so a word prefix is also one
+    contiguous range; matches anywhere in a name come from intersecting
+    those sets. Not thread-safe; see LiveNameIndex.
+    """
+
+    def __init__(self):
+        # id -> (nama, tanggal_lahir, key); key is the same string as in names
+        self.records: Dict[int, Tuple[str, date, str]] = {}
+        self.names: List[str] = []
+        self.postings: Dict[str, Set[int]] = {}
+        self.words: List[str] = []
+        self.alphabet: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add_many(self, rows: Iterable) -> None:
+        """Insert or replace (id, nama, tanggal_lahir) rows"""
+        records, postings = self.records, self.postings
+        keys, new_words = [], False
+        for patient_id, nama, tanggal_lahir in rows:
+            if patient_id in records:
+                self.remove(patient_id)
+            words = fold(nama)
+            key = name_key(words, patient_id)
+            records[patient_id] = (nama, tanggal_lahir, key)
+            keys.append(key)
+            for word in words:
+                ids = postings.get(word)
+                if ids is None:
+                    ids = postings[word] = set()
+                    new_words = True
+                ids.add(patient_id)
+        if len(keys) > MERGE_THRESHOLD:
+            # Timsort merges the sorted list and the new run in one pass
+            self.names.extend(keys)
+            self.names.sort()
+        else:
+            for key in keys:
+                bisect.insort(self.names, key)
+        if new_words:
+            self.words = sorted(postings)
+            self.alphabet = set("".join(self.words))
+
+    def add(self, patient_id: int, nama: str, tanggal_lahir: date) -> None:
+        self.add_many([(patient_id, nama, tanggal_lahir)])
+
+    def remove(self, patient_id: int) -> None:
+        record = self.records.pop(patient_id, None)
+        if record is None:
+            return
+        key = record[2]
+        del self.names[bisect.bisect_left(self.names, key)]
+        for word in set(name_words(key)):
+            ids = self.postings[word]
+            ids.discard(patient_id)
+            if not ids:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+
+    def prefixed(self, prefix: str) -> List[str]:
+        lo = bisect.bisect_left(self.words, prefix)
+        return self.words[lo:bisect.bisect_left(self.words, prefix + WORD_END, lo)]
+
+    def near(self, term: str) -> List[str]:
+        """Words starting with something one edit away from ``term``.
+
+        Each variant (a dropped, swapped, replaced or missing character after
+        the first) is looked up as a prefix, so a typo early in a half-typed
+        word still finds its completions.
+        """
+        variants = {term[:-1]}
+        for i in range(1, len(term)):
+            variants.add(term[:i] + term[i + 1:])
+            if i < len(term) - 1:
+                variants.add(term[:i] + term[i + 1] + term[i] + term[i + 2:])
+            for char in self.alphabet:
+                variants.add(term[:i] + char + term[i:])
+                if i < len(term) - 1:
+                    variants.add(term[:i] + char + term[i + 1:])
+        words = set()
+        for variant in variants:
+            words.update(self.prefixed(variant))
+        return sorted(words)
+
+    def leading(self, terms: Tuple[str, ...], limit: int) -> List[int]:
+        """Ids of names starting with the query, alphabetically"""
+        query = " ".join(terms)
+        start = bisect.bisect_left(self.names, query)
+        ids = []
+        for key in self.names[start:start + limit]:
+            if not key.startswith(query):
+                break
+            ids.append(int(key.rsplit(KEY_SEPARATOR, 1)[1]))
+        return ids
+
+    def anywhere(self, terms: Tuple[str, ...], limit: int, fuzzy: bool, exclude: Set[int]) -> List[int]:
+        """Ids of names with a word matching every term, in any position"""
+        groups = []
+        for term in terms:
+            words, near = self.prefixed(term), None
+            if fuzzy and len(term) >= FUZZY_MIN_LENGTH:
+                near = set(self.near(term)).difference(words)
+                words = words + sorted(near)
+            if not words:
+                return []
+            groups.append((sum(len(self.postings[word]) for word in words), term, words, near))
+        groups.sort(key=lambda group: group[0])
+
+        # Start from a whole word's own set where there is one (no copy), or
+        # else the rarest term's union; every later step only shrinks it
+        base = next((group for group in groups if len(group[2]) == 1), groups[0])
+        # Whole words next: one intersection each, and it shrinks the set
+        # before the prefix ranges, which cost one intersection per word
+        rest = sorted((group for group in groups if group is not base), key=lambda group: (len(group[2]) > 1, group[0]))
+        size, _, words, _ = base
+        if len(words) > 1 and size > UNION_LIMIT:
+            # Only short, common prefixes: matches are dense, so the first
+            # few candidates that pass the other terms are enough
+            ids = itertools.chain.from_iterable(self.postings[word] for word in words)
+            ids = self.verified((patient_id for patient_id in ids if patient_id not in exclude), rest)
+            return self.ranked(itertools.islice(ids, limit), limit)
+
+        ids = self.postings[words[0]] if len(words) == 1 else set().union(*(self.postings[word] for word in words))
+        for i, (size, _, words, _) in enumerate(rest):
+            # Intersecting touches the smaller side of every word's set;
+            # checking names costs a few string searches per candidate
+            if len(ids) * VERIFY_COST < min(size, len(ids) * len(words)):
+                ids = set(self.verified(ids, rest[i:]))
+                break
+            ids = set().union(*(ids.intersection(self.postings[word]) for word in words))
+        return self.ranked(itertools.islice((patient_id for patient_id in ids if patient_id not in exclude), RANK_POOL), limit)
+
+    def verified(self, ids: Iterable[int], groups: list) -> Iterator[int]:
+        """Ids whose name also has a word matching each group's term"""
+        # " term" in a key finds the term at the start of any later word
+        checks = [(term, " " + term, near) for _, term, _, near in groups]
+        records = self.records
+        for patient_id in ids:
+            key = records[patient_id][2]
+            if all(
+                key.startswith(term) or spaced in key or (near and not near.isdisjoint(name_words(key)))
+                for term, spaced, near in checks
+            ):
+                yield patient_id
+
+    def ranked(self, ids: Iterable[int], limit: int) -> List[int]:
+        # Keys sort by folded name, then id
+        return sorted(ids, key=lambda patient_id: self.records[patient_id][2])[:limit]
+
+    def lookup(self, q: str, limit: int = 10) -> List[dict]:
+        """Up to ``limit`` names matching every word of ``q`` as a prefix.
+
+        Names that start with the query come first, then names matching it
+        in any word order. Only when nothing matches exactly may terms of
+        FUZZY_MIN_LENGTH or more characters carry one typo.
+        """
+        terms = fold(q)
+        if not terms or not self.records:
+            return []
+        ids = self.leading(terms, limit)
+        if len(ids) < limit:
+            ids += self.anywhere(terms, limit - len(ids), False, set(ids))
+        if not ids and any(len(term) >= FUZZY_MIN_LENGTH for term in terms):
+            ids = self.anywhere(terms, limit, True, set())
+        return [
+            {"id": patient_id, "nama": self.records[patient_id][0], "tanggal_lahir": self.records[patient_id][1]}
+            for patient_id in ids
+        ]
+
+
+class LiveNameIndex:
+    """The process-wide NameIndex, built in the background and kept current by the write paths.
+
+    Lookups answer None until the first build finishes, so callers can fall
+    back to the database. Writes that land while a rebuild reads the table
+    are replayed onto the new index before it is swapped in. The index is
+    rebuilt after NAME_INDEX_REBUILD_SECONDS to pick up writes made by other
+    worker processes.
+    """
+
+    def __init__(self, rebuild_seconds: int):
+        self.rebuild_seconds = rebuild_seconds
+        self.lock = threading.RLock()
+        self.index: Optional[NameIndex] = None
+        self.built_at = 0.0
+        self.building = False
+        self.pending = []
+
+    def rebuild(self) -> None:
+        with self.lock:
+            self.pending = []
+        started = time.perf_counter()
+        index = NameIndex()
+        db = SessionLocal()
+        try:
+            index.add_many(db.execute(
+                select(Patient.id, Patient.nama, Patient.tanggal_lahir).execution_options(yield_per=10000)
+            ))
+        finally:
+            db.close()
+        with self.lock:
+            # Last write per id wins; a None name marks a delete
+            latest = {patient_id: (nama, tanggal_lahir) for patient_id, nama, tanggal_lahir in self.pending}
+            for patient_id, (nama, _) in latest.items():
+                if nama is None:
+                    index.remove(patient_id)
+            index.add_many((patient_id, *row) for patient_id, row in latest.items() if row[0] is not None)
+            self.index, self.pending = index, []
+            self.built_at = time.monotonic()
+        logger.info("name index: %d names in %.1f s", len(index), time.perf_counter() - started)
+
+    def rebuild_in_background(self) -> None:
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        threading.Thread(target=self.run_rebuild, name="name-index", daemon=True).start()
+
+    def run_rebuild(self) -> None:
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("name index rebuild failed")
+        finally:
+            with self.lock:
+                self.building = False
+
+    def lookup(self, q: str, limit: int = 10) -> Optional[List[dict]]:
+        with self.lock:
+            if self.index is not None and time.monotonic() - self.built_at > self.rebuild_seconds:
+                self.rebuild_in_background()
+            if self.index is None:
+                return None
+            return self.index.lookup(q, limit)
+
+    def add(self, patient_id: int, nama: str, tanggal_lahir: date) -> None:
+        with self.lock:
+            if self.building:
+                self.pending.append((patient_id, nama, tanggal_lahir))
+            if self.index is not None:
+                self.index.add(patient_id, nama, tanggal_lahir)
+
+    def add_patient(self, patient) -> None:
+        self.add(patient.id, patient.nama, patient.tanggal_lahir)
+
+    def add_rows(self, rows: Iterable) -> None:
+        """Insert or replace rows with id, nama and tanggal_lahir"""
+        rows = [(row.id, row.nama, row.tanggal_lahir) for row in rows]
+        with self.lock:
+            if self.building:
+                self.pending.extend(rows)
+            if self.index is not None:
+                self.index.add_many(rows)
+
+    def add_since(self, db: Session, after_id: int) -> None:
+        """Index rows inserted with ids above ``after_id``, e.g. by a bulk import"""
+        if self.index is None and not self.building:
+            return
+        self.add_rows(db.execute(
+            select(Patient.id, Patient.nama, Patient.tanggal_lahir).where(Patient.id > after_id)
+        ))
+
+    def remove(self, *patient_ids: int) -> None:
+        with self.lock:
+            for patient_id in patient_ids:
+                if self.building:
+                    self.pending.append((patient_id, None, None))
+                if self.index is not None:
+                    self.index.remove(patient_id)
+
+
+name_index = LiveNameIndex(settings.NAME_INDEX_REBUILD_SECONDS)
@@ -0,0 +1,189 @@
+import base64
+import json
+from datetime import date
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+from models import Patient
+
+# Whitelisted sort keys. Every key is paired with Patient.id as a tie-breaker
+# so the (value, id) pair is unique and can be used as a keyset cursor.
+SORT_COLUMNS = {
+    "id": Patient.id,
+    "tanggal_kunjungan": Patient.tanggal_kunjungan,
+    "tanggal_lahir": Patient.tanggal_lahir,
+    "nama": Patient.nama,
+}
+
+DATE_SORT_KEYS = {"tanggal_kunjungan", "tanggal_lahir"}
+# JSON type of each sort key's cursor value (dates travel as ISO strings)
+CURSOR_VALUE_TYPES = {
+    "id": int,
+    "tanggal_kunjungan": str,
+    "tanggal_lahir": str,
+    "nama": str,
+}
+# Cursor ids and id values must fit the BIGINT the database binds them as
+MAX_CURSOR_ID = 2 ** 63 - 1
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Split "-tanggal_kunjungan" into ("tanggal_kunjungan", True)"""
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in SORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort key '{key}'. Allowed: {', '.join(SORT_COLUMNS)}"
+        )
+    return key, descending
+
+
+def encode_cursor(sort: str, row: Patient, direction: str) -> str:
+    key, _ = parse_sort(sort)
+    value = getattr(row, key)
+    if isinstance(value, date):
+        value = value.isoformat()
+    payload = {"s": sort, "v": value, "id": row.id, "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[object, int, str]:
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id, direction = payload["v"], payload["id"], payload["d"]
+        cursor_sort = payload["s"]
+    except Exception:
+        raise invalid
+    if cursor_sort != sort or direction not in ("next", "prev"):
+        raise invalid
+    key, _ = parse_sort(sort)
+    # A crafted cursor must fail here, not as a 500 when its value is bound
+    # (type() rather than isinstance(), which would let True pass as an int)
+    if type(last_id) is not int or type(value) is not CURSOR_VALUE_TYPES[key]:
+        raise invalid
+    if not 0 <= last_id <= MAX_CURSOR_ID or (key == "id" and not 0 <= value <= MAX_CURSOR_ID):
+        raise invalid
+    if isinstance(value, str) and not value.isascii():
+        try:
+            # JSON allows lone surrogates, which no driver can encode
+            value.encode("utf-8")
+        except UnicodeEncodeError:
+            raise invalid
+    if key in DATE_SORT_KEYS:
+        try:
+            value = date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise invalid
+    return value, last_id, direction
+
+
+def page_statement(query, sort: str, cursor: Optional[str], limit: int):
+    """Add the keyset predicate, ordering and limit to a Query or Select.
+
+    Returns (statement, direction). Each page is a single indexed range scan
+    of ``limit + 1`` rows, so deep pages cost the same as the first.
+    """
+    key, descending = parse_sort(sort)
+    column = SORT_COLUMNS[key]
+
+    direction = "next"
+    if cursor:
+        value, last_id, direction = decode_cursor(cursor, sort)
+        # "after" in the requested order for next pages, "before" for prev pages
+        forward = (direction == "next") != descending
+        # Row-value comparison so the (column, id) index can seek straight to the cursor
+        if key == "id":
+            condition = Patient.id > last_id if forward else Patient.id < last_id
+        elif forward:
+            condition = tuple_(column, Patient.id) > tuple_(value, last_id)
+        else:
+            condition = tuple_(column, Patient.id) < tuple_(value, last_id)
+        query = query.filter(condition)
+
+    # Walking backwards means scanning in the reverse of the requested order
+    scan_descending = descending if direction == "next" else not descending
+    if scan_descending:
+        order = [column.desc(), Patient.id.desc()]
+    else:
+        order = [column.asc(), Patient.id.asc()]
+    if key == "id":
+        order = order[1:]
+
+    return query.order_by(*order).limit(limit + 1), direction
+
+
+def page_result(
+    rows: list,
+    sort: str,
+    cursor: Optional[str],
+    direction: str,
+    limit: int
+) -> Tuple[List[Patient], Optional[str], Optional[str]]:
+    """Trim the extra look-ahead row and build (rows, next_cursor, prev_cursor)"""
+    has_more = len(rows) > limit
+    rows = list(rows[:limit])
+    if direction == "prev":
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if (direction == "next" and has_more) or (direction == "prev" and cursor):
+            next_cursor = encode_cursor(sort, rows[-1], "next")
+        if (direction == "next" and cursor) or (direction == "prev" and has_more):
+            prev_cursor = encode_cursor(sort, rows[0], "prev")
+    return rows, next_cursor, prev_cursor
+
+
+def paginate(
+    query: Query,
+    sort: str = "-id",
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[Patient], Optional[str], Optional[str]]:
+    """Keyset pagination over a sync Patient query; returns (rows, next_cursor, prev_cursor)"""
+    query, direction = page_statement(query, sort, cursor, limit)
+    return page_result(query.all(), sort, cursor, direction, limit)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    sort: str = "-id",
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[list, Optional[str], Optional[str]]:
+    """paginate() for an AsyncSession and a select() of Patient columns; returns Rows"""
+    stmt, direction = page_statement(stmt, sort, cursor, limit)
+    rows = (await db.execute(stmt)).all()
+    return page_result(rows, sort, cursor, direction, limit)
+
+
+def page_link(request: Request, cursor: Optional[str]) -> Optional[str]:
+    """Relative URL for the same view with ``cursor`` swapped in"""
+    if not cursor:
+        return None
+    url = request.url.include_query_params(cursor=cursor)
+    return f"{url.path}?{url.query}"
+
+
+def cursor_headers(request: Request, next_cursor: Optional[str], prev_cursor: Optional[str] = None) -> dict:
+    """X-Next-Cursor / X-Prev-Cursor and an RFC 8288 Link header for JSON lists"""
+    headers = {}
+    links = []
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+        links.append(f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"')
+    if prev_cursor:
+        headers["X-Prev-Cursor"] = prev_cursor
+        links.append(f'<{request.url.include_query_params(cursor=prev_cursor)}>; rel="prev"')
+    if links:
+        headers["Link"] = ", ".join(links)
+    return headers
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from config import settings
+from models import Patient
+
+
+class PatientCache:
+    """LRU of patient id -> (expires_at, body, headers, last_modified) for GET /api/patients/{id}.
+
+    Entries hold the encoded JSON and its validators, so a hit costs neither
+    a query nor serialization. Writes in this process drop the entry on
+    flush and again on commit; the TTL bounds staleness from writes made by
+    other processes.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Bumped by every invalidation; a read that raced a write must not
+        # put the row it loaded before the write
+        self.generation = 0
+
+    def get(self, patient_id: int) -> Optional[Tuple[bytes, dict, Optional[datetime]]]:
+        with self.lock:
+            entry = self.entries.get(patient_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[patient_id]
+                return None
+            self.entries.move_to_end(patient_id)
+        return entry[1:]
+
+    def put(
+        self,
+        patient_id: int,
+        body: bytes,
+        headers: dict,
+        last_modified: Optional[datetime],
+        generation: int
+    ) -> None:
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[patient_id] = (time.monotonic() + self.ttl_seconds, body, headers, last_modified)
+            self.entries.move_to_end(patient_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, *patient_ids: int) -> None:
+        with self.lock:
+            self.generation += 1
+            for patient_id in patient_ids:
+                self.entries.pop(patient_id, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+patient_cache = PatientCache(settings.PATIENT_CACHE_MAX_ENTRIES, settings.PATIENT_CACHE_TTL_SECONDS)
+
+@event.listens_for(Patient, "after_update")
+@event.listens_for(Patient, "after_delete")
+def invalidate_cached_patient(mapper, connection, target):
+    patient_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("patient_ids", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_patients(session):
+    # Again after commit: a reader between flush and commit saw the old row
+    patient_ids = session.info.pop("patient_ids", None)
+    if patient_ids:
+        patient_cache.invalidate(*patient_ids)
+
+@event.listens_for(Session, "after_rollback")
+def discard_rolled_back_patients(session):
+    session.info.pop("patient_ids", None)
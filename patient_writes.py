@@ -0,0 +1,197 @@
+from datetime import datetime
+from typing import Iterator, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from filters import apply_patient_filters
+from models import Patient, utcnow
+from name_index import name_index
+from patient_cache import patient_cache
+from rollup import update_rollup
+from schemas import BulkDelete, BulkUpdate
+from serializers import PATIENT_COLUMNS
+from stats import StatsDelta, stats_cache
+
+# NOT NULL columns a partial update may set but never clear
+REQUIRED_COLUMNS = ("nama", "tanggal_lahir", "tanggal_kunjungan")
+# Columns the dashboard statistics and the reporting rollups are grouped by
+STATS_COLUMNS = ("tanggal_kunjungan", "tanggal_lahir", "dokter", "diagnosis")
+# Columns shown by the autocomplete name index
+NAME_COLUMNS = ("nama", "tanggal_lahir")
+# Ids bound per IN (...) list, well under SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 5000
+
+
+def check_changes(changes: dict) -> None:
+    if not changes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update")
+    for column in REQUIRED_COLUMNS:
+        if column in changes and changes[column] is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"'{column}' cannot be null")
+
+
+async def lock_for_write(db: AsyncSession, whole_table: bool = False) -> None:
+    """Start the transaction holding the write lock, before reading values it will overwrite.
+
+    A plain SQLite read takes no lock, so another writer could commit
+    between it and the UPDATE (or, in WAL mode, fail the UPDATE with
+    SQLITE_BUSY_SNAPSHOT); BEGIN IMMEDIATE waits for the lock up front.
+    Postgres callers lock just their rows with SELECT ... FOR UPDATE, or
+    with ``whole_table`` keep other writers out of patients (readers still
+    pass) where the read is an aggregate, which can't be FOR UPDATE.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        await db.execute(text("BEGIN IMMEDIATE"))
+    elif whole_table and dialect == "postgresql":
+        await db.execute(text("LOCK TABLE patients IN SHARE ROW EXCLUSIVE MODE"))
+
+
+async def patch_patient(
+    db: AsyncSession,
+    patient_id: int,
+    changes: dict,
+    check_version: bool = False,
+    expected_updated_at: Optional[datetime] = None
+):
+    """Write only ``changes`` with one ``UPDATE ... WHERE id = ? RETURNING``.
+
+    With ``check_version`` the WHERE clause also requires updated_at to
+    still equal ``expected_updated_at`` (NULL for a never-edited row), so a
+    concurrent edit makes this one fail with 412 instead of being silently
+    overwritten. Returns the updated row.
+    """
+    check_changes(changes)
+    stmt = update(Patient).where(Patient.id == patient_id)
+    if check_version:
+        stmt = stmt.where(
+            Patient.updated_at.is_(None) if expected_updated_at is None
+            else Patient.updated_at == expected_updated_at
+        )
+
+    # RETURNING only sees the new values; the stats delta also needs the old
+    # ones, so read them first (under the write lock, so they can't go stale
+    # before the UPDATE), but only when a grouped column changes
+    old = None
+    if any(column in changes for column in STATS_COLUMNS):
+        await lock_for_write(db)
+        old = (await db.execute(
+            select(Patient.tanggal_kunjungan, Patient.tanggal_lahir, Patient.dokter, Patient.diagnosis)
+            .where(Patient.id == patient_id)
+            .with_for_update()
+        )).first()
+
+    row = (await db.execute(
+        stmt.values(**changes, updated_at=utcnow())
+        .returning(*PATIENT_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if row is None:
+        await db.rollback()
+        if await db.scalar(select(Patient.id).where(Patient.id == patient_id)) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Patient was changed by someone else; reload it and retry"
+        )
+    delta = StatsDelta()
+    if old is not None:
+        delta.add(*old, sign=-1)
+        delta.add_patient(row)
+        await db.run_sync(update_rollup, delta)
+    await db.commit()
+
+    # Core UPDATEs bypass the mapper events that normally evict the record
+    patient_cache.invalidate(patient_id)
+    if any(column in changes for column in NAME_COLUMNS):
+        name_index.add_patient(row)
+    stats_cache.apply(delta)
+    return row
+
+
+def selection_filters(selection: BulkDelete) -> Optional[dict]:
+    """Validate a bulk selection; returns the filter criteria, or None for an id list"""
+    if (selection.ids is None) == (selection.filter is None):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pass exactly one of 'ids' or 'filter'")
+    if selection.ids is not None:
+        return None
+    criteria = {key: value for key, value in selection.filter.model_dump().items() if value}
+    if not criteria:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="An empty filter would match every patient"
+        )
+    return criteria
+
+
+def selected(db: AsyncSession, stmt, selection: BulkDelete) -> Iterator:
+    """Restrict an UPDATE/DELETE to the selection: one statement per id chunk, or one filtered statement"""
+    criteria = selection_filters(selection)
+    if criteria is not None:
+        yield apply_patient_filters(stmt, **criteria, bind=db.get_bind())
+        return
+    ids = sorted(set(selection.ids))
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield stmt.where(Patient.id.in_(ids[start:start + ID_CHUNK_SIZE]))
+
+
+async def bulk_update(db: AsyncSession, selection: BulkUpdate) -> int:
+    """Apply the same changes to every selected patient in one transaction; returns the row count"""
+    changes = selection.changes.model_dump(exclude_unset=True)
+    check_changes(changes)
+    stats_columns = [Patient.__table__.c[column] for column in STATS_COLUMNS]
+    stmt = (
+        update(Patient)
+        .values(**changes, updated_at=utcnow())
+        .returning(Patient.id, Patient.nama, *stats_columns)
+        .execution_options(synchronize_session=False)
+    )
+    regrouped = any(column in changes for column in STATS_COLUMNS)
+    delta = StatsDelta()
+    if regrouped:
+        # Rows move between groups: take them out of their old ones first,
+        # counted per group rather than per row, under the write lock
+        await lock_for_write(db, whole_table=True)
+        groups = select(*stats_columns, func.count()).group_by(*stats_columns)
+        for chunk in selected(db, groups, selection):
+            for *group, count in (await db.execute(chunk)).all():
+                delta.add(*group, sign=-count)
+    rows = []
+    for chunk in selected(db, stmt, selection):
+        rows.extend((await db.execute(chunk)).all())
+    if regrouped:
+        for row in rows:
+            delta.add(row.tanggal_kunjungan, row.tanggal_lahir, row.dokter, row.diagnosis)
+    await db.run_sync(update_rollup, delta)
+    await db.commit()
+
+    patient_cache.invalidate(*(row.id for row in rows))
+    if any(column in changes for column in NAME_COLUMNS):
+        name_index.add_rows(rows)
+    stats_cache.apply(delta)
+    return len(rows)
+
+
+async def bulk_delete(db: AsyncSession, selection: BulkDelete) -> int:
+    """Delete every selected patient in one transaction; returns the row count"""
+    stmt = (
+        delete(Patient)
+        .returning(Patient.id, Patient.tanggal_kunjungan, Patient.tanggal_lahir, Patient.dokter, Patient.diagnosis)
+        .execution_options(synchronize_session=False)
+    )
+    rows = []
+    for chunk in selected(db, stmt, selection):
+        rows.extend((await db.execute(chunk)).all())
+    # DELETE ... RETURNING hands back the old values, so the stats stay exact
+    delta = StatsDelta()
+    for row in rows:
+        delta.add(row.tanggal_kunjungan, row.tanggal_lahir, row.dokter, row.diagnosis, sign=-1)
+    await db.run_sync(update_rollup, delta)
+    await db.commit()
+
+    patient_cache.invalidate(*(row.id for row in rows))
+    name_index.remove(*(row.id for row in rows))
+    stats_cache.apply(delta)
+    return len(rows)
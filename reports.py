@@ -0,0 +1,133 @@
+from collections import Counter
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from filters import escape_like
+from models import DailyVisit, DailyVisitAge
+from stats import AGE_BAND_YEARS
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+# period -> (first day of the period holding a date, first day of the next period)
+PERIODS = {
+    "day": (lambda day: day, lambda start: start + timedelta(days=1)),
+    "week": (lambda day: day - timedelta(days=day.weekday()), lambda start: start + timedelta(weeks=1)),
+    "month": (lambda day: day.replace(day=1), next_month),
+    "year": (lambda day: day.replace(month=1, day=1), lambda start: start.replace(year=start.year + 1)),
+}
+
+
+def check_period(period: str) -> None:
+    if period not in PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported period '{period}'. Allowed: {', '.join(PERIODS)}"
+        )
+
+
+def apply_rollup_filters(
+    query,
+    rollup=DailyVisit,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    dokter: Optional[str] = None,
+    diagnosis: Optional[str] = None
+):
+    """The dashboard filters (filters.apply_patient_filters) against a rollup table instead of patients"""
+    if date_from:
+        query = query.where(rollup.tanggal_kunjungan >= date_from)
+    if date_to:
+        query = query.where(rollup.tanggal_kunjungan <= date_to)
+    if dokter:
+        query = query.where(rollup.dokter == dokter.strip())
+    if diagnosis:
+        query = query.where(rollup.diagnosis.ilike(f"%{escape_like(diagnosis.strip())}%", escape="\\"))
+    return query
+
+
+def visits_per_period(db: Session, period: str = "month", **filters) -> dict:
+    """Visit counts per day, week (from Monday), month or year, oldest first.
+
+    Periods without visits between the first and last one (or the
+    requested date range, clamped to the days the rollup holds) are
+    listed with a count of 0.
+    """
+    check_period(period)
+    start_of, next_start = PERIODS[period]
+    rows = db.execute(apply_rollup_filters(
+        select(DailyVisit.tanggal_kunjungan, func.sum(DailyVisit.visits))
+        .group_by(DailyVisit.tanggal_kunjungan),
+        **filters
+    ))
+    counts = Counter()
+    for day, visits in rows:
+        counts[start_of(day)] += visits
+
+    series = []
+    if counts:
+        # A range reaching past the stored visits (date_from=0001-01-01)
+        # would otherwise list every empty period in it
+        first_day, last_day = db.execute(
+            select(func.min(DailyVisit.tanggal_kunjungan), func.max(DailyVisit.tanggal_kunjungan))
+        ).one()
+        start = start_of(max(filter(None, (filters.get("date_from"), first_day))))
+        last = start_of(min(filter(None, (filters.get("date_to"), last_day))))
+        while start <= last:
+            series.append({"period_start": start.isoformat(), "visits": counts.get(start, 0)})
+            start = next_start(start)
+    return {"period": period, "total": sum(counts.values()), "visits": series}
+
+
+def visits_per_doctor(db: Session, **filters) -> dict:
+    """Visits and days with visits per doctor, busiest first; visits without a doctor count under null"""
+    # Grouped in key order (day, doctor), which the rollup is stored in, so
+    # the database never sorts; the per-doctor totals are summed here
+    rows = db.execute(apply_rollup_filters(
+        select(DailyVisit.dokter, func.sum(DailyVisit.visits))
+        .group_by(DailyVisit.tanggal_kunjungan, DailyVisit.dokter),
+        **filters
+    ))
+    visits, days = Counter(), Counter()
+    for dokter, count in rows:
+        visits[dokter] += count
+        days[dokter] += 1
+
+    doctors = [
+        {"dokter": dokter or None, "visits": count, "days": days[dokter]}
+        for dokter, count in sorted(visits.items(), key=lambda item: (-item[1], item[0]))
+    ]
+    return {"total": sum(visits.values()), "doctors": doctors}
+
+
+def age_histogram(db: Session, width: int = 10, **filters) -> dict:
+    """Visits per band of age at the visit, ``width`` years wide, youngest first.
+
+    Read from daily_visit_ages, which has no diagnosis, so only the date
+    and doctor filters apply.
+    """
+    if width < AGE_BAND_YEARS or width % AGE_BAND_YEARS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'width' must be a multiple of {AGE_BAND_YEARS} years"
+        )
+    rows = db.execute(apply_rollup_filters(
+        select(DailyVisitAge.age_band, func.sum(DailyVisitAge.visits)).group_by(DailyVisitAge.age_band),
+        DailyVisitAge,
+        **filters
+    ))
+    counts = Counter()
+    for band, visits in rows:
+        counts[band // width * width] += visits
+
+    bands = [
+        {"age_from": start, "age_to": start + width - 1, "visits": counts.get(start, 0)}
+        for start in range(0, max(counts, default=-width) + width, width)
+    ]
+    return {"width": width, "total": sum(counts.values()), "bands": bands}
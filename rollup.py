@@ -0,0 +1,135 @@
+"""Reporting rollups: daily_visits (visits per day, doctor and diagnosis) and
+daily_visit_ages (visits per day, doctor and age band).
+
+Writes keep them current incrementally: each write path builds a StatsDelta
+and calls update_rollup() before committing, so the rollups change in the
+same transaction as the patients they count. recount_visits() rebuilds them
+(or just some days) from the patients table in batch; run this module to
+rebuild everything: python rollup.py
+"""
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import String, delete, select, type_coerce
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models import DailyVisit, DailyVisitAge, Patient
+from stats import StatsDelta
+
+# INSERT ... ON CONFLICT DO UPDATE, spelled the same by both backends
+UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+# Days bound per IN (...) list
+DAY_CHUNK_SIZE = 1000
+
+daily_visits = DailyVisit.__table__
+daily_visit_ages = DailyVisitAge.__table__
+# rollup table -> (its key columns, the StatsDelta counter holding its rows)
+ROLLUPS = {
+    daily_visits: (("tanggal_kunjungan", "dokter", "diagnosis"), "cells"),
+    daily_visit_ages: (("tanggal_kunjungan", "dokter", "age_band"), "ages"),
+}
+
+
+def upsert_counts(connection, table, key_columns, counts) -> None:
+    """Add ``counts`` (key tuple -> visits, day first) to the rollup rows with those keys.
+
+    Like importer.bulk_insert(), the upsert is compiled once and executed
+    with plain parameter tuples, since an import adds a row for nearly
+    every visit it inserts.
+    """
+    dialect = connection.dialect
+    # SQLite stores dates as the ISO strings the counts are keyed by
+    to_day = str if dialect.name == "sqlite" else date.fromisoformat
+    params = [(to_day(day), *rest, visits) for (day, *rest), visits in counts.items() if visits]
+    if not params:
+        return
+
+    columns = [*key_columns, "visits"]
+    stmt = UPSERT_INSERTS[dialect.name](table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={"visits": table.c.visits + stmt.excluded.visits}
+    )
+    compiled = stmt.compile(dialect=dialect, column_keys=columns)
+    # The only bound values are the VALUES list, in ``columns`` order
+    if not compiled.positional:
+        params = [dict(zip(columns, row)) for row in params]
+    connection.exec_driver_sql(compiled.string, params)
+
+    # Rows a delete or an edit emptied
+    emptied = sorted({day for (day, *_), visits in counts.items() if visits < 0})
+    for start in range(0, len(emptied), DAY_CHUNK_SIZE):
+        connection.execute(
+            delete(table)
+            .where(table.c.tanggal_kunjungan.in_([date.fromisoformat(day) for day in emptied[start:start + DAY_CHUNK_SIZE]]))
+            .where(table.c.visits <= 0)
+        )
+
+
+def update_rollup(db: Session, delta: StatsDelta) -> None:
+    """Add a write's visits to the rollups; call before the write commits"""
+    connection = db.connection()
+    for table, (key_columns, counter) in ROLLUPS.items():
+        upsert_counts(connection, table, key_columns, getattr(delta, counter))
+
+
+def recount_visits(db: Session, days: Optional[Iterable[date]] = None) -> int:
+    """Recompute the rollup rows of ``days`` (every day when None) from patients.
+
+    For writes that can't say what they changed, and for the batch rebuild.
+    The caller commits; until then readers keep seeing the old rows.
+    Returns the number of daily_visits rows written.
+    """
+    connection = db.connection()
+    # Dates are read as the ISO strings SQLite stores, without parsing
+    source = select(
+        type_coerce(Patient.tanggal_kunjungan, String),
+        type_coerce(Patient.tanggal_lahir, String),
+        Patient.dokter,
+        Patient.diagnosis
+    )
+    if days is None:
+        chunks = [(None, source)]
+    else:
+        days = sorted(set(days))
+        chunks = [
+            (chunk, source.where(Patient.tanggal_kunjungan.in_(chunk)))
+            for chunk in (days[start:start + DAY_CHUNK_SIZE] for start in range(0, len(days), DAY_CHUNK_SIZE))
+        ]
+
+    written = 0
+    for chunk, rows in chunks:
+        delta = StatsDelta()
+        for row in connection.execute(rows.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)):
+            delta.add(*row)
+        for table in ROLLUPS:
+            clear = delete(table)
+            if chunk is not None:
+                clear = clear.where(table.c.tanggal_kunjungan.in_(chunk))
+            connection.execute(clear)
+        # Into emptied days the upserts only ever insert
+        update_rollup(db, delta)
+        written += len(delta.cells)
+    return written
+
+
+def ensure_rollup() -> None:
+    """Fill the rollups if they are empty but patients is not (new tables, or data loaded without the app)"""
+    with SessionLocal() as db:
+        if db.scalar(select(daily_visits.c.visits).limit(1)) is None and db.scalar(select(Patient.id).limit(1)) is not None:
+            recount_visits(db)
+            db.commit()
+
+
+if __name__ == "__main__":
+    with SessionLocal() as session:
+        written = recount_visits(session)
+        session.commit()
+    print(f"daily_visits rebuilt: {written} rows")
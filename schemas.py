@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 
 # Patient schemas
 class PatientBase(BaseModel):
@@ -30,6 +30,34 @@ class Patient(PatientBase):
     class Config:
         from_attributes = True
 
+class PatientSearchHit(Patient):
+    rank: float
+    # diagnosis / tindakan, HTML-escaped with matches wrapped in <mark>
+    highlights: dict
+
+class PatientSuggestion(BaseModel):
+    id: int
+    nama: str
+    tanggal_lahir: date
+
+# Bulk operations select patients by explicit ids or by the dashboard filters
+class PatientFilter(BaseModel):
+    q: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    dokter: Optional[str] = None
+    diagnosis: Optional[str] = None
+
+class BulkDelete(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[PatientFilter] = None
+
+class BulkUpdate(BulkDelete):
+    changes: PatientUpdate
+
+class BulkResult(BaseModel):
+    affected: int
+
 # User schemas
 class UserBase(BaseModel):
     username: str
@@ -49,6 +77,18 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+# Job schemas
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: str
+    processed: int = 0
+    total: Optional[int] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 # Token schemas
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,182 @@
+import base64
+import html
+import json
+import re
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, and_, column, func, literal_column, or_, select, table, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from filters import escape_like, has_fts_table
+from models import Patient
+from serializers import PATIENT_COLUMNS, PATIENT_FIELDS
+
+NOTES_FTS_TABLE = "patients_notes_fts"
+
+# Same expression as the GIN index in migration 0004, so Postgres can use it
+NOTES_TSVECTOR = (
+    "setweight(to_tsvector('simple', coalesce(patients.diagnosis, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(patients.tindakan, '')), 'B')"
+)
+
+# Matches are wrapped in private-use characters by the database, and only
+# turned into <mark> after the note text has been HTML-escaped
+MARK_START, MARK_END = "\ue000", "\ue001"
+SNIPPET_TOKENS = 16
+
+
+def parse_terms(q: str) -> List[str]:
+    """Split a query into words, keeping "quoted phrases" together"""
+    return [phrase or word for phrase, word in re.findall(r'"([^"]+)"|(\S+)', q)]
+
+
+def fts5_query(terms: List[str]) -> str:
+    # Every term quoted: FTS5 operators typed by users are matched as text
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def highlight_html(text: Optional[str]) -> Optional[str]:
+    if text is None:
+        return None
+    return html.escape(text).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def mark_terms(text: Optional[str], terms: List[str]) -> Optional[str]:
+    """Python-side highlighting for the unindexed fallback"""
+    if not text:
+        return text
+    pattern = "|".join(re.escape(term) for term in terms)
+    return re.sub(pattern, lambda m: MARK_START + m.group(0) + MARK_END, text, flags=re.IGNORECASE)
+
+
+def encode_search_cursor(q: str, score: float, patient_id: int) -> str:
+    raw = json.dumps({"q": q, "s": score, "id": patient_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str, q: str) -> Tuple[float, int]:
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        score, patient_id = float(payload["s"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise invalid
+    # A cursor only continues the search it came from
+    if payload.get("q") != q:
+        raise invalid
+    return score, patient_id
+
+
+notes_fts = table(NOTES_FTS_TABLE, column("rowid", Integer))
+fts = literal_column(NOTES_FTS_TABLE)
+
+
+def page_rows(page, diagnosis, tindakan):
+    """Patients on the ranked page with their highlighted notes, best first"""
+    return (
+        select(
+            *PATIENT_COLUMNS,
+            page.c.score,
+            diagnosis.label("diagnosis_highlight"),
+            tindakan.label("tindakan_highlight"),
+        )
+        .join_from(page, Patient, Patient.id == page.c.id)
+        .order_by(page.c.score, page.c.id)
+    )
+
+
+def sqlite_search(terms: List[str]):
+    match = fts.op("MATCH")(fts5_query(terms))
+    # bm25 is lower-is-better; diagnosis matches weigh double
+    ranked = select(notes_fts.c.rowid.label("id"), func.bm25(fts, 2.0, 1.0).label("score")).where(match)
+
+    def rows(page):
+        # highlight()/snippet() read the FTS row, so the page is matched again
+        return page_rows(
+            page,
+            func.highlight(fts, 0, MARK_START, MARK_END),
+            func.snippet(fts, 1, MARK_START, MARK_END, "…", SNIPPET_TOKENS)
+        ).join(notes_fts, notes_fts.c.rowid == page.c.id).where(match)
+
+    return ranked, rows
+
+
+def postgres_search(q: str):
+    tsv = literal_column(f"({NOTES_TSVECTOR})")
+    query = func.websearch_to_tsquery("simple", q)
+    options = f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_TOKENS}, MinWords=4"
+    # Negated so that, as with bm25, lower sorts first
+    ranked = select(Patient.id.label("id"), (-func.ts_rank(tsv, query)).label("score")).where(tsv.op("@@")(query))
+
+    def rows(page):
+        return page_rows(
+            page,
+            func.ts_headline("simple", func.coalesce(Patient.diagnosis, ""), query, options),
+            func.ts_headline("simple", func.coalesce(Patient.tindakan, ""), query, options)
+        )
+
+    return ranked, rows
+
+
+def fallback_search(terms: List[str]):
+    # No FTS table (database not migrated): unranked substring scan
+    ranked = select(Patient.id.label("id"), literal_column("0.0").label("score")).where(and_(*[
+        or_(
+            Patient.diagnosis.ilike(f"%{escape_like(term)}%", escape="\\"),
+            Patient.tindakan.ilike(f"%{escape_like(term)}%", escape="\\"),
+        )
+        for term in terms
+    ]))
+    return ranked, lambda page: page_rows(page, Patient.diagnosis, Patient.tindakan)
+
+
+async def search_patients(
+    db: AsyncSession,
+    q: str,
+    cursor: Optional[str] = None,
+    limit: int = 20
+) -> Tuple[List[dict], Optional[str]]:
+    """Ranked full-text search over diagnosis and tindakan.
+
+    Returns (hits, next_cursor). Hits are best first, paged by a
+    (score, id) keyset so later pages never repeat or skip a hit. Each hit
+    is a patient plus its relevance and HTML-safe highlighted notes.
+    """
+    terms = parse_terms(q)
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query is empty")
+
+    fallback = False
+    if db.bind.dialect.name == "postgresql":
+        ranked, rows_for = postgres_search(q)
+    elif has_fts_table(db.get_bind(), NOTES_FTS_TABLE):
+        ranked, rows_for = sqlite_search(terms)
+    else:
+        ranked, rows_for = fallback_search(terms)
+        fallback = True
+
+    # Rank and cut the page on (id, score) alone; patients are loaded and
+    # highlighted only for the rows on the page
+    ranked = ranked.subquery()
+    page = select(ranked)
+    if cursor:
+        page = page.where(tuple_(ranked.c.score, ranked.c.id) > tuple_(*decode_search_cursor(cursor, q)))
+    page = page.order_by(ranked.c.score, ranked.c.id).limit(limit + 1).cte("page")
+    rows = (await db.execute(rows_for(page))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(q, rows[-1].score, rows[-1].id)
+
+    results = []
+    for row in rows:
+        diagnosis, tindakan = row.diagnosis_highlight, row.tindakan_highlight
+        if fallback:
+            diagnosis, tindakan = mark_terms(diagnosis, terms), mark_terms(tindakan, terms)
+        hit = dict(zip(PATIENT_FIELDS, row))
+        hit["rank"] = round(abs(row.score), 6)
+        hit["highlights"] = {"diagnosis": highlight_html(diagnosis), "tindakan": highlight_html(tindakan)}
+        results.append(hit)
+    return results, next_cursor
@@ -0,0 +1,25 @@
+from typing import Iterable, List
+
+from sqlalchemy import Select, select
+
+import models
+import schemas
+
+# API rows are fetched as plain column tuples in schemas.Patient field order
+# and handed to orjson as dicts, skipping ORM identity-map and per-row
+# jsonable_encoder work. The response model stays schemas.Patient for docs.
+PATIENT_FIELDS = tuple(schemas.Patient.model_fields)
+PATIENT_COLUMNS = [getattr(models.Patient, field) for field in PATIENT_FIELDS]
+
+
+def patient_rows() -> Select:
+    """``select()`` of exactly the columns schemas.Patient exposes"""
+    return select(*PATIENT_COLUMNS)
+
+
+def patient_dicts(rows: Iterable) -> List[dict]:
+    return [dict(zip(PATIENT_FIELDS, row)) for row in rows]
+
+
+def patient_dict(patient: models.Patient) -> dict:
+    return {field: getattr(patient, field) for field in PATIENT_FIELDS}
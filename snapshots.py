@@ -0,0 +1,159 @@
+"""Parquet snapshots of the patients table for analysts.
+
+write_snapshot() writes every patient into a Parquet dataset directory,
+optionally split by visit month or year into Hive-style subdirectories
+(month=2024-01/part-0.parquet), so a tool reading a date range opens only
+those files. Rows are streamed in visit-date order: one file is open at a
+time, and each row group covers a narrow date range, so readers can skip
+row groups by their min/max statistics even inside a partition.
+
+read_snapshot() reads a snapshot (or a single Parquet export) back
+through memory-mapped files: the pages are mapped rather than copied
+into buffers, and only the requested columns and matching files are read.
+
+Run this module to write one: python snapshots.py DIRECTORY [month|year|none]
+"""
+import operator
+import os
+import shutil
+import sys
+from datetime import date
+from functools import reduce
+from typing import Iterable, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+from config import settings
+from exports import PARQUET_SCHEMA, iter_patient_batches, iter_row_groups
+from models import Patient
+
+# partition -> the NumPy unit a visit date is truncated to
+PARTITIONS = {
+    "month": "datetime64[M]",
+    "year": "datetime64[Y]",
+}
+
+
+def check_partition(partition: Optional[str]) -> None:
+    if partition is not None and partition not in PARTITIONS:
+        raise ValueError(f"Unsupported partition '{partition}'. Allowed: {', '.join(PARTITIONS)} or None")
+
+
+def partition_slices(table: pa.Table, partition: str):
+    """Split a table sorted by visit date into (partition value, rows) runs"""
+    periods = table["tanggal_kunjungan"].to_numpy().astype(PARTITIONS[partition])
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    ends = np.r_[starts[1:], len(periods)]
+    for start, end in zip(starts, ends):
+        yield str(periods[start]), table.slice(start, end - start)
+
+
+def period_of(day: date, partition: str) -> str:
+    return str(np.datetime64(day, "D").astype(PARTITIONS[partition]))
+
+
+def write_snapshot(directory: str, partition: Optional[str] = "month", bind=None) -> dict:
+    """Write all patients as a Parquet dataset in ``directory``, replacing what was there.
+
+    The dataset is written next to ``directory`` and moved into place at
+    the end, so readers never see half a snapshot. Returns the row and
+    file counts.
+    """
+    check_partition(partition)
+    directory = os.path.normpath(directory)
+    staging = f"{directory}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    rows = files = 0
+    writer, current = None, None
+    try:
+        batches = iter_patient_batches(bind=bind, order_by=(Patient.tanggal_kunjungan, Patient.id))
+        for table in iter_row_groups(batches):
+            runs = partition_slices(table, partition) if partition else [(None, table)]
+            for value, run in runs:
+                if writer is None or value != current:
+                    if writer is not None:
+                        writer.close()
+                    folder = os.path.join(staging, f"{partition}={value}") if partition else staging
+                    os.makedirs(folder, exist_ok=True)
+                    writer = pq.ParquetWriter(
+                        os.path.join(folder, "part-0.parquet"),
+                        PARQUET_SCHEMA,
+                        compression=settings.PARQUET_COMPRESSION
+                    )
+                    current = value
+                    files += 1
+                writer.write_table(run, row_group_size=run.num_rows)
+                rows += run.num_rows
+        if writer is not None:
+            writer.close()
+    except Exception:
+        if writer is not None:
+            writer.close()
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(staging, directory)
+    return {"directory": directory, "partition": partition, "rows": rows, "files": files}
+
+
+def snapshot_dataset(path: str, partition: Optional[str] = None) -> ds.Dataset:
+    """A dataset over a snapshot directory or a single Parquet file, read through mmap"""
+    check_partition(partition)
+    partitioning = None
+    if partition and os.path.isdir(path):
+        partitioning = ds.partitioning(pa.schema([(partition, pa.string())]), flavor="hive")
+    return ds.dataset(
+        path,
+        format="parquet",
+        partitioning=partitioning,
+        filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+
+
+def read_snapshot(
+    path: str,
+    columns: Optional[Iterable[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    partition: Optional[str] = None
+) -> pa.Table:
+    """Read ``columns`` of the visits between the dates from a snapshot or Parquet export.
+
+    ``partition`` is the one the snapshot was written with; it lets the
+    date range skip whole partition directories before any file is opened.
+    Use .to_pandas() on the result for a DataFrame.
+    """
+    dataset = snapshot_dataset(path, partition)
+    visit = ds.field("tanggal_kunjungan")
+    conditions = []
+    if date_from:
+        conditions.append(visit >= pa.scalar(date_from, pa.date32()))
+    if date_to:
+        conditions.append(visit <= pa.scalar(date_to, pa.date32()))
+    if partition and os.path.isdir(path):
+        # Partition values ("2024-01", "2024") sort like the dates they hold
+        key = ds.field(partition)
+        if date_from:
+            conditions.append(key >= period_of(date_from, partition))
+        if date_to:
+            conditions.append(key <= period_of(date_to, partition))
+    condition = reduce(operator.and_, conditions) if conditions else None
+    return dataset.to_table(
+        columns=list(columns) if columns is not None else PARQUET_SCHEMA.names,
+        filter=condition
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python snapshots.py DIRECTORY [month|year|none]")
+    chosen = sys.argv[2] if len(sys.argv) > 2 else "month"
+    result = write_snapshot(sys.argv[1], None if chosen == "none" else chosen)
+    print(f"{result['rows']} patients written to {result['directory']} in {result['files']} files")
@@ -0,0 +1,39 @@
+"""Emulate a read replica locally by copying the SQLite primary on an interval.
+
+Usage: python sqlite_replica.py REPLICA_FILE [REPLICA_FILE ...] [--interval SECONDS]
+Copies DATABASE_URL's file into each replica with SQLite's online backup
+API every ``--interval`` seconds, so replicas lag the primary the way an
+asynchronous replica would. Point the app at them with e.g.
+DATABASE_READ_URLS=sqlite:///./replica1.db,sqlite:///./replica2.db
+"""
+import argparse
+import sqlite3
+import time
+
+from sqlalchemy.engine import make_url
+
+from config import settings
+
+
+def sync(primary: str, replica: str) -> None:
+    source = sqlite3.connect(primary)
+    target = sqlite3.connect(replica)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("replicas", nargs="+")
+    parser.add_argument("--interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    primary = make_url(settings.DATABASE_URL).database
+    while True:
+        for replica in args.replicas:
+            sync(primary, replica)
+        print(f"synced {len(args.replicas)} replica(s) from {primary}", flush=True)
+        time.sleep(args.interval)
@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Patient
+
+TOP_N = 10
+# Width of the age bands (age at the visit) kept by the daily_visit_ages
+# rollup; reports may group them into any multiple of this
+AGE_BAND_YEARS = 5
+
+
+def day_key(value) -> str:
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def age_band(tanggal_lahir, tanggal_kunjungan) -> int:
+    """First year of the AGE_BAND_YEARS-wide band holding the age at the visit"""
+    born, visited = day_key(tanggal_lahir), day_key(tanggal_kunjungan)
+    # ISO dates: compare years, then whether "MM-DD" of the birthday has come
+    age = int(visited[:4]) - int(born[:4]) - (visited[5:] < born[5:])
+    return max(age, 0) // AGE_BAND_YEARS * AGE_BAND_YEARS
+
+
+class StatsDelta:
+    """Visit counters by day, doctor and diagnosis.
+
+    Used both as the cached snapshot and as the change produced by a write,
+    so applying a write is just adding one Counter to another. A write's
+    delta also counts visits at the grain of the rollup tables, ``cells``
+    by (day, doctor, diagnosis) and ``ages`` by (day, doctor, age band),
+    which rollup.update_rollup() adds inside the write's transaction; the
+    snapshot never holds them.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.by_day = Counter()
+        self.by_doctor = Counter()
+        self.by_diagnosis = Counter()
+        self.cells = Counter()
+        self.ages = Counter()
+
+    def add(self, tanggal_kunjungan, tanggal_lahir, dokter: Optional[str], diagnosis: Optional[str], sign: int = 1) -> None:
+        dokter = dokter.strip() if dokter else ""
+        diagnosis = diagnosis.strip() if diagnosis else ""
+        day = day_key(tanggal_kunjungan)
+        self.total += sign
+        self.by_day[day] += sign
+        if dokter:
+            self.by_doctor[dokter] += sign
+        if diagnosis:
+            self.by_diagnosis[diagnosis] += sign
+        self.cells[day, dokter, diagnosis] += sign
+        self.ages[day, dokter, age_band(tanggal_lahir, day)] += sign
+
+    def add_patient(self, patient, sign: int = 1) -> None:
+        self.add(patient.tanggal_kunjungan, patient.tanggal_lahir, patient.dokter, patient.diagnosis, sign)
+
+    def add_rows(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.add(row["tanggal_kunjungan"], row["tanggal_lahir"], row.get("dokter"), row.get("diagnosis"))
+
+    def merge(self, other: "StatsDelta") -> None:
+        self.total += other.total
+        for mine, theirs in (
+            (self.by_day, other.by_day),
+            (self.by_doctor, other.by_doctor),
+            (self.by_diagnosis, other.by_diagnosis)
+        ):
+            mine.update(theirs)
+            # Counter.update keeps zero/negative entries; drop them
+            for key in [k for k, v in theirs.items() if mine[k] <= 0]:
+                del mine[key]
+
+
+def load_stats(db: Session) -> StatsDelta:
+    """Rebuild the counters from the table with three GROUP BY queries"""
+    snapshot = StatsDelta()
+    for day, count in db.query(Patient.tanggal_kunjungan, func.count()).group_by(Patient.tanggal_kunjungan):
+        snapshot.by_day[day_key(day)] = count
+        snapshot.total += count
+    for dokter, count in db.query(Patient.dokter, func.count()).filter(Patient.dokter.isnot(None)).group_by(Patient.dokter):
+        if dokter and dokter.strip():
+            snapshot.by_doctor[dokter.strip()] += count
+    for diagnosis, count in db.query(Patient.diagnosis, func.count()).filter(Patient.diagnosis.isnot(None)).group_by(Patient.diagnosis):
+        if diagnosis and diagnosis.strip():
+            snapshot.by_diagnosis[diagnosis.strip()] += count
+    return snapshot
+
+
+class StatsCache:
+    """In-process dashboard statistics, updated write-through by the write paths.
+
+    The snapshot is also reloaded after STATS_TTL_SECONDS so writes made by
+    other worker processes (or directly in the database) are picked up.
+
+    The lock only guards the in-memory counters and is never held across
+    the reload's queries: writes fold their deltas in from the event loop
+    thread, which must not wait on a database round trip.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.snapshot: Optional[StatsDelta] = None
+        self.loaded_at = 0.0
+        # Bumped by every write folded in or invalidation
+        self.generation = 0
+
+    def get(self, db: Session) -> StatsDelta:
+        with self.lock:
+            if self.snapshot is not None and time.monotonic() - self.loaded_at <= settings.STATS_TTL_SECONDS:
+                return self.snapshot
+            generation = self.generation
+        snapshot = load_stats(db)
+        with self.lock:
+            # A write that landed during the load may or may not be in it,
+            # so such a load answers this caller but isn't kept
+            if self.generation == generation:
+                self.snapshot = snapshot
+                self.loaded_at = time.monotonic()
+        return snapshot
+
+    def apply(self, delta: StatsDelta) -> None:
+        """Fold a committed write into the snapshot"""
+        with self.lock:
+            self.generation += 1
+            if self.snapshot is not None:
+                self.snapshot.merge(delta)
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.generation += 1
+            self.snapshot = None
+
+
+stats_cache = StatsCache()
+
+
+def dashboard_stats(db: Session, days: int = 14, weeks: int = 8) -> dict:
+    snapshot = stats_cache.get(db)
+    # Hold the lock while reading so a concurrent write can't resize the counters
+    with stats_cache.lock:
+        return summarize(snapshot, days, weeks)
+
+
+def summarize(snapshot: StatsDelta, days: int, weeks: int) -> dict:
+    today = date.today()
+
+    visits_per_day = [
+        {"date": (today - timedelta(days=i)).isoformat(),
+         "count": snapshot.by_day.get((today - timedelta(days=i)).isoformat(), 0)}
+        for i in range(days - 1, -1, -1)
+    ]
+
+    # ISO weeks starting on Monday, oldest first
+    this_monday = today - timedelta(days=today.weekday())
+    visits_per_week = []
+    for i in range(weeks - 1, -1, -1):
+        monday = this_monday - timedelta(weeks=i)
+        count = sum(snapshot.by_day.get((monday + timedelta(days=d)).isoformat(), 0) for d in range(7))
+        visits_per_week.append({"week_start": monday.isoformat(), "count": count})
+
+    return {
+        "total_patients": snapshot.total,
+        "today_patients": snapshot.by_day.get(today.isoformat(), 0),
+        "visits_per_day": visits_per_day,
+        "visits_per_week": visits_per_week,
+        "per_doctor": [{"dokter": k, "count": v} for k, v in snapshot.by_doctor.most_common()],
+        "top_diagnoses": [{"diagnosis": k, "count": v} for k, v in snapshot.by_diagnosis.most_common(TOP_N)],
+    }
@@ -0,0 +1,28 @@
+VISITS = [
+    {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01", "dokter": "Dr. Budi"},
+    {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-20", "dokter": "Dr. Sarah"},
+    {"nama": "Budi Santoso", "tanggal_lahir": "1950-01-20", "tanggal_kunjungan": "2024-03-02", "dokter": "Dr. Budi"},
+    {"nama": "Andi Wijaya", "tanggal_lahir": "2001-11-30", "tanggal_kunjungan": "2024-04-05", "dokter": "Dr. Budi"},
+]
+
+
+def workload(client, **params):
+    report = client.get("/api/analytics/doctors", params=params).json()
+    return report["visits"], {doctor["dokter"]: doctor["visits"] for doctor in report["doctors"]}
+
+
+def test_analytics_apply_the_dashboard_filters(client):
+    client.post("/api/import", json={"patients": VISITS})
+    assert workload(client) == (4, {"Dr. Budi": 3, "Dr. Sarah": 1})
+    # Name search, as in the dashboard table (trigram FTS for 3+ characters, ILIKE below)
+    assert workload(client, q="siti") == (2, {"Dr. Budi": 1, "Dr. Sarah": 1})
+    assert workload(client, q="di") == (2, {"Dr. Budi": 2})
+    # Date parameters are bound as dates, inclusive at both ends
+    assert workload(client, date_from="2024-03-02", date_to="2024-03-20") == (2, {"Dr. Budi": 1, "Dr. Sarah": 1})
+    assert workload(client, q="siti", dokter="Dr. Budi") == (1, {"Dr. Budi": 1})
+
+
+def test_interval_statistics_follow_the_name_filter(client):
+    client.post("/api/import", json={"patients": VISITS})
+    assert client.get("/api/analytics/intervals", params={"q": "budi"}).json()["returning_patients"] == 0
+    assert client.get("/api/analytics/intervals", params={"q": "siti"}).json()["returning_patients"] == 1
@@ -0,0 +1,77 @@
+from name_index import name_index
+
+PATIENTS = [
+    {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01"},
+    {"nama": "Aminah Siregar", "tanggal_lahir": "1990-02-02", "tanggal_kunjungan": "2024-03-01"},
+    {"nama": "Zoë Ölçer", "tanggal_lahir": "1970-07-07", "tanggal_kunjungan": "2024-03-01"},
+    {"nama": "Nur'aini Sitompul", "tanggal_lahir": "2000-01-01", "tanggal_kunjungan": "2024-03-01"},
+]
+
+
+def names(client, q, **params):
+    response = client.get("/api/patients/autocomplete", params={"q": q, **params})
+    assert response.status_code == 200
+    return [suggestion["nama"] for suggestion in response.json()]
+
+
+def add_patients(client):
+    client.post("/api/import", json={"patients": PATIENTS})
+
+
+def test_prefix_matches(client):
+    add_patients(client)
+    # Names starting with the query first, then matches in any other word
+    assert names(client, "amin") == ["Aminah Siregar", "Siti Aminah"]
+    assert names(client, "sit") == ["Siti Aminah", "Nur'aini Sitompul"]
+    assert names(client, "siti am") == ["Siti Aminah"]
+    assert names(client, "aminah siti") == ["Siti Aminah"]
+    assert names(client, "si", limit=1) == ["Siti Aminah"]
+    assert names(client, "budi") == []
+
+
+def test_accents_case_and_punctuation_are_folded(client):
+    add_patients(client)
+    assert names(client, "zoe olc") == ["Zoë Ölçer"]
+    assert names(client, "ÖLÇ") == ["Zoë Ölçer"]
+    assert names(client, "sïti") == ["Siti Aminah"]
+    assert names(client, "nuraini") == ["Nur'aini Sitompul"]
+
+
+def test_one_typo_is_tolerated_when_nothing_matches_exactly(client):
+    add_patients(client)
+    assert names(client, "amnah") == ["Aminah Siregar", "Siti Aminah"]
+    assert names(client, "sitompl") == ["Nur'aini Sitompul"]
+    # Short terms must match exactly, and the first letter is trusted
+    assert names(client, "sti") == []
+    assert names(client, "xminah") == []
+
+
+def test_index_follows_writes(dokter_client):
+    patient_id = dokter_client.post("/api/patients", json={**PATIENTS[0], "nama": "Budi Santoso"}).json()["id"]
+    assert names(dokter_client, "budi") == ["Budi Santoso"]
+
+    dokter_client.patch(f"/api/patients/{patient_id}", json={"nama": "Bagus Santoso"})
+    assert names(dokter_client, "budi") == []
+    assert names(dokter_client, "bagus") == ["Bagus Santoso"]
+
+    form = {**PATIENTS[0], "nama": "Bima Santoso", "diagnosis": "", "tindakan": "", "dokter": ""}
+    dokter_client.post(f"/patients/{patient_id}/update", data=form, follow_redirects=False)
+    assert names(dokter_client, "santoso") == ["Bima Santoso"]
+
+    dokter_client.post("/api/import", json={"patients": PATIENTS[:2]})
+    assert names(dokter_client, "amin") == ["Aminah Siregar", "Siti Aminah"]
+    dokter_client.post("/api/patients/bulk-update", json={"filter": {"q": "siregar"}, "changes": {"nama": "Aminah Lubis"}})
+    assert names(dokter_client, "amin") == ["Aminah Lubis", "Siti Aminah"]
+
+    dokter_client.post(f"/patients/{patient_id}/delete", follow_redirects=False)
+    assert names(dokter_client, "santoso") == []
+    dokter_client.post("/api/patients/bulk-delete", json={"filter": {"q": "aminah"}})
+    assert names(dokter_client, "amin") == []
+
+
+def test_database_answers_until_the_index_is_built(client, monkeypatch):
+    add_patients(client)
+    monkeypatch.setattr(name_index, "index", None)
+    monkeypatch.setattr(name_index, "building", True)
+    assert name_index.lookup("sit") is None
+    assert names(client, "aminah") == ["Aminah Siregar", "Siti Aminah"]
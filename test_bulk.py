@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import select
+
+import patient_writes
+from models import DailyVisit, Patient
+from rollup import recount_visits
+from stats import stats_cache
+
+PATIENTS = [
+    {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01", "dokter": "Dr. Budi", "diagnosis": "Flu"},
+    {"nama": "Budi Santoso", "tanggal_lahir": "1950-01-20", "tanggal_kunjungan": "2024-03-02", "dokter": "Dr. Budi", "diagnosis": "Demam berdarah"},
+    {"nama": "Andi Wijaya", "tanggal_lahir": "2001-11-30", "tanggal_kunjungan": "2024-03-15", "dokter": "Dr. Sarah", "diagnosis": "Flu"},
+    {"nama": "Sitompul Rina", "tanggal_lahir": "1999-09-09", "tanggal_kunjungan": "2024-04-01", "dokter": "Dr. Sarah", "diagnosis": "Tifus"},
+]
+
+
+@pytest.fixture
+def patients(dokter_client, db):
+    dokter_client.post("/api/import", json={"patients": PATIENTS})
+    # Warm the stats cache so bulk writes fold their deltas into it
+    assert dokter_client.get("/api/stats").json()["total_patients"] == len(PATIENTS)
+    return {p.nama: p.id for p in db.query(Patient)}
+
+
+def remaining(db):
+    db.rollback()
+    return sorted((p.nama, p.dokter, p.diagnosis) for p in db.query(Patient))
+
+
+def assert_counts_consistent(client, db):
+    """Rollups and the cached dashboard stats match what a reload from patients gives"""
+    db.rollback()
+    kept = sorted(db.execute(select(DailyVisit.tanggal_kunjungan, DailyVisit.dokter, DailyVisit.diagnosis, DailyVisit.visits)).all())
+    recount_visits(db)
+    assert kept == sorted(db.execute(select(DailyVisit.tanggal_kunjungan, DailyVisit.dokter, DailyVisit.diagnosis, DailyVisit.visits)).all())
+    db.rollback()
+    cached = client.get("/api/stats").json()
+    stats_cache.invalidate()
+    assert cached == client.get("/api/stats").json()
+
+
+@pytest.mark.parametrize("selection, expected", [
+    ({"q": "siti"}, {"Siti Aminah"}),
+    ({"q": "sit"}, {"Siti Aminah", "Sitompul Rina"}),
+    ({"date_from": "2024-03-02", "date_to": "2024-03-31"}, {"Budi Santoso", "Andi Wijaya"}),
+    ({"dokter": "Dr. Sarah"}, {"Andi Wijaya", "Sitompul Rina"}),
+    ({"diagnosis": "demam"}, {"Budi Santoso"}),
+    ({"dokter": "Dr. Budi", "diagnosis": "flu"}, {"Siti Aminah"}),
+])
+def test_filter_selection(dokter_client, db, patients, selection, expected):
+    body = {"filter": selection, "changes": {"tindakan": "Kontrol ulang"}}
+    assert dokter_client.post("/api/patients/bulk-update", json=body).json() == {"affected": len(expected)}
+    assert {p.nama for p in db.query(Patient).filter(Patient.tindakan == "Kontrol ulang")} == expected
+
+
+def test_bulk_update_by_ids_in_chunks(dokter_client, db, patients, monkeypatch):
+    monkeypatch.setattr(patient_writes, "ID_CHUNK_SIZE", 2)
+    ids = [patients["Siti Aminah"], patients["Budi Santoso"], patients["Andi Wijaya"], 999999]
+    body = {"ids": ids, "changes": {"dokter": "Dr. Andi", "tanggal_kunjungan": "2024-05-05"}}
+    assert dokter_client.post("/api/patients/bulk-update", json=body).json() == {"affected": 3}
+    assert [row[1] for row in remaining(db)].count("Dr. Andi") == 3
+    assert_counts_consistent(dokter_client, db)
+
+
+def test_bulk_update_regrouping_keeps_counts_consistent(dokter_client, db, patients):
+    for body in (
+        {"filter": {"dokter": "Dr. Budi"}, "changes": {"diagnosis": "Flu"}},
+        {"filter": {"diagnosis": "flu"}, "changes": {"dokter": "Dr. Sarah", "tanggal_kunjungan": "2024-03-15"}},
+        {"filter": {"date_from": "2024-03-15"}, "changes": {"tanggal_lahir": "1940-01-01"}},
+    ):
+        dokter_client.post("/api/patients/bulk-update", json=body)
+        assert_counts_consistent(dokter_client, db)
+
+
+def test_bulk_delete(dokter_client, db, patients, monkeypatch):
+    monkeypatch.setattr(patient_writes, "ID_CHUNK_SIZE", 1)
+    body = {"ids": [patients["Siti Aminah"], patients["Andi Wijaya"]]}
+    assert dokter_client.post("/api/patients/bulk-delete", json=body).json() == {"affected": 2}
+    assert_counts_consistent(dokter_client, db)
+    assert dokter_client.post("/api/patients/bulk-delete", json={"filter": {"dokter": "Dr. Sarah"}}).json() == {"affected": 1}
+    assert remaining(db) == [("Budi Santoso", "Dr. Budi", "Demam berdarah")]
+    assert_counts_consistent(dokter_client, db)
+
+
+@pytest.mark.parametrize("body", [
+    {"changes": {"dokter": "Dr. Sarah"}},
+    {"ids": [1], "filter": {"dokter": "Dr. Budi"}, "changes": {"dokter": "Dr. Sarah"}},
+    {"filter": {}, "changes": {"dokter": "Dr. Sarah"}},
+    {"filter": {"dokter": ""}, "changes": {"dokter": "Dr. Sarah"}},
+    {"ids": [1], "changes": {}},
+    {"ids": [1], "changes": {"nama": None}},
+])
+def test_bad_selections_are_rejected(dokter_client, db, patients, body):
+    before = remaining(db)
+    assert dokter_client.post("/api/patients/bulk-update", json=body).status_code == 400
+    delete_body = {key: value for key, value in body.items() if key != "changes"}
+    if delete_body != {"ids": [1]}:
+        assert dokter_client.post("/api/patients/bulk-delete", json=delete_body).status_code == 400
+    assert remaining(db) == before
+
+
+def test_bulk_operations_require_the_dokter_role(client, db, patients):
+    update = {"filter": {"dokter": "Dr. Budi"}, "changes": {"dokter": "Dr. Sarah"}}
+    delete = {"filter": {"dokter": "Dr. Budi"}}
+    client.cookies.clear()
+    assert client.post("/api/patients/bulk-update", json=update).status_code == 401
+    assert client.post("/api/patients/bulk-delete", json=delete).status_code == 401
+    assert client.post("/login", data={"username": "admin", "password": "admin"}, follow_redirects=False).status_code == 303
+    assert client.post("/api/patients/bulk-update", json=update).status_code == 403
+    assert client.post("/api/patients/bulk-delete", json=delete).status_code == 403
+    assert len(remaining(db)) == len(PATIENTS)
+    assert {row[1] for row in remaining(db)} == {"Dr. Budi", "Dr. Sarah"}
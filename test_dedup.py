@@ -0,0 +1,76 @@
+from datetime import date
+
+from models import Patient
+
+STORED = {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01",
+          "dokter": "Dr. Budi", "diagnosis": "Flu"}
+# The stored visit again, spelled differently, with new visit details
+REPEAT = {**STORED, "nama": "  SITI   aminah ", "dokter": "Dr. Sarah", "diagnosis": "Demam berdarah"}
+# The same patient on another day
+RETURNING = {**STORED, "tanggal_kunjungan": "2024-03-08"}
+NEW = {**STORED, "nama": "Budi Santoso"}
+
+
+def import_rows(client, rows, **params):
+    response = client.post("/api/import", json={"patients": rows}, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def visits(db):
+    db.expire_all()
+    return sorted(
+        (p.nama, p.tanggal_kunjungan, p.dokter, p.diagnosis)
+        for p in db.query(Patient)
+    )
+
+
+def stored_patient(client, db):
+    import_rows(client, [STORED])
+    return db.query(Patient).one()
+
+
+def test_skip_drops_duplicates_and_keeps_returning_patients(client, db):
+    stored = stored_patient(client, db)
+    result = import_rows(client, [REPEAT, RETURNING, NEW, NEW], on_duplicate="skip")
+    assert (result["accepted"], result["duplicates"]) == (2, 2)
+    assert result["matches"] == [
+        {"row": 0, "match": "duplicate", "patient_id": stored.id},
+        {"row": 1, "match": "returning_patient", "patient_id": stored.id},
+        {"row": 3, "match": "duplicate", "same_as_row": 2},
+    ]
+    assert visits(db) == [
+        ("Budi Santoso", date(2024, 3, 1), "Dr. Budi", "Flu"),
+        ("Siti Aminah", date(2024, 3, 1), "Dr. Budi", "Flu"),
+        ("Siti Aminah", date(2024, 3, 8), "Dr. Budi", "Flu"),
+    ]
+
+
+def test_merge_copies_visit_details_onto_the_match(client, db):
+    stored_patient(client, db)
+    result = import_rows(client, [REPEAT, NEW, {**NEW, "diagnosis": "Tifus"}], on_duplicate="merge")
+    assert (result["accepted"], result["duplicates"]) == (1, 2)
+    assert visits(db) == [
+        ("Budi Santoso", date(2024, 3, 1), "Dr. Budi", "Tifus"),
+        ("Siti Aminah", date(2024, 3, 1), "Dr. Sarah", "Demam berdarah"),
+    ]
+
+
+def test_insert_imports_duplicates_but_reports_them(client, db):
+    stored = stored_patient(client, db)
+    result = import_rows(client, [REPEAT], on_duplicate="insert")
+    assert (result["accepted"], result["duplicates"]) == (1, 1)
+    assert result["matches"] == [{"row": 0, "match": "duplicate", "patient_id": stored.id}]
+    assert db.query(Patient).count() == 2
+
+
+def test_dry_run_reports_without_writing(client, db):
+    stored_patient(client, db)
+    before = visits(db)
+    for mode in ("skip", "merge", "insert"):
+        result = import_rows(client, [REPEAT, NEW, {"nama": "Tanpa tanggal"}], on_duplicate=mode, dry_run=True)
+        assert result["dry_run"] is True
+        assert result["message"].startswith("Would import")
+        assert (result["duplicates"], result["rejected"]) == (1, 1)
+        assert result["accepted"] == (2 if mode == "insert" else 1)
+        assert visits(db) == before
@@ -0,0 +1,26 @@
+import os
+import stat
+
+PATIENT = {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01"}
+
+
+def export(client, format="csv"):
+    response = client.get("/api/export", params={"format": format})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_artifacts_are_readable_by_other_users(client, export_dir):
+    client.post("/api/patients", json=PATIENT)
+    result = export(client)
+    path = os.path.join(export_dir, os.path.basename(result["download_url"]))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert not [name for name in os.listdir(export_dir) if name.endswith(".tmp")]
+
+
+def test_artifacts_are_reused_until_the_data_changes(client):
+    client.post("/api/patients", json=PATIENT)
+    first = export(client)
+    assert export(client) == {**first, "cached": True}
+    client.post("/api/patients", json={**PATIENT, "nama": "Budi"})
+    assert export(client)["download_url"] != first["download_url"]
@@ -0,0 +1,65 @@
+from sqlalchemy import text
+
+PATIENT = {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01"}
+
+
+def etag_of(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag}).status_code
+
+
+def test_list_etag_changes_with_every_write(dokter_client, db):
+    url = "/api/patients"
+    etag = etag_of(dokter_client, url)
+    assert revalidate(dokter_client, url, etag) == 304
+
+    patient_id = dokter_client.post("/api/patients", json=PATIENT).json()["id"]
+    writes = [
+        lambda: dokter_client.patch(f"/api/patients/{patient_id}", json={"dokter": "Dr. Sarah"}),
+        lambda: dokter_client.post("/api/import", json={"patients": [{**PATIENT, "nama": "Budi"}]}),
+        # Writes that bypass the app are seen too: the version comes from triggers
+        lambda: (db.execute(text("UPDATE patients SET diagnosis = 'Flu'")), db.commit()),
+        lambda: dokter_client.post(f"/patients/{patient_id}/delete", follow_redirects=False),
+    ]
+    seen = {etag}
+    assert revalidate(dokter_client, url, etag) == 200
+    for write in writes:
+        etag = etag_of(dokter_client, url)
+        write()
+        assert revalidate(dokter_client, url, etag) == 200
+        seen.add(etag)
+    assert len(seen) == len(writes) + 1
+
+
+def test_failed_and_dry_run_writes_keep_the_etag(dokter_client):
+    dokter_client.post("/api/patients", json=PATIENT)
+    etag = etag_of(dokter_client, "/api/patients")
+    dokter_client.post("/api/import", json={"patients": [{**PATIENT, "nama": "Budi"}]}, params={"dry_run": "true"})
+    dokter_client.patch("/api/patients/999999", json={"dokter": "Dr. Sarah"})
+    assert revalidate(dokter_client, "/api/patients", etag) == 304
+
+
+def test_dashboard_revalidates(dokter_client):
+    etag = etag_of(dokter_client, "/dashboard")
+    assert revalidate(dokter_client, "/dashboard", etag) == 304
+    dokter_client.post("/api/patients", json=PATIENT)
+    assert revalidate(dokter_client, "/dashboard", etag) == 200
+
+
+def test_record_etag_and_last_modified(dokter_client):
+    patient_id = dokter_client.post("/api/patients", json=PATIENT).json()["id"]
+    url = f"/api/patients/{patient_id}"
+    response = dokter_client.get(url)
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert revalidate(dokter_client, url, etag) == 304
+    assert revalidate(dokter_client, url, f'W/{etag}, "other"') == 304
+    assert dokter_client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    dokter_client.patch(url, json={"dokter": "Dr. Sarah"})
+    assert revalidate(dokter_client, url, etag) == 200
+    assert dokter_client.get(url).json()["dokter"] == "Dr. Sarah"
@@ -0,0 +1,42 @@
+from config import settings
+from models import Patient
+
+
+def row(nama, tanggal_kunjungan="2024-03-01", **extra):
+    return {"nama": nama, "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": tanggal_kunjungan, **extra}
+
+
+def test_valid_rows_are_inserted(client, db):
+    rows = [row(f"Pasien {i}", dokter="Dr. Budi", diagnosis="Flu") for i in range(5)]
+    response = client.post("/api/import", json={"patients": rows})
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["accepted"], result["rejected"], result["errors"]) == (5, 0, [])
+    assert sorted(p.nama for p in db.query(Patient)) == [f"Pasien {i}" for i in range(5)]
+
+
+def test_bad_rows_are_reported_by_position(client, db, monkeypatch):
+    # Small batches, so a bad row's position must count the batches before it
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    rows = [
+        row("Pasien 0"),
+        {"nama": "Tanpa tanggal"},
+        row("Pasien 2"),
+        "not an object",
+        row("Pasien 4", tanggal_kunjungan="kemarin"),
+        row("Pasien 5"),
+    ]
+    result = client.post("/api/import", json={"patients": rows}).json()
+    assert (result["accepted"], result["rejected"]) == (3, 3)
+    assert [error["row"] for error in result["errors"]] == [1, 3, 4]
+    assert "tanggal_lahir" in result["errors"][0]["error"]
+    assert result["errors"][1]["error"] == "row must be a JSON object"
+    assert "tanggal_kunjungan" in result["errors"][2]["error"]
+    assert sorted(p.nama for p in db.query(Patient)) == ["Pasien 0", "Pasien 2", "Pasien 5"]
+
+
+def test_malformed_payloads_are_rejected(client, db):
+    assert client.post("/api/import", content=b"{not json", headers={"Content-Type": "application/json"}).status_code == 400
+    assert client.post("/api/import", json={"patients": {"nama": "x"}}).status_code == 400
+    assert client.post("/api/import", json={"patients": []}, params={"on_duplicate": "replace"}).status_code == 400
+    assert db.query(Patient).count() == 0
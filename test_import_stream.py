@@ -0,0 +1,68 @@
+import json
+
+from config import settings
+from models import Patient
+
+HEADER = "nama,tanggal_lahir,tanggal_kunjungan,diagnosis,tindakan,dokter\n"
+
+
+def import_csv(client, text, **params):
+    response = client.post("/api/import/stream", content=text.encode(), params={"format": "csv", **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def patients(db):
+    return {p.nama: p for p in db.query(Patient)}
+
+
+def test_quote_inside_a_field_is_plain_text(client, db):
+    text = HEADER + 'Pasien A,1990-01-01,2024-03-01,Benjolan 5" di lengan,Kompres,Dr. Budi\n'
+    text += "".join(f"Pasien {i},1990-01-01,2024-03-01,Flu,,Dr. Budi\n" for i in range(3))
+    result = import_csv(client, text)
+    assert (result["accepted"], result["rejected"]) == (4, 0)
+    assert patients(db)["Pasien A"].diagnosis == 'Benjolan 5" di lengan'
+
+
+def test_quoted_fields_may_span_lines(client, db):
+    text = HEADER + '"Pasien, B",1990-01-01,2024-03-01,"Flu\nbatuk ""kering""",,Dr. Budi\nPasien C,1990-01-01,2024-03-01,,,\n'
+    result = import_csv(client, text)
+    assert (result["accepted"], result["rejected"]) == (2, 0)
+    assert patients(db)["Pasien, B"].diagnosis == 'Flu\nbatuk "kering"'
+
+
+def test_bad_records_are_reported_and_the_rest_imported(client, db):
+    text = HEADER + "Pasien D,1990-01-01\nPasien E,1990-01-01,2024-03-01,,,\n" + 'Pasien F,1990-01-01,2024-03-01,"Flu,,\n'
+    result = import_csv(client, text)
+    assert (result["accepted"], result["rejected"]) == (1, 2)
+    assert result["errors"][0] == {"row": 0, "error": "expected 6 columns, got 2"}
+    assert result["errors"][1]["row"] == 2
+    assert result["errors"][1]["error"].startswith("invalid CSV")
+    assert list(patients(db)) == ["Pasien E"]
+
+
+def test_overlong_lines_are_rejected_without_buffering(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_IMPORT_LINE_LENGTH", 100)
+    row = {"nama": "Pasien G", "tanggal_lahir": "1990-01-01", "tanggal_kunjungan": "2024-03-01"}
+    body = json.dumps({**row, "diagnosis": "x" * 5000}) + "\n" + json.dumps(row) + "\n" + "y" * 5000
+    response = client.post("/api/import/stream", content=body.encode())
+    result = response.json()
+    assert (result["accepted"], result["rejected"]) == (1, 2)
+    assert [error["error"] for error in result["errors"]] == ["line longer than 100 characters"] * 2
+    assert list(patients(db)) == ["Pasien G"]
+
+
+def test_progress_is_streamed_to_the_client(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    text = HEADER + "".join(f"Pasien {i},1990-01-01,2024-03-01,,,\n" for i in range(5)) + "Pasien X,kemarin,2024-03-01,,,\n"
+    response = client.post("/api/import/stream", content=text.encode(), params={"format": "csv", "progress": "true"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    *updates, summary = [json.loads(line) for line in response.text.splitlines()]
+    assert updates == [
+        {"processed": 2, "accepted": 2, "rejected": 0},
+        {"processed": 4, "accepted": 4, "rejected": 0},
+        {"processed": 6, "accepted": 5, "rejected": 1},
+    ]
+    assert (summary["accepted"], summary["rejected"], summary["processed"]) == (5, 1, 6)
+    assert db.query(Patient).count() == 5
@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+import main
+from models import Patient
+
+# Eight visits on three days, so most pages split a run of equal dates
+VISIT_DAYS = [date(2024, 1, 1)] * 3 + [date(2024, 1, 2)] * 4 + [date(2024, 1, 3)]
+
+
+def add_patients(db):
+    for i, day in enumerate(VISIT_DAYS):
+        db.add(Patient(nama=f"Pasien {i}", tanggal_lahir=date(1990, 1, 1), tanggal_kunjungan=day))
+    db.commit()
+    return db.query(Patient).all()
+
+
+def walk(client, sort, limit, header="X-Next-Cursor", cursor=None):
+    """Follow one cursor header to the end; returns each page's ids"""
+    pages = []
+    while True:
+        params = {"sort": sort, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/patients", params=params)
+        assert response.status_code == 200
+        pages.append([patient["id"] for patient in response.json()])
+        cursor = response.headers.get(header)
+        if not cursor:
+            return pages, response
+
+
+def test_next_cursor_visits_every_row_once_in_order(client, db):
+    patients = add_patients(db)
+    for sort, expected in (
+        ("tanggal_kunjungan", sorted(patients, key=lambda p: (p.tanggal_kunjungan, p.id))),
+        ("-tanggal_kunjungan", sorted(patients, key=lambda p: (p.tanggal_kunjungan, p.id), reverse=True)),
+        ("-id", sorted(patients, key=lambda p: p.id, reverse=True)),
+    ):
+        pages, _ = walk(client, sort, 3)
+        assert [len(page) for page in pages] == [3, 3, 2]
+        assert [patient_id for page in pages for patient_id in page] == [p.id for p in expected]
+
+
+def test_prev_cursor_walks_back_over_the_same_pages(client, db):
+    add_patients(db)
+    forward, last = walk(client, "tanggal_kunjungan", 3)
+    backward, first = walk(client, "tanggal_kunjungan", 3, "X-Prev-Cursor", last.headers["X-Prev-Cursor"])
+    assert backward == forward[-2::-1]
+    assert "X-Prev-Cursor" not in first.headers
+    assert first.headers["X-Next-Cursor"]
+
+
+def test_ties_are_broken_by_id(client, db):
+    patients = add_patients(db)
+    same_day = sorted(p.id for p in patients if p.tanggal_kunjungan == date(2024, 1, 2))
+    pages, _ = walk(client, "tanggal_kunjungan", 2)
+    ids = [patient_id for page in pages for patient_id in page]
+    assert [patient_id for patient_id in ids if patient_id in same_day] == same_day
+    assert len(ids) == len(set(ids)) == len(patients)
+
+
+def test_bad_cursors_are_rejected(client, db):
+    add_patients(db)
+    response = client.get("/api/patients", params={"sort": "nama", "limit": 2})
+    cursor = response.headers["X-Next-Cursor"]
+    assert client.get("/api/patients", params={"sort": "-nama", "cursor": cursor}).status_code == 400
+    assert client.get("/api/patients", params={"sort": "nama", "cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/patients", params={"sort": "diagnosis"}).status_code == 400
+
+
+def crafted_cursor(sort, value, last_id=1, direction="next"):
+    payload = json.dumps({"s": sort, "v": value, "id": last_id, "d": direction})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def test_crafted_cursors_are_rejected_not_500(db):
+    add_patients(db)
+    client = TestClient(main.app, raise_server_exceptions=False)
+    for sort, value, last_id in (
+        ("nama", ["Pasien 1"], 1),
+        ("nama", {"a": 1}, 1),
+        ("nama", 5, 1),
+        ("nama", "\ud800", 1),
+        ("nama", "Pasien 1", "1"),
+        ("nama", "Pasien 1", True),
+        ("nama", "Pasien 1", 2 ** 70),
+        ("id", "5", 1),
+        ("id", 2 ** 64, 1),
+        ("-id", 3.5, 1),
+        ("tanggal_kunjungan", 20240101, 1),
+        ("tanggal_kunjungan", "2024-13-01", 1),
+    ):
+        response = client.get("/api/patients", params={"sort": sort, "cursor": crafted_cursor(sort, value, last_id)})
+        assert response.status_code == 400, (sort, value, last_id)
+    assert client.get("/api/patients", params={"sort": "nama", "cursor": crafted_cursor("nama", "Pasien 1", 1)}).status_code == 200
@@ -0,0 +1,56 @@
+from datetime import date
+
+from models import Patient
+
+
+def add_patient(db):
+    patient = Patient(nama="Siti Aminah", tanggal_lahir=date(1985, 6, 15), tanggal_kunjungan=date(2024, 3, 1),
+                      dokter="Dr. Budi", diagnosis="Flu", tindakan="Istirahat")
+    db.add(patient)
+    db.commit()
+    return patient.id
+
+
+def test_patch_writes_only_the_given_fields(dokter_client, db):
+    patient_id = add_patient(db)
+    response = dokter_client.patch(f"/api/patients/{patient_id}", json={"diagnosis": "Demam berdarah"})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["diagnosis"], body["dokter"], body["tindakan"]) == ("Demam berdarah", "Dr. Budi", "Istirahat")
+    assert response.headers["ETag"] == dokter_client.get(f"/api/patients/{patient_id}").headers["ETag"]
+
+
+def test_if_match_with_a_stale_etag_fails_with_412(dokter_client, db):
+    patient_id = add_patient(db)
+    etag = dokter_client.get(f"/api/patients/{patient_id}").headers["ETag"]
+    first = dokter_client.patch(f"/api/patients/{patient_id}", json={"dokter": "Dr. Sarah"}, headers={"If-Match": etag})
+    assert first.status_code == 200
+    assert first.headers["ETag"] != etag
+
+    # A second editor still holding the first ETag must not overwrite that edit
+    stale = dokter_client.patch(f"/api/patients/{patient_id}", json={"dokter": "Dr. Andi"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    db.expire_all()
+    assert db.get(Patient, patient_id).dokter == "Dr. Sarah"
+
+    fresh = dokter_client.patch(
+        f"/api/patients/{patient_id}", json={"dokter": "Dr. Andi"}, headers={"If-Match": first.headers["ETag"]}
+    )
+    assert fresh.status_code == 200
+
+
+def test_if_match_for_another_patient_or_malformed_fails_with_412(dokter_client, db):
+    patient_id = add_patient(db)
+    for if_match in (f'"{patient_id + 1}.0"', '"garbage"'):
+        response = dokter_client.patch(f"/api/patients/{patient_id}", json={"dokter": "Dr. Sarah"}, headers={"If-Match": if_match})
+        assert response.status_code == 412
+    assert dokter_client.patch(f"/api/patients/{patient_id}", json={"dokter": "Dr. Sarah"}, headers={"If-Match": "*"}).status_code == 200
+
+
+def test_patch_errors(client, dokter_client, db):
+    patient_id = add_patient(db)
+    assert dokter_client.patch(f"/api/patients/{patient_id}", json={}).status_code == 400
+    assert dokter_client.patch(f"/api/patients/{patient_id}", json={"nama": None}).status_code == 400
+    assert dokter_client.patch(f"/api/patients/{patient_id + 1}", json={"dokter": "Dr. Sarah"}).status_code == 404
+    client.cookies.clear()
+    assert client.patch(f"/api/patients/{patient_id}", json={"dokter": "Dr. Sarah"}).status_code == 401
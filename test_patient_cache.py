@@ -0,0 +1,87 @@
+import pytest
+
+from models import Patient
+from patient_cache import PatientCache, patient_cache
+
+PATIENT = {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01",
+           "dokter": "Dr. Budi", "diagnosis": "Flu", "tindakan": ""}
+
+
+@pytest.fixture
+def cached(dokter_client):
+    """A patient whose record is in the cache"""
+    patient_id = dokter_client.post("/api/patients", json=PATIENT).json()["id"]
+    dokter_client.get(f"/api/patients/{patient_id}")
+    assert patient_cache.get(patient_id) is not None
+    return patient_id
+
+
+def dokter_of(client, patient_id):
+    response = client.get(f"/api/patients/{patient_id}")
+    return response.json()["dokter"] if response.status_code == 200 else response.status_code
+
+
+WRITES = {
+    "patch": lambda client, patient_id: client.patch(f"/api/patients/{patient_id}", json={"dokter": "Dr. Sarah"}),
+    "form put": lambda client, patient_id: client.put(
+        f"/patients/{patient_id}", data={**PATIENT, "dokter": "Dr. Sarah"}, follow_redirects=False),
+    "form post": lambda client, patient_id: client.post(
+        f"/patients/{patient_id}/update", data={**PATIENT, "dokter": "Dr. Sarah"}, follow_redirects=False),
+    "bulk update": lambda client, patient_id: client.post(
+        "/api/patients/bulk-update", json={"ids": [patient_id], "changes": {"dokter": "Dr. Sarah"}}),
+    "bulk update by filter": lambda client, patient_id: client.post(
+        "/api/patients/bulk-update", json={"filter": {"dokter": "Dr. Budi"}, "changes": {"dokter": "Dr. Sarah"}}),
+    "merging import": lambda client, patient_id: client.post(
+        "/api/import", json={"patients": [{**PATIENT, "dokter": "Dr. Sarah"}]}, params={"on_duplicate": "merge"}),
+}
+
+
+@pytest.mark.parametrize("write", WRITES.values(), ids=WRITES.keys())
+def test_updates_are_never_served_stale(dokter_client, cached, write):
+    assert write(dokter_client, cached).status_code in (200, 303)
+    assert patient_cache.get(cached) is None
+    assert dokter_of(dokter_client, cached) == "Dr. Sarah"
+
+
+DELETES = {
+    "form delete": lambda client, patient_id: client.post(f"/patients/{patient_id}/delete", follow_redirects=False),
+    "bulk delete": lambda client, patient_id: client.post("/api/patients/bulk-delete", json={"ids": [patient_id]}),
+    "bulk delete by filter": lambda client, patient_id: client.post(
+        "/api/patients/bulk-delete", json={"filter": {"q": "siti"}}),
+}
+
+
+@pytest.mark.parametrize("delete", DELETES.values(), ids=DELETES.keys())
+def test_deleted_patients_are_not_served(dokter_client, cached, delete):
+    assert delete(dokter_client, cached).status_code in (200, 303)
+    assert dokter_of(dokter_client, cached) == 404
+
+
+def test_orm_writes_invalidate_through_mapper_events(dokter_client, cached, db):
+    db.get(Patient, cached).dokter = "Dr. Sarah"
+    db.commit()
+    assert dokter_of(dokter_client, cached) == "Dr. Sarah"
+
+
+def test_a_read_that_raced_a_write_is_not_cached():
+    cache = PatientCache(max_entries=10, ttl_seconds=60)
+    # The reader noted the generation, then a write invalidated before it stored its row
+    generation = cache.generation
+    cache.invalidate(1)
+    cache.put(1, b"{}", {}, None, generation)
+    assert cache.get(1) is None
+    cache.put(1, b"{}", {}, None, cache.generation)
+    assert cache.get(1) == (b"{}", {}, None)
+
+
+def test_entries_expire_and_are_evicted_least_recently_used_first():
+    cache = PatientCache(max_entries=2, ttl_seconds=60)
+    for patient_id in (1, 2):
+        cache.put(patient_id, b"{}", {}, None, cache.generation)
+    cache.get(1)
+    cache.put(3, b"{}", {}, None, cache.generation)
+    assert [cache.get(patient_id) is not None for patient_id in (1, 2, 3)] == [True, False, True]
+
+    expired = PatientCache(max_entries=2, ttl_seconds=0)
+    expired.put(1, b"{}", {}, None, expired.generation)
+    assert expired.get(1) is None
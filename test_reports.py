@@ -0,0 +1,27 @@
+VISITS = [
+    {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01", "dokter": "Dr. Budi"},
+    {"nama": "Budi Santoso", "tanggal_lahir": "1950-01-20", "tanggal_kunjungan": "2024-03-04", "dokter": "Dr. Budi"},
+]
+
+
+def test_visit_series_is_zero_filled(client):
+    client.post("/api/import", json={"patients": VISITS})
+    report = client.get("/api/reports/visits", params={"period": "day"}).json()
+    assert report["total"] == 2
+    assert [(day["period_start"], day["visits"]) for day in report["visits"]] == [
+        ("2024-03-01", 1), ("2024-03-02", 0), ("2024-03-03", 0), ("2024-03-04", 1),
+    ]
+
+
+def test_visit_series_range_is_clamped_to_stored_days(client):
+    client.post("/api/import", json={"patients": VISITS})
+    report = client.get(
+        "/api/reports/visits", params={"period": "day", "date_from": "0001-01-01", "date_to": "9999-12-31"}
+    ).json()
+    assert [day["period_start"] for day in report["visits"]] == ["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-04"]
+
+    report = client.get("/api/reports/visits", params={"period": "year", "date_from": "0001-01-01", "date_to": "9999-12-31"}).json()
+    assert report["visits"] == [{"period_start": "2024-01-01", "visits": 2}]
+
+    report = client.get("/api/reports/visits", params={"period": "day", "date_from": "2024-03-03"}).json()
+    assert [(day["period_start"], day["visits"]) for day in report["visits"]] == [("2024-03-03", 0), ("2024-03-04", 1)]
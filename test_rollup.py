@@ -0,0 +1,99 @@
+from sqlalchemy import select
+
+from models import DailyVisit, DailyVisitAge, Patient
+from rollup import recount_visits
+
+FIRST = {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01",
+         "dokter": "Dr. Budi", "diagnosis": "Flu"}
+SECOND = {"nama": "Budi Santoso", "tanggal_lahir": "1950-01-20", "tanggal_kunjungan": "2024-03-01",
+          "dokter": "Dr. Budi", "diagnosis": "Flu"}
+
+
+def rollups(db):
+    return (
+        sorted(db.execute(select(DailyVisit.tanggal_kunjungan, DailyVisit.dokter, DailyVisit.diagnosis, DailyVisit.visits)).all()),
+        sorted(db.execute(select(DailyVisitAge.tanggal_kunjungan, DailyVisitAge.dokter, DailyVisitAge.age_band, DailyVisitAge.visits)).all()),
+    )
+
+
+def assert_rollups_match_patients(db):
+    """The incrementally kept rollups equal a full recount from patients"""
+    db.rollback()
+    kept = rollups(db)
+    recount_visits(db)
+    recounted = rollups(db)
+    db.rollback()
+    assert kept == recounted
+    return kept
+
+
+def patient_id(db, nama):
+    db.rollback()
+    return db.scalar(select(Patient.id).where(Patient.nama == nama))
+
+
+def test_insert(dokter_client, db):
+    assert dokter_client.post("/api/patients", json=FIRST).status_code == 200
+    form = {**SECOND, "tindakan": ""}
+    assert dokter_client.post("/patients", data=form, follow_redirects=False).status_code == 303
+    visits, _ = assert_rollups_match_patients(db)
+    assert [row.visits for row in visits] == [2]
+
+    assert dokter_client.post("/api/import", json={"patients": [{**FIRST, "tanggal_kunjungan": "2024-03-02"}]}).status_code == 200
+    visits, _ = assert_rollups_match_patients(db)
+    assert [row.visits for row in visits] == [2, 1]
+
+
+def test_patch(dokter_client, db):
+    dokter_client.post("/api/import", json={"patients": [FIRST, SECOND]})
+    first = patient_id(db, FIRST["nama"])
+    for changes in ({"dokter": "Dr. Sarah"}, {"tanggal_kunjungan": "2024-04-01"}, {"tanggal_lahir": "2010-01-01"}, {"diagnosis": None}):
+        assert dokter_client.patch(f"/api/patients/{first}", json=changes).status_code == 200
+        assert_rollups_match_patients(db)
+
+    form = {**FIRST, "tindakan": "", "dokter": "Dr. Andi"}
+    assert dokter_client.post(f"/patients/{first}/update", data=form, follow_redirects=False).status_code == 303
+    assert_rollups_match_patients(db)
+
+    bulk = {"filter": {"dokter": "Dr. Budi"}, "changes": {"diagnosis": "Tifus", "tanggal_kunjungan": "2024-05-01"}}
+    assert dokter_client.post("/api/patients/bulk-update", json=bulk).json() == {"affected": 1}
+    assert_rollups_match_patients(db)
+
+
+def test_delete(dokter_client, db):
+    dokter_client.post("/api/import", json={"patients": [FIRST, SECOND, {**SECOND, "tanggal_kunjungan": "2024-03-05"}]})
+    assert dokter_client.post(f"/patients/{patient_id(db, FIRST['nama'])}/delete", follow_redirects=False).status_code == 303
+    visits, ages = assert_rollups_match_patients(db)
+    assert len(visits) == len(ages) == 2
+
+    assert dokter_client.post("/api/patients/bulk-delete", json={"filter": {"date_from": "2024-03-01"}}).json() == {"affected": 2}
+    assert assert_rollups_match_patients(db) == ([], [])
+
+
+def test_merge(dokter_client, db):
+    dokter_client.post("/api/import", json={"patients": [FIRST, SECOND]})
+    repeat = {**FIRST, "dokter": "Dr. Sarah", "diagnosis": "Demam berdarah"}
+    result = dokter_client.post("/api/import", json={"patients": [repeat]}, params={"on_duplicate": "merge"}).json()
+    assert result["duplicates"] == 1
+    visits, _ = assert_rollups_match_patients(db)
+    assert [(row.dokter, row.diagnosis, row.visits) for row in visits] == [
+        ("Dr. Budi", "Flu", 1),
+        ("Dr. Sarah", "Demam berdarah", 1),
+    ]
+
+
+def test_form_edit_and_delete(dokter_client, db):
+    dokter_client.post("/api/import", json={"patients": [FIRST, SECOND]})
+    first = patient_id(db, FIRST["nama"])
+    form = {**FIRST, "tindakan": "", "tanggal_kunjungan": "2024-03-09", "dokter": "Dr. Andi"}
+    assert dokter_client.put(f"/patients/{first}", data=form, follow_redirects=False).status_code == 303
+    assert dokter_client.post(f"/patients/{first}/update", data={**form, "diagnosis": "Tifus"}, follow_redirects=False).status_code == 303
+    visits, _ = assert_rollups_match_patients(db)
+    assert [(row.dokter, row.diagnosis) for row in visits] == [("Dr. Budi", "Flu"), ("Dr. Andi", "Tifus")]
+    assert dokter_client.post(f"/patients/{first + 100}/update", data=form, follow_redirects=False).status_code == 404
+
+    # Deleting a row twice must decrement its visit once
+    assert dokter_client.post(f"/patients/{first}/delete", follow_redirects=False).status_code == 303
+    assert dokter_client.post(f"/patients/{first}/delete", follow_redirects=False).status_code == 404
+    visits, _ = assert_rollups_match_patients(db)
+    assert [row.visits for row in visits] == [1]
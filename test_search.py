@@ -0,0 +1,97 @@
+import pytest
+
+import filters
+from database import replicas
+from filters import has_fts_table
+from search import NOTES_FTS_TABLE
+
+PATIENTS = [
+    {"nama": "Siti Aminah", "diagnosis": "Flu berat", "tindakan": "Minum air & istirahat"},
+    {"nama": "Budi Santoso", "diagnosis": "Demam tinggi", "tindakan": "Dosis 100% selama 3 hari"},
+    {"nama": "Andi Wijaya", "diagnosis": "Flu", "tindakan": "Dosis 1000 mg, obat_a"},
+    {"nama": "Rina Lubis", "diagnosis": "Tifus", "tindakan": "Obatxa <b>malam</b>"},
+]
+
+
+def add_patients(client):
+    client.post("/api/import", json={"patients": [
+        {**patient, "tanggal_lahir": "1980-01-01", "tanggal_kunjungan": "2024-03-01"} for patient in PATIENTS
+    ]})
+
+
+def without_fts(monkeypatch):
+    # Keyed like has_fts_table resolves the async read session's bind
+    monkeypatch.setitem(filters.fts_tables, (replicas.primary, NOTES_FTS_TABLE), False)
+
+
+@pytest.fixture(params=["fts", "fallback"])
+def search_client(request, client, monkeypatch):
+    """The client, searching through the FTS table or as if it were missing on the read bind"""
+    add_patients(client)
+    if request.param == "fallback":
+        without_fts(monkeypatch)
+    return client
+
+
+def search(client, q, **params):
+    response = client.get("/api/patients/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response
+
+
+def names(client, q, **params):
+    return [hit["nama"] for hit in search(client, q, **params).json()]
+
+
+def test_fts_table_is_found_through_the_async_bind():
+    assert has_fts_table(replicas.primary, NOTES_FTS_TABLE)
+
+
+def test_terms_and_phrases(search_client):
+    assert sorted(names(search_client, "flu")) == ["Andi Wijaya", "Siti Aminah"]
+    assert names(search_client, "flu berat") == ["Siti Aminah"]
+    assert names(search_client, '"demam tinggi"') == ["Budi Santoso"]
+    assert names(search_client, "demam flu") == []
+
+
+@pytest.mark.parametrize("q", ["flu OR demam", "NEAR(flu berat)", "diagnosis:flu", "flu AND NOT demam"])
+def test_fts_operators_are_matched_as_words(search_client, q):
+    assert names(search_client, q) == []
+
+
+@pytest.mark.parametrize("q", ['"', 'flu"', '"flu', "(", "flu*", "*", "-flu", "^flu", ":", "'", "\\", "%", "_"])
+def test_punctuation_is_searched_as_text(search_client, q):
+    search(search_client, q)
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("100%", ["Budi Santoso"]),
+    ("%", ["Budi Santoso"]),
+    ("obat_a", ["Andi Wijaya"]),
+    ("_", ["Andi Wijaya"]),
+])
+def test_fallback_matches_like_wildcards_literally(client, monkeypatch, q, expected):
+    add_patients(client)
+    without_fts(monkeypatch)
+    assert names(client, q) == expected
+
+
+def test_highlights_are_html_safe(search_client):
+    [hit] = search(search_client, "istirahat").json()
+    assert hit["highlights"] == {"diagnosis": "Flu berat", "tindakan": "Minum air &amp; <mark>istirahat</mark>"}
+    [hit] = search(search_client, "malam").json()
+    assert hit["highlights"]["tindakan"] == "Obatxa &lt;b&gt;<mark>malam</mark>&lt;/b&gt;"
+
+
+def test_pages_follow_the_cursor(search_client):
+    first = search(search_client, "dosis", limit=1)
+    cursor = first.headers["X-Next-Cursor"]
+    second = search(search_client, "dosis", limit=1, cursor=cursor)
+    assert "X-Next-Cursor" not in second.headers
+    assert sorted(hit["nama"] for hit in first.json() + second.json()) == ["Andi Wijaya", "Budi Santoso"]
+    # A cursor only continues the query it came from
+    assert search_client.get("/api/patients/search", params={"q": "flu", "cursor": cursor}).status_code == 400
+
+
+def test_blank_query_is_rejected(client):
+    assert client.get("/api/patients/search", params={"q": "   "}).status_code == 400
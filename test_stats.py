@@ -0,0 +1,53 @@
+import threading
+
+import stats
+from stats import StatsDelta, stats_cache
+
+PATIENT = {"nama": "Siti Aminah", "tanggal_lahir": "1985-06-15", "tanggal_kunjungan": "2024-03-01",
+           "dokter": "Dr. Budi", "diagnosis": "Flu"}
+
+
+def test_writes_are_not_blocked_by_a_reload(db, monkeypatch):
+    loading, release = threading.Event(), threading.Event()
+    load_stats = stats.load_stats
+
+    def slow_load(session):
+        loading.set()
+        release.wait(5)
+        return load_stats(session)
+
+    monkeypatch.setattr(stats, "load_stats", slow_load)
+    reader = threading.Thread(target=stats_cache.get, args=(db,))
+    reader.start()
+    assert loading.wait(5)
+    # A write folding in its delta mid-reload (as the event loop does) must not wait for it
+    applied = threading.Thread(target=stats_cache.apply, args=(StatsDelta(),))
+    applied.start()
+    applied.join(1)
+    assert not applied.is_alive()
+    release.set()
+    reader.join(5)
+
+
+def test_a_reload_racing_a_write_is_not_kept(dokter_client, db, monkeypatch):
+    load_stats = stats.load_stats
+
+    def load_then_write(session):
+        snapshot = load_stats(session)
+        # Committed after the load read the table, folded in before it finishes
+        assert dokter_client.post("/api/patients", json=PATIENT).status_code == 200
+        return snapshot
+
+    monkeypatch.setattr(stats, "load_stats", load_then_write)
+    assert dokter_client.get("/api/stats").json()["total_patients"] == 0
+    monkeypatch.setattr(stats, "load_stats", load_stats)
+    assert dokter_client.get("/api/stats").json()["total_patients"] == 1
+
+
+def test_stats_follow_writes(dokter_client):
+    assert dokter_client.get("/api/stats").json()["total_patients"] == 0
+    patient_id = dokter_client.post("/api/patients", json=PATIENT).json()["id"]
+    dokter_client.post("/api/import", json={"patients": [{**PATIENT, "nama": "Budi"}]})
+    assert dokter_client.get("/api/stats").json()["total_patients"] == 2
+    dokter_client.post(f"/patients/{patient_id}/delete", follow_redirects=False)
+    assert dokter_client.get("/api/stats").json()["total_patients"] == 1